@@ -0,0 +1,158 @@
+# Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+# Display driver for lcd_bus.HeadlessBus (unix port). There is no display,
+# the flushed data ends up in a frame buffer in the bus that can be saved to
+# a PPM or PNG file or checked using a checksum.
+#
+#   bus = lcd_bus.HeadlessBus(checksum=True)
+#   display = headless_display.HeadlessDisplay(
+#       data_bus=bus,
+#       display_width=320,
+#       display_height=240
+#   )
+
+import struct
+import lvgl as lv  # NOQA
+import display_driver_framework
+
+
+class HeadlessDisplay(display_driver_framework.DisplayDriver):
+
+    def __init__(
+        self,
+        data_bus,
+        display_width,
+        display_height,
+        frame_buffer1=None,
+        frame_buffer2=None,
+        offset_x=0,
+        offset_y=0,
+        color_space=lv.COLOR_FORMAT.RGB565,  # NOQA
+        rgb565_byte_swap=False
+    ):
+        if frame_buffer1 is None:
+            # same partial buffer size the other drivers default to so the
+            # number of flushes per frame is close to what a MCU would see.
+            buf_size = lv.color_format_get_size(color_space)
+            buf_size *= display_width * display_height // 10
+
+            frame_buffer1 = data_bus.allocate_framebuffer(buf_size, 0)
+
+        super().__init__(
+            data_bus=data_bus,
+            display_width=display_width,
+            display_height=display_height,
+            frame_buffer1=frame_buffer1,
+            frame_buffer2=frame_buffer2,
+            offset_x=offset_x,
+            offset_y=offset_y,
+            color_space=color_space,
+            rgb565_byte_swap=rgb565_byte_swap
+        )
+
+    def init(self):
+        self._initilized = True
+
+    def set_rotation(self, value):
+        self._disp_drv.set_rotation(value)
+        self._rotation = value
+
+    def get_power(self):
+        return True
+
+    def get_backlight(self):
+        return 100.0
+
+    def invert_colors(self):
+        pass
+
+    def get_bus_stats(self):
+        return self._data_bus.get_stats()
+
+    def reset_bus_stats(self):
+        self._data_bus.reset_stats()
+
+    def checksum(self):
+        return self._data_bus.checksum()
+
+    def _rgb_rows(self):
+        # converts the frame buffer to RGB888 one row at a time
+        fb = self._data_bus.get_framebuffer()
+        width = self.display_width
+        height = self.display_height
+        bpp = lv.color_format_get_size(self._color_space)
+        pitch = width * bpp
+        row = bytearray(width * 3)
+
+        rgb565 = self._color_space == lv.COLOR_FORMAT.RGB565  # NOQA
+        if not rgb565 and bpp not in (3, 4):
+            raise RuntimeError('Color format is not supported')
+
+        byte_swap = self._rgb565_byte_swap
+
+        for y in range(height):
+            src = y * pitch
+            dst = 0
+
+            for _ in range(width):
+                if rgb565:
+                    if byte_swap:
+                        value = (fb[src] << 8) | fb[src + 1]
+                    else:
+                        value = fb[src] | (fb[src + 1] << 8)
+
+                    r = (value >> 11) & 0x1F
+                    g = (value >> 5) & 0x3F
+                    b = value & 0x1F
+
+                    row[dst] = (r << 3) | (r >> 2)
+                    row[dst + 1] = (g << 2) | (g >> 4)
+                    row[dst + 2] = (b << 3) | (b >> 2)
+                else:
+                    # LVGL stores 24 and 32 bit colors as B, G, R(, A)
+                    row[dst] = fb[src + 2]
+                    row[dst + 1] = fb[src + 1]
+                    row[dst + 2] = fb[src]
+
+                src += bpp
+                dst += 3
+
+            yield row
+
+    def save_ppm(self, file_name):
+        with open(file_name, 'wb') as f:
+            f.write(
+                f'P6\n{self.display_width} {self.display_height}\n255\n'.encode()
+            )
+            for row in self._rgb_rows():
+                f.write(row)
+
+    def save_png(self, file_name):
+        # needs the deflate module with compression enabled, the unix port
+        # has it.
+        import deflate  # NOQA
+        import binascii
+        import io
+
+        raw = io.BytesIO()
+        with deflate.DeflateIO(raw, deflate.ZLIB) as d:
+            for row in self._rgb_rows():
+                # filter type 0 (none) for every row
+                d.write(b'\x00')
+                d.write(row)
+
+        def chunk(f, chunk_type, data):
+            f.write(struct.pack('>I', len(data)))
+            f.write(chunk_type)
+            f.write(data)
+            crc = binascii.crc32(data, binascii.crc32(chunk_type))
+            f.write(struct.pack('>I', crc & 0xFFFFFFFF))
+
+        with open(file_name, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+            # 8 bits per channel, color type 2 (RGB)
+            chunk(f, b'IHDR', struct.pack(
+                '>IIBBBBB', self.display_width, self.display_height,
+                8, 2, 0, 0, 0))
+            chunk(f, b'IDAT', raw.getvalue())
+            chunk(f, b'IEND', b'')
@@ -32,6 +32,8 @@ class HX8369(display_driver_framework.DisplayDriver):
         if self._reset_pin is None:
             return
 
+        self._invalidate_window()
+
         self._reset_pin.value(self._reset_state)
         time.sleep_ms(25)  # NOQA
         self._reset_pin.value(not self._reset_state)
@@ -164,6 +164,7 @@ class SDLDisplay(display_driver_framework.DisplayDriver):
             8
         )
 
+        self._update_flush_plan()
         self._disp_drv.set_flush_cb(self._flush_cb)
 
         self._disp_drv.set_buffers(
@@ -216,9 +216,7 @@ class ST7701(rgb_display_framework.RGBDisplayDriver):
         if type < 1 or type > 17:
             raise RuntimeError('Invalid display type')
 
-        mod_name = f'_st7701_type{type}'
-        mod = __import__(mod_name)
-        mod.init(self)
+        self._run_init_module(f'_st7701_type{type}')
 
     def set_noise_reduction(self, value):
         if value:
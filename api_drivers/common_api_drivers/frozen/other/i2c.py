@@ -1,9 +1,22 @@
 # Copyright (c) 2024 - 2025 Kevin G. Schlosser
 
 import machine
+import time
+
+
+def _no_lock(*_):
+    pass
 
 
 class I2C(object):
+    # When use_locks is set and more than one thread is waiting for the bus
+    # the device with the highest priority gets it next, devices with the
+    # same priority get it in the order they asked for it.
+    PRIORITY_LOW = 0  # battery gauges and the like
+    PRIORITY_NORMAL = 1  # IMUs and other sensors
+    PRIORITY_HIGH = 2  # IO expanders
+    PRIORITY_HIGHEST = 3  # touch
+
     class Bus(object):
 
         def __init__(self, host, scl, sda, freq=400000, use_locks=False):
@@ -14,38 +27,146 @@ class I2C(object):
                 freq=freq
             )
 
+            self.priority = I2C.PRIORITY_NORMAL
+            self._devices = []
+            self._stats = False
+            self._stats_start = time.ticks_ms()  # NOQA
+
+            # thread id of the current owner, the devices can use the bus
+            # again while they own it (see Device.__enter__)
+            self._owner = None
+            self._depth = 0
+            # (priority, lock, thread id) of the threads waiting for the bus,
+            # highest priority first
+            self._waiting = []
+
             if use_locks:
                 import _thread
+
                 self._lock = _thread.allocate_lock()
+                self._allocate_lock = _thread.allocate_lock
+                self._get_ident = _thread.get_ident
             else:
-                class Lock(object):
-
-                    @staticmethod
-                    def acquire():
-                        pass
-
-                    @staticmethod
-                    def release():
-                        pass
-
-                    @staticmethod
-                    def is_locked():
-                        return False
+                self._lock = None
+
+        def _acquire(self, priority):
+            lock = self._lock
+            if lock is None:
+                return
+
+            ident = self._get_ident()
+            if self._owner == ident:
+                self._depth += 1
+                return
+
+            lock.acquire()
+            if self._owner is None:
+                self._owner = ident
+                self._depth = 1
+                lock.release()
+                return
+
+            waiter = self._allocate_lock()
+            waiter.acquire()
+
+            waiting = self._waiting
+            i = 0
+            while i < len(waiting) and waiting[i][0] >= priority:
+                i += 1
+
+            waiting.insert(i, (priority, waiter, ident))
+            lock.release()
+
+            # _release hands the bus over by releasing the waiter
+            waiter.acquire()
+
+        def _release(self):
+            lock = self._lock
+            if lock is None:
+                return
+
+            self._depth -= 1
+            if self._depth:
+                return
+
+            lock.acquire()
+            if self._waiting:
+                _, waiter, ident = self._waiting.pop(0)
+                self._owner = ident
+                self._depth = 1
+                waiter.release()
+            else:
+                self._owner = None
 
-                self._lock = Lock
+            lock.release()
 
         def __enter__(self):
-            self._lock.acquire()
+            self._acquire(self.priority)
             return self
 
         def __exit__(self, exc_type, exc_val, exc_tb):
-            self._lock.release()
+            self._release()
+
+        def enable_stats(self, enable=True):
+            """
+            Turns timing and counting the transactions of the devices on or
+            off, the stats get reset either way.
+            """
+            self._stats = enable
+            for device in self._devices:
+                device._stats = enable  # NOQA
+
+            self.reset_stats()
+
+        def get_stats(self):
+            """
+            Returns (dev_id, priority, transactions, bytes, busy_us, wait_us,
+            max_wait_us) for every device and the milliseconds since the
+            stats were reset.
+            """
+            elapsed = time.ticks_diff(time.ticks_ms(), self._stats_start)  # NOQA
+
+            return [
+                (
+                    device.dev_id,
+                    device.priority,
+                    device.transactions,
+                    device.bytes,
+                    device.busy_us,
+                    device.wait_us,
+                    device.max_wait_us
+                )
+                for device in self._devices
+            ], elapsed
+
+        def reset_stats(self):
+            for device in self._devices:
+                device.reset_stats()
+
+            self._stats_start = time.ticks_ms()  # NOQA
+
+        def print_stats(self):
+            stats, elapsed = self.get_stats()
+            elapsed = max(elapsed, 1) * 1000
+
+            print('device  priority  transactions     bytes  busy %  wait us  max wait us')
+            busy = 0
+            for dev_id, priority, count, nbytes, busy_us, wait_us, max_wait_us in stats:
+                busy += busy_us
+                print(
+                    f'0x{dev_id:02X}    {priority:>8}  {count:>12}  {nbytes:>8}  '
+                    f'{busy_us * 100 / elapsed:>6.1f}  {wait_us // max(count, 1):>7}  '
+                    f'{max_wait_us:>11}'
+                )
+
+            print(f'bus busy {busy * 100 / elapsed:.1f}% of {elapsed // 1000}ms')
 
         def scan(self):
-            self._lock.acquire()
-            data = self._bus.scan()
-            self._lock.release()
-            return data
+            self._acquire(self.priority)
+            try:
+                return self._bus.scan()
+            finally:
+                self._release()
 
         def start(self):
             self._bus.start()
@@ -83,11 +204,78 @@ class I2C(object):
 
     class Device(object):
 
-        def __init__(self, bus, dev_id, reg_bits=8):
+        def __init__(self, bus, dev_id, reg_bits=8, priority=None):
             self._bus = bus
             self.dev_id = dev_id
             self._reg_bits = reg_bits
 
+            self._priority_set = priority is not None
+            if priority is None:
+                priority = I2C.PRIORITY_NORMAL
+
+            self.priority = priority
+            self.reset_stats()
+
+            if isinstance(bus, I2C.Bus):
+                bus._devices.append(self)  # NOQA
+                self._acquire = bus._acquire  # NOQA
+                self._release = bus._release  # NOQA
+                self._stats = bus._stats  # NOQA
+            else:
+                self._acquire = _no_lock
+                self._release = _no_lock
+                self._stats = False
+
+        def set_default_priority(self, priority):
+            # the drivers use this, a priority passed to the constructor
+            # is kept
+            if not self._priority_set:
+                self.priority = priority
+
+        def deinit(self):
+            bus = self._bus
+            if isinstance(bus, I2C.Bus) and self in bus._devices:  # NOQA
+                bus._devices.remove(self)  # NOQA
+
+        def reset_stats(self):
+            self.transactions = 0
+            self.bytes = 0
+            self.busy_us = 0
+            self.wait_us = 0
+            self.max_wait_us = 0
+
+        def _begin(self):
+            if not self._stats:
+                self._acquire(self.priority)
+                return None
+
+            start = time.ticks_us()  # NOQA
+            self._acquire(self.priority)
+            now = time.ticks_us()  # NOQA
+
+            wait = time.ticks_diff(now, start)  # NOQA
+            self.wait_us += wait
+            if wait > self.max_wait_us:
+                self.max_wait_us = wait
+
+            return now
+
+        def _end(self, start, nbytes):
+            if start is not None:
+                self.busy_us += time.ticks_diff(time.ticks_us(), start)  # NOQA
+                self.transactions += 1
+                self.bytes += nbytes
+
+            self._release()
+
+        def __enter__(self):
+            # keeps the bus for a number of transactions
+            self._acquire(self.priority)
+            return self
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            self._release()
+
         def write_readinto(self, write_buf, read_buf):
             memaddr = 0
 
@@ -96,8 +284,19 @@ class I2C(object):
 
             self.read_mem(memaddr, buf=read_buf)
 
+        def write_then_readinto(self, write_buf, read_buf):
+            # write and read with a repeated start in between, nothing else
+            # can use the bus in the middle
+            start = self._begin()
+            try:
+                self._bus.writeto(self.dev_id, write_buf, False)
+                self._bus.readfrom_into(self.dev_id, read_buf)
+            finally:
+                self._end(start, len(write_buf) + len(read_buf))
+
         def read_mem(self, memaddr, num_bytes=None, buf=None):
-            with self._bus:
+            start = self._begin()
+            try:
                 if num_bytes is not None:
                     return self._bus.readfrom_mem(
                         self.dev_id,
@@ -106,6 +305,7 @@ class I2C(object):
                         addrsize=self._reg_bits
                     )
                 else:
+                    num_bytes = len(buf)
                     self._bus.readfrom_mem_into(
                         self.dev_id,
                         memaddr,
@@ -113,22 +313,49 @@ class I2C(object):
                         addrsize=self._reg_bits
                     )
                     return
+            finally:
+                self._end(start, num_bytes)
 
         def write_mem(self, memaddr, buf):
-            with self._bus:
+            start = self._begin()
+            try:
                 self._bus.writeto_mem(
                     self.dev_id,
                     memaddr,
                     buf,
                     addrsize=self._reg_bits
                 )
+            finally:
+                self._end(start, len(buf))
 
         def read(self, num_bytes=None, buf=None):
-            with self._bus:
+            start = self._begin()
+            try:
                 if num_bytes is not None:
                     return self._bus.readfrom(self.dev_id, num_bytes)
                 else:
+                    num_bytes = len(buf)
                     self._bus.readfrom_into(self.dev_id, buf)
+            finally:
+                self._end(start, num_bytes)
 
         def write(self, buf):
-            self._bus.writeto(self.dev_id, buf)
+            start = self._begin()
+            try:
+                self._bus.writeto(self.dev_id, buf)
+            finally:
+                self._end(start, len(buf))
+
+        def write_vector(self, vector):
+            # the buffers go out back to back in one transaction, a register
+            # address and the data don't need to be copied into one buffer
+            start = self._begin()
+            try:
+                self._bus.writevto(self.dev_id, vector)
+            finally:
+                nbytes = 0
+                if start is not None:
+                    for buf in vector:
+                        nbytes += len(buf)
+
+                self._end(start, nbytes)
@@ -4,6 +4,7 @@
 
 import lvgl as lv  # NOQA
 import micropython  # NOQA
+import array
 import sys
 import time
 
@@ -13,6 +14,9 @@ from machine import Timer  # NOQA
 TASK_HANDLER_STARTED = 0x01
 TASK_HANDLER_FINISHED = 0x02
 
+# returned by lv.timer_handler when there are no timers
+_LV_NO_TIMER_READY = 0xFFFFFFFF
+
 _default_timer_id = 0
 
 if sys.platform in ('pyboard', 'rp2'):
@@ -28,6 +32,127 @@ def _default_exception_hook(e):
     TaskHandler._current_instance.deinit()  # NOQA
 
 
+class FrameProfiler(object):
+    """
+    Fixed size ring buffer of per frame timings.
+
+    All times are in microseconds. Nothing gets allocated while frames are
+    being recorded, the buffers are created when the profiler is created.
+    """
+
+    def __init__(self, size=64):
+        self.size = size
+        self._render = array.array('i', [0] * size)
+        self._callback = array.array('i', [0] * size)
+        self._lag = array.array('i', [0] * size)
+        self._flushes = array.array('i', [0] * size)
+        self._index = 0
+        self._count = 0
+
+        self.frames = 0
+        self.dropped = 0
+        self.flush_count = 0
+
+        self._last_flush_count = 0
+        self._fire_ticks = 0
+        self._fire_valid = False
+        self._display = None
+
+    def _flush_event_cb(self, _):
+        self.flush_count += 1
+
+    def _attach(self):
+        disp = lv.display_get_default()  # NOQA
+        if disp is None:
+            return
+
+        try:
+            disp.add_event_cb(
+                self._flush_event_cb, lv.EVENT.FLUSH_START, None)  # NOQA
+        except AttributeError:
+            # LVGL build without the flush events, flush counts will be 0
+            return
+
+        self._display = disp
+
+    def _detach(self):
+        if self._display is not None:
+            self._display.remove_event_cb_with_user_data(
+                self._flush_event_cb, None)
+            self._display = None
+
+    def add(self, render, callback, lag):
+        i = self._index
+
+        flush_count = self.flush_count
+        self._render[i] = render
+        self._callback[i] = callback
+        self._lag[i] = lag
+        self._flushes[i] = flush_count - self._last_flush_count
+        self._last_flush_count = flush_count
+
+        i += 1
+        if i == self.size:
+            i = 0
+
+        self._index = i
+
+        if self._count < self.size:
+            self._count += 1
+
+        self.frames += 1
+
+    def fired(self):
+        # called by the timer when it schedules a frame, the time until the
+        # frame starts is the scheduler lag. Only the first time counts if
+        # the timer fires again before the frame has run.
+        if not self._fire_valid:
+            self._fire_ticks = time.ticks_us()  # NOQA
+            self._fire_valid = True
+
+    def get_lag(self, frame_start):
+        # returns the scheduler lag of the frame that starts at frame_start
+        # (time.ticks_us), 0 if the frame was not started by the timer.
+        if not self._fire_valid:
+            return 0
+
+        self._fire_valid = False
+        return time.ticks_diff(frame_start, self._fire_ticks)  # NOQA
+
+    def reset(self):
+        self._index = 0
+        self._count = 0
+        self.frames = 0
+        self.dropped = 0
+        self.flush_count = 0
+        self._last_flush_count = 0
+
+    def _stats(self, buf):
+        count = self._count
+        if not count:
+            return 0, 0, 0, 0
+
+        values = sorted(buf[i] for i in range(count))
+        p95 = values[min(count - 1, (count * 95) // 100)]
+        return values[0], sum(values) // count, p95, values[-1]
+
+    def summary(self):
+        """
+        Returns a dict with (min, avg, p95, max) tuples for "render",
+        "callback", "lag" and "flushes" calculated from the frames that are
+        in the buffer along with the total number of "frames" and
+        "dropped" schedules.
+        """
+        return {
+            'render': self._stats(self._render),
+            'callback': self._stats(self._callback),
+            'lag': self._stats(self._lag),
+            'flushes': self._stats(self._flushes),
+            'frames': self.frames,
+            'dropped': self.dropped
+        }
+
+
 class TaskHandler(object):
     _current_instance = None
 
@@ -36,7 +161,10 @@ class TaskHandler(object):
         duration=33,
         timer_id=_default_timer_id,
         max_scheduled=2,
-        exception_hook=_default_exception_hook
+        exception_hook=_default_exception_hook,
+        adaptive=False,
+        min_period=5,
+        max_period=500
     ):
         if TaskHandler._current_instance is not None:
             self.__dict__.update(TaskHandler._current_instance.__dict__)
@@ -55,16 +183,37 @@ class TaskHandler(object):
 
             # Allocation occurs here
             self._task_handler_ref = self._task_handler
+            self._timer_cb_ref = self._timer_cb
             self.max_scheduled = max_scheduled
 
+            # adaptive mode uses a one shot timer that gets set to the time
+            # LVGL says its next timer is due (lv.timer_handler return
+            # value) kept between min_period and max_period. An idle
+            # screen wakes up less often and running animations get
+            # handled back to back.
+            self.adaptive = adaptive
+            self.min_period = min_period
+            self.max_period = max_period
+            self._display = None
+
             self._start_time = time.ticks_ms()  # NOQA
-            self._timer.init(
-                mode=Timer.PERIODIC,
-                period=self.duration,
-                callback=self._timer_cb
-            )
+
+            if adaptive:
+                self._timer.init(
+                    mode=Timer.ONE_SHOT,
+                    period=min_period,
+                    callback=self._timer_cb_ref
+                )
+            else:
+                self._timer.init(
+                    mode=Timer.PERIODIC,
+                    period=self.duration,
+                    callback=self._timer_cb_ref
+                )
+
             self._scheduled = 0
             self._running = False
+            self._profiler = None
 
     def add_event_cb(self, callback, event, user_data=_DefaultUserData):
         for i, (cb, evt, data) in enumerate(self._callbacks):
@@ -89,6 +238,7 @@ class TaskHandler(object):
 
     def deinit(self):
         self._timer.deinit()
+        self._display = None
         TaskHandler._current_instance = None
 
     def disable(self):
@@ -97,17 +247,84 @@ class TaskHandler(object):
     def enable(self):
         self._scheduled -= self.max_scheduled
 
+        if self.adaptive:
+            self.wake()
+
+    def wake(self):
+        # in adaptive mode the handler could be sleeping for up to
+        # max_period. Call this after changing the UI from outside of LVGL
+        # (an interrupt, a network callback, etc) to have it refreshed
+        # without waiting.
+        if self.adaptive:
+            self._set_period(self.min_period)
+
+    def _set_period(self, period):
+        if period < self.min_period:
+            period = self.min_period
+        elif period > self.max_period:
+            period = self.max_period
+
+        self._timer.init(
+            mode=Timer.ONE_SHOT,
+            period=period,
+            callback=self._timer_cb_ref
+        )
+
+    def _refresh_pending(self):
+        # lv.timer_handler only knows about the areas that were invalidated
+        # before it returned. Anything changed by the TASK_HANDLER_FINISHED
+        # callbacks is only in the display's list of invalidated areas.
+        disp = self._display
+        if disp is None:
+            disp = lv.display_get_default()  # NOQA
+            if disp is None:
+                return False
+
+            # LVGL build without the private display fields
+            if not hasattr(disp, 'inv_p'):
+                disp = False
+
+            self._display = disp
+
+        if disp is False:
+            return False
+
+        return disp.inv_p != 0
+
     @classmethod
     def is_running(cls):
         return cls._current_instance is not None
 
+    def enable_profiling(self, size=64):
+        # records the render time, callback time, scheduler lag and number
+        # of flushes for each frame. see FrameProfiler
+        self.disable_profiling()
+        profiler = FrameProfiler(size)
+        profiler._attach()  # NOQA
+        self._profiler = profiler
+        return profiler
+
+    def disable_profiling(self):
+        if self._profiler is not None:
+            self._profiler._detach()  # NOQA
+            self._profiler = None
+
+    def get_profiler(self):
+        return self._profiler
+
     def _task_handler(self, _):
         try:
             self._scheduled -= 1
+            next_period = self.min_period
 
             if lv._nesting.value == 0:  # NOQA
                 self._running = True
 
+                profiler = self._profiler
+                if profiler is not None:
+                    frame_start = time.ticks_us()  # NOQA
+                    lag = profiler.get_lag(frame_start)
+
                 run_update = True
                 for cb, evt, data in self._callbacks:
                     if not evt & TASK_HANDLER_STARTED:
@@ -132,10 +349,22 @@ class TaskHandler(object):
                 self._start_time = stop_time
                 lv.tick_inc(ticks_diff)
 
+                if profiler is not None:
+                    render_start = time.ticks_us()  # NOQA
+
                 if run_update:
-                    lv.task_handler()
+                    if self.adaptive:
+                        next_period = lv.timer_handler()
+                        if next_period == _LV_NO_TIMER_READY:
+                            next_period = self.max_period
+                    else:
+                        lv.task_handler()
+
                     start_time = time.ticks_ms()  # NOQA
 
+                    if profiler is not None:
+                        render_stop = time.ticks_us()  # NOQA
+
                     for cb, evt, data in self._callbacks:
                         if not evt & TASK_HANDLER_FINISHED:
                             continue
@@ -151,20 +380,52 @@ class TaskHandler(object):
                             else:
                                 sys.print_exception(err)  # NOQA
 
-                    stop_time = time.ticks_ms()  # NOQA
-                    ticks_diff = time.ticks_diff(stop_time, start_time)  # NOQA
-                    lv.tick_inc(ticks_diff)
+                    # in adaptive mode the time spent in the callbacks is
+                    # part of the time until the next frame, it gets added
+                    # to the LVGL tick then.
+                    if not self.adaptive:
+                        stop_time = time.ticks_ms()  # NOQA
+                        ticks_diff = time.ticks_diff(stop_time, start_time)  # NOQA
+                        lv.tick_inc(ticks_diff)
+                    elif (
+                        next_period > self.min_period and
+                        self._refresh_pending()
+                    ):
+                        next_period = self.min_period
+
+                if profiler is not None:
+                    frame_stop = time.ticks_us()  # NOQA
+
+                    if run_update:
+                        render = time.ticks_diff(render_stop, render_start)  # NOQA
+                    else:
+                        render = 0
+
+                    callback = (
+                        time.ticks_diff(frame_stop, frame_start) - render  # NOQA
+                    )
+                    profiler.add(render, callback, lag)
 
                 self._running = False
 
+            if self.adaptive and TaskHandler._current_instance is not None:
+                self._set_period(next_period)
+
         except Exception as e:
             self._running = False
             
             if self.exception_hook:
                 self.exception_hook(e)
 
+            if self.adaptive and TaskHandler._current_instance is not None:
+                self._set_period(self.min_period)
+
     def _timer_cb(self, _):
-        lv.tick_inc(self.duration)
+        # in adaptive mode the elapsed time is added to the LVGL tick in
+        # _task_handler, the timer period isn't fixed.
+        if not self.adaptive:
+            lv.tick_inc(self.duration)
+
         if self._running:
             return
 
@@ -173,4 +434,135 @@ class TaskHandler(object):
                 micropython.schedule(self._task_handler_ref, 0)
                 self._scheduled += 1
             except:  # NOQA
-                pass
+                if self._profiler is not None:
+                    self._profiler.dropped += 1
+
+                # the one shot timer only gets set again by _task_handler
+                if self.adaptive:
+                    self._set_period(self.min_period)
+            else:
+                if self._profiler is not None:
+                    self._profiler.fired()
+
+        elif self._profiler is not None:
+            self._profiler.dropped += 1
+
+
+class AsyncTaskHandler(object):
+    """
+    asyncio version of TaskHandler.
+
+    Updates LVGL from a coroutine running in the asyncio event loop instead
+    of a hardware timer and micropython.schedule. After each update it
+    sleeps until the next LVGL timer is due (kept between min_period and
+    max_period) so the rest of the loop gets all of the time in between.
+
+    The TASK_HANDLER_STARTED and TASK_HANDLER_FINISHED callbacks work the
+    same way they do with TaskHandler.
+
+        th = task_handler.AsyncTaskHandler()
+        th.start()
+        asyncio.run(main())
+    """
+    _current_instance = None
+
+    def __init__(self, min_period=1, max_period=100, exception_hook=None):
+        self._callbacks = []
+        self.min_period = min_period
+        self.max_period = max_period
+        self.exception_hook = exception_hook
+        self._task = None
+
+        if not lv.is_initialized():
+            lv.init()
+
+    add_event_cb = TaskHandler.add_event_cb
+    remove_event_cb = TaskHandler.remove_event_cb
+
+    @classmethod
+    def is_running(cls):
+        return cls._current_instance is not None
+
+    def start(self):
+        # creates the task, the event loop needs to be running
+        # (asyncio.run) for it to do anything.
+        import asyncio  # NOQA
+
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+        return self._task
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    deinit = stop
+
+    def _handle_exception(self, err):
+        if self.exception_hook:
+            self.exception_hook(err)
+        else:
+            sys.print_exception(err)  # NOQA
+
+    def _call_callbacks(self, event):
+        res = True
+        for cb, evt, data in self._callbacks:
+            if not evt & event:
+                continue
+
+            try:
+                if cb(event, data) is False:
+                    res = False
+            except Exception as err:  # NOQA
+                self._handle_exception(err)
+
+        return res
+
+    async def run(self):
+        # the coroutine start() runs, it can also be awaited directly
+        import asyncio  # NOQA
+
+        if AsyncTaskHandler._current_instance is not None:
+            raise RuntimeError('AsyncTaskHandler is already running')
+
+        AsyncTaskHandler._current_instance = self
+
+        sleep_ms = asyncio.sleep_ms
+        start_time = time.ticks_ms()  # NOQA
+
+        try:
+            while True:
+                period = self.min_period
+
+                if lv._nesting.value == 0:  # NOQA
+                    try:
+                        run_update = self._call_callbacks(TASK_HANDLER_STARTED)
+
+                        # the time spent sleeping and in the rest of the
+                        # event loop since the last update
+                        stop_time = time.ticks_ms()  # NOQA
+                        lv.tick_inc(time.ticks_diff(stop_time, start_time))  # NOQA
+                        start_time = stop_time
+
+                        if run_update:
+                            period = lv.timer_handler()
+                            self._call_callbacks(TASK_HANDLER_FINISHED)
+
+                    except Exception as err:  # NOQA
+                        if not self.exception_hook:
+                            sys.print_exception(err)  # NOQA
+                            break
+
+                        self.exception_hook(err)
+
+                    if period < self.min_period:
+                        period = self.min_period
+                    elif period > self.max_period:
+                        period = self.max_period
+
+                await sleep_ms(period)
+        finally:
+            AsyncTaskHandler._current_instance = None
+            self._task = None
@@ -21,6 +21,10 @@ _P1_XL = const(0x04)
 _P1_YH = const(0x05)
 _P1_YL = const(0x06)
 
+# XH, XL, YH, YL, weight and misc for every point, the touch id is in the
+# upper 4 bits of YH
+_POINT_SIZE = const(6)
+
 _MSB_MASK = const(0x0F)
 _LSB_MASK = const(0xFF)
 
@@ -40,6 +44,9 @@ _G_MODE = const(0xA4)
 
 class FocalTechTouch(pointer_framework.PointerDriver):
 
+    # FT6x06/FT6x36 report 2 points, set it to 5 for the FT5x06 family
+    max_points = 2
+
     def __init__(
         self,
         device,
@@ -53,6 +60,8 @@ class FocalTechTouch(pointer_framework.PointerDriver):
         self._tx_mv = memoryview(self._tx_buf)
         self._rx_buf = bytearray(5)
         self._rx_mv = memoryview(self._rx_buf)
+        self._points_buf = bytearray(1 + _POINT_SIZE * self.max_points)
+        self._points_mv = memoryview(self._points_buf)
 
         self._device = device
         self._factors = factors
@@ -90,27 +99,55 @@ class FocalTechTouch(pointer_framework.PointerDriver):
             touch_cal=touch_cal, startup_rotation=startup_rotation, debug=debug
         )
 
-    def _get_coords(self):
+    def _get_points(self, points):
+        # the status and as many points as there were the last time in one
+        # read, another read only when a finger got added.
+        buf = self._points_buf
+        expected = max(min(self._point_count, self.max_points), 1)
+        end = 1 + expected * _POINT_SIZE
+
         self._tx_buf[0] = _TD_STAT_REG
         try:
-            self._device.write_readinto(self._tx_mv, self._rx_mv)
+            self._device.write_readinto(self._tx_mv[:1], self._points_mv[:end])
         except OSError:
-            return None
+            return 0
+
+        count = buf[0] & 0x0F
+        if count > self.max_points:
+            # 0x0F after a reset
+            return 0
 
-        buf = self._rx_buf
+        if count > expected:
+            self._tx_buf[0] = _TD_STAT_REG + end
+            try:
+                self._device.write_readinto(
+                    self._tx_mv[:1],
+                    self._points_mv[end:1 + count * _POINT_SIZE]
+                )
+            except OSError:
+                return 0
 
-        touch_pnt_cnt = buf[0]
-        if touch_pnt_cnt != 1:
-            return None
+        factors = self._factors
 
-        x = ((buf[1] & _MSB_MASK) << 8) | buf[2]
-        y = ((buf[3] & _MSB_MASK) << 8) | buf[4]
+        for i in range(count):
+            offset = 1 + i * _POINT_SIZE
+            index = i * 3
 
-        if self._factors is not None:
-            x = round(x / self._factors[0])
-            y = round(y / self._factors[1])
+            x = ((buf[offset] & _MSB_MASK) << 8) | buf[offset + 1]
+            y = ((buf[offset + 2] & _MSB_MASK) << 8) | buf[offset + 3]
 
-        return self.PRESSED, x, y
+            if factors is not None:
+                x = round(x / factors[0])
+                y = round(y / factors[1])
+
+            points[index] = buf[offset + 2] >> 4
+            points[index + 1] = x
+            points[index + 2] = y
+
+        return count
+
+    def _get_coords(self):
+        return self._get_multi_coords()
 
     def _read_reg(self, reg):
         self._tx_buf[0] = reg
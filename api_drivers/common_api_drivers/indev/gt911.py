@@ -19,7 +19,9 @@ _CMD_READ_DATA = const(0x01)
 _ESD_CHECK_REG = const(0x8041)
 
 _STATUS_REG = const(0x814E)
-_POINT_1_REG = const(0x8150)
+# a point is the track id, x, y, size (2 bytes each) and a reserved byte.
+# The first one is right after the status register.
+_POINT_SIZE = const(8)
 
 _PRODUCT_ID_REG = const(0x8140)
 _FIRMWARE_VERSION_REG = const(0x8144)
@@ -36,6 +38,8 @@ _ADDR2 = const(0x14)
 
 class GT911(pointer_framework.PointerDriver):
 
+    max_points = 5
+
     def _read_reg(self, reg, num_bytes=None, buf=None):
         self._tx_buf[0] = reg >> 8
         self._tx_buf[1] = reg & 0xFF
@@ -64,13 +68,11 @@ class GT911(pointer_framework.PointerDriver):
         self._tx_mv = memoryview(self._tx_buf)
         self._rx_buf = bytearray(6)
         self._rx_mv = memoryview(self._rx_buf)
+        self._points_buf = bytearray(1 + _POINT_SIZE * self.max_points)
+        self._points_mv = memoryview(self._points_buf)
 
         self._device = device
 
-        self.__x = 0
-        self.__y = 0
-        self.__last_state = self.RELEASED
-
         if isinstance(reset_pin, int):
             reset_pin = machine.Pin(reset_pin, machine.Pin.OUT)
 
@@ -146,27 +148,35 @@ class GT911(pointer_framework.PointerDriver):
             )
         return gt911_extension.GT911Extension(self, self._device)
 
-    def _get_coords(self):
-        self._read_reg(_STATUS_REG, 1)
-        touch_cnt = self._rx_buf[0] & 0x0F
-        status = self._rx_buf[0] & 0x80
-
-        if status:
-            if touch_cnt == 1:
-                self._read_reg(_POINT_1_REG, 6)
-
-                x = self._rx_buf[0] + (self._rx_buf[1] << 8)
-                y = self._rx_buf[2] + (self._rx_buf[3] << 8)
-
-                self._write_reg(_STATUS_REG, 0x00)
-
-                self.__x = x
-                self.__y = y
-                self.__last_state = self.PRESSED
+    def _get_points(self, points):
+        # The status and as many points as there were the last time get read
+        # at once, that is a single read unless another finger touched.
+        buf = self._points_buf
+        expected = max(min(self._point_count, self.max_points), 1)
+        end = 1 + expected * _POINT_SIZE
+        self._read_reg(_STATUS_REG, buf=self._points_mv[:end])
+
+        status = buf[0]
+        if not status & 0x80:
+            # no new data yet, the points from the last read still apply
+            return self._point_count
+
+        count = min(status & 0x0F, self.max_points)
+        if count > expected:
+            self._read_reg(
+                _STATUS_REG + end,
+                buf=self._points_mv[end:1 + count * _POINT_SIZE]
+            )
 
-            elif touch_cnt == 0:
-                self.__last_state = self.RELEASED
+        for i in range(count):
+            offset = 1 + i * _POINT_SIZE
+            index = i * 3
+            points[index] = buf[offset]
+            points[index + 1] = buf[offset + 1] | (buf[offset + 2] << 8)
+            points[index + 2] = buf[offset + 3] | (buf[offset + 4] << 8)
 
-            self._write_reg(_STATUS_REG, 0x00)
+        self._write_reg(_STATUS_REG, 0x00)
+        return count
 
-        return self.__last_state, self.__x, self.__y
+    def _get_coords(self):
+        return self._get_multi_coords()
@@ -0,0 +1,208 @@
+# Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+# Records the input an indev driver hands to LVGL and plays it back.
+#
+# The recording is taken at the point where the data gets passed to LVGL so
+# calibration and rotation have already been applied. Only reads where
+# something changed get stored.
+#
+# file layout (little endian)
+#   header: b'LVIR', version (u8), lv.INDEV_TYPE (u8)
+#   record: timestamp in ms from the start (u32), state (u8), a (i16), b (i16)
+#
+#   pointer: a = x, b = y
+#   keypad: a = low 16 bits of the key, b = high 16 bits of the key
+#   encoder: a = enc_diff
+#   button: a = btn_id
+#
+#   recorder = indev_replay.InputRecorder(indev, 'scroll.lvir')
+#   recorder.start()
+#   ...
+#   recorder.stop()
+#
+#   replay = indev_replay.ReplayDriver('scroll.lvir', speed=2.0)
+
+import lvgl as lv  # NOQA
+import _indev_base
+import struct
+import time
+from micropython import const  # NOQA
+
+
+_MAGIC = b'LVIR'
+_VERSION = const(1)
+
+_HEADER_FMT = '<4sBB'
+_HEADER_SIZE = const(6)
+
+_RECORD_FMT = '<IBhh'
+_RECORD_SIZE = const(9)
+
+
+def _split_key(key):
+    a = key & 0xFFFF
+    if a > 0x7FFF:
+        a -= 0x10000
+
+    return a, (key >> 16) & 0x7FFF
+
+
+class InputRecorder(object):
+
+    def __init__(self, indev, file_name):
+        self._indev = indev
+        self._file_name = file_name
+        self._file = None
+        self._type = indev.get_type()
+        self._buf = bytearray(_RECORD_SIZE)
+        self._start_time = 0
+        self._last = None
+        self.count = 0
+
+    def start(self):
+        if self._file is not None:
+            return
+
+        self._file = open(self._file_name, 'wb')
+        self._file.write(
+            struct.pack(_HEADER_FMT, _MAGIC, _VERSION, self._type))
+
+        self._last = None
+        self.count = 0
+        self._start_time = time.ticks_ms()  # NOQA
+
+        # the LVGL read callback gets swapped so the data can be seen after
+        # the driver has filled it in.
+        self._indev._indev_drv.set_read_cb(self._read_cb)  # NOQA
+
+    def stop(self):
+        if self._file is None:
+            return
+
+        self._indev._indev_drv.set_read_cb(self._indev._read)  # NOQA
+        self._file.close()
+        self._file = None
+
+    def _read_cb(self, drv, data):
+        res = self._indev._read(drv, data)  # NOQA
+
+        indev_type = self._type
+        state = data.state
+
+        if indev_type == lv.INDEV_TYPE.POINTER:  # NOQA
+            a = data.point.x
+            b = data.point.y
+        elif indev_type == lv.INDEV_TYPE.KEYPAD:  # NOQA
+            a, b = _split_key(data.key)
+        elif indev_type == lv.INDEV_TYPE.ENCODER:  # NOQA
+            a = data.enc_diff
+            b = 0
+        else:
+            a = data.btn_id
+            b = 0
+
+        last = (state, a, b)
+
+        # encoder diffs are relative so every non zero diff is kept
+        if last != self._last or (indev_type == lv.INDEV_TYPE.ENCODER and a):  # NOQA
+            self._last = last
+            struct.pack_into(
+                _RECORD_FMT,
+                self._buf,
+                0,
+                time.ticks_diff(time.ticks_ms(), self._start_time),  # NOQA
+                state,
+                a,
+                b
+            )
+            self._file.write(self._buf)
+            self.count += 1
+
+        return res
+
+
+class ReplayDriver(_indev_base.IndevBase):
+    """
+    Feeds a recording made with InputRecorder back into LVGL.
+
+    speed scales the time between the records, 2.0 plays back twice as
+    fast. When loop is set the recording starts over after the last record.
+    """
+
+    def __init__(self, file_name, speed=1.0, loop=False, debug=False):
+        with open(file_name, 'rb') as f:
+            data = f.read()
+
+        magic, version, indev_type = struct.unpack_from(_HEADER_FMT, data, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError('not an input recording')
+
+        self._data = memoryview(data)
+        self._count = (len(data) - _HEADER_SIZE) // _RECORD_SIZE
+        self._indev_type = indev_type
+        self.speed = speed
+        self.loop = loop
+
+        super().__init__(debug=debug)
+
+        self._set_type(indev_type)
+        self.restart()
+        self._indev_drv.enable(True)  # NOQA
+
+    def restart(self):
+        self._index = 0
+        self._state = self.RELEASED
+        self._a = 0
+        self._b = 0
+        self._start_time = time.ticks_ms()  # NOQA
+
+    def is_done(self):
+        return self._index >= self._count
+
+    def _read(self, drv, data):  # NOQA
+        if self._index >= self._count and self.loop:
+            self.restart()
+
+        elapsed = time.ticks_diff(time.ticks_ms(), self._start_time)  # NOQA
+        elapsed = int(elapsed * self.speed)
+
+        indev_type = self._indev_type
+        index = self._index
+        offset = _HEADER_SIZE + index * _RECORD_SIZE
+
+        data.continue_reading = False
+
+        # one record per read, LVGL gets told to read again if the next one
+        # is already due so press/release pairs don't get merged.
+        if index < self._count:
+            timestamp, state, a, b = struct.unpack_from(
+                _RECORD_FMT, self._data, offset)
+
+            if timestamp <= elapsed:
+                self._state = state
+                self._a = a
+                self._b = b
+                index += 1
+                self._index = index
+
+                if self._debug:
+                    print(f'ReplayDriver({timestamp}, {state}, {a}, {b})')
+
+                if index < self._count:
+                    next_timestamp = struct.unpack_from(
+                        '<I', self._data, offset + _RECORD_SIZE)[0]
+                    data.continue_reading = next_timestamp <= elapsed
+
+        data.state = self._state
+
+        if indev_type == lv.INDEV_TYPE.POINTER:  # NOQA
+            data.point.x = self._a
+            data.point.y = self._b
+        elif indev_type == lv.INDEV_TYPE.KEYPAD:  # NOQA
+            data.key = (self._a & 0xFFFF) | (self._b << 16)
+        elif indev_type == lv.INDEV_TYPE.ENCODER:  # NOQA
+            # the diff is relative, it only gets passed once
+            data.enc_diff = self._a
+            self._a = 0
+        else:
+            data.btn_id = self._a
@@ -4,6 +4,7 @@ from micropython import const  # NOQA
 import micropython  # NOQA
 import machine  # NOQA
 import pointer_framework
+import array
 import time
 
 
@@ -15,12 +16,120 @@ _MIN_RAW_COORD = const(10)
 _MAX_RAW_COORD = const(4090)
 
 
+# The filters combine the samples of one axis into a single value. They get
+# called with a preallocated array and the number of valid samples in it and
+# may reorder the samples, nothing gets allocated.
+
+def _sort(samples, count):
+    # insertion sort, there are never more than 25 samples
+    for i in range(1, count):
+        value = samples[i]
+        j = i - 1
+        while j >= 0 and samples[j] > value:
+            samples[j + 1] = samples[j]
+            j -= 1
+
+        samples[j + 1] = value
+
+
+class MeanFilter(object):
+
+    def reset(self):
+        pass
+
+    def apply(self, samples, count, axis):  # NOQA
+        total = 0
+        for i in range(count):
+            total += samples[i]
+
+        return total // count
+
+
+class MedianFilter(object):
+
+    def reset(self):
+        pass
+
+    def apply(self, samples, count, axis):  # NOQA
+        _sort(samples, count)
+        mid = count >> 1
+
+        if count & 1:
+            return samples[mid]
+
+        return (samples[mid - 1] + samples[mid]) >> 1
+
+
+class TrimmedMeanFilter(object):
+    """
+    Drops the trim highest and lowest samples and averages the rest.
+    """
+
+    def __init__(self, trim=1):
+        self.trim = trim
+
+    def reset(self):
+        pass
+
+    def apply(self, samples, count, axis):  # NOQA
+        _sort(samples, count)
+        trim = self.trim
+
+        if count <= trim * 2:
+            return samples[count >> 1]
+
+        total = 0
+        for i in range(trim, count - trim):
+            total += samples[i]
+
+        return total // (count - trim * 2)
+
+
+class IIRFilter(object):
+    """
+    Smooths the output of another filter (mean by default) from one read
+    to the next. Every read moves the point 1 / (2 ** shift) of the way to
+    the new value, the history gets cleared when the touch is released.
+    """
+
+    def __init__(self, sample_filter=None, shift=2):
+        if sample_filter is None:
+            sample_filter = MeanFilter()
+
+        self.sample_filter = sample_filter
+        self.shift = shift
+        self._state = [0, 0]
+        self._primed = [False, False]
+
+    def reset(self):
+        self.sample_filter.reset()
+        self._primed[0] = False
+        self._primed[1] = False
+
+    def apply(self, samples, count, axis):
+        value = self.sample_filter.apply(samples, count, axis)
+
+        if self._primed[axis]:
+            value = self._state[axis] + ((value - self._state[axis]) >> self.shift)
+        else:
+            self._primed[axis] = True
+
+        self._state[axis] = value
+        return value
+
+
 class XPT2046(pointer_framework.PointerDriver):
 
     touch_threshold = 400
     confidence = 5
     margin = 50
 
+    # Reads Z1, Z2 and all of the X/Y samples in one SPI transfer. Every
+    # control byte gets clocked out while the last byte of the conversion
+    # before it is being read (16 clocks per conversion). Set it to False
+    # for a transfer per conversion.
+    burst = True
+
     def _read_reg(self, reg, num_bytes):
         self._tx_buf[0] = reg
 
@@ -40,7 +149,8 @@ class XPT2046(pointer_framework.PointerDriver):
         device,
         touch_cal=None,
         startup_rotation=pointer_framework.lv.DISPLAY_ROTATION._0,  # NOQA
-        debug=False
+        debug=False,
+        sample_filter=None
     ):
         self._device = device
         self._debug = debug
@@ -51,24 +161,70 @@ class XPT2046(pointer_framework.PointerDriver):
         self._rx_mv = memoryview(self._rx_buf)
 
         self.__confidence = max(min(self.confidence, 25), 3)
-        self.__points = [[0, 0] for _ in range(self.__confidence)]
+        self.__xs = array.array('H', [0] * self.__confidence)
+        self.__ys = array.array('H', [0] * self.__confidence)
+
+        # Z1, Z2 then X and Y for every sample
+        conversions = 2 + self.__confidence * 2
+        self.__burst_tx = bytearray(conversions * 2 + 1)
+        self.__burst_rx = bytearray(conversions * 2 + 1)
+        self.__burst_tx[0] = _CMD_Z1_READ
+        self.__burst_tx[2] = _CMD_Z2_READ
+        for i in range(4, conversions * 2, 4):
+            self.__burst_tx[i] = _CMD_X_READ
+            self.__burst_tx[i + 2] = _CMD_Y_READ
+
+        self.__z = 0
 
         margin = max(min(self.margin, 100), 1)
         self.__margin = margin * margin
 
+        if sample_filter is None:
+            sample_filter = MeanFilter()
+
+        self.sample_filter = sample_filter
+
         super().__init__(
             touch_cal=touch_cal, startup_rotation=startup_rotation, debug=debug
         )
 
-    def _get_coords(self):
+    def _read_burst(self):
+        rx = self.__burst_rx
+        self._device.write_readinto(self.__burst_tx, rx)
+
+        # the result of conversion n is in bytes n * 2 + 1 and n * 2 + 2
+        z1 = ((rx[1] << 8) | rx[2]) >> 3
+        z2 = ((rx[3] << 8) | rx[4]) >> 3
+        self.__z = z1 + ((_MAX_RAW_COORD + 6) - z2)
+
+        if self.__z < self.touch_threshold:
+            return 0
+
+        xs = self.__xs
+        ys = self.__ys
+        count = 0
+
+        for i in range(5, len(rx), 4):
+            x = ((rx[i] << 8) | rx[i + 1]) >> 3
+            y = ((rx[i + 2] << 8) | rx[i + 3]) >> 3
+
+            if x > _MIN_RAW_COORD and y < _MAX_RAW_COORD:  # touch pressed?
+                xs[count] = x
+                ys[count] = y
+                count += 1
+
+        return count
+
+    def _read_samples(self):
         z1 = self._read_reg(_CMD_Z1_READ, 3)
         z2 = self._read_reg(_CMD_Z2_READ, 3)
-        z = z1 + ((_MAX_RAW_COORD + 6) - z2)
+        self.__z = z1 + ((_MAX_RAW_COORD + 6) - z2)
 
-        if z < self.touch_threshold:
-            return None
+        if self.__z < self.touch_threshold:
+            return 0
 
-        points = self.__points
+        xs = self.__xs
+        ys = self.__ys
         count = 0
         timeout = 5000
         start_time = time.ticks_us()  # NOQA
@@ -76,30 +232,57 @@ class XPT2046(pointer_framework.PointerDriver):
             if count == self.__confidence:
                 break
 
-            sample = self._get_raw()  # get a touch
-            if sample is not None:
-                points[count][0], points[count][1] = sample  # put in buff
+            x = self._read_reg(_CMD_X_READ, 3)
+            y = self._read_reg(_CMD_Y_READ, 3)
+
+            if x > _MIN_RAW_COORD and y < _MAX_RAW_COORD:  # touch pressed?
+                xs[count] = x
+                ys[count] = y
                 count += 1
 
             end_time = time.ticks_us()  # NOQA
             timeout -= time.ticks_diff(end_time, start_time)  # NOQA
             start_time = end_time
 
-        if count:
-            meanx = sum([points[i][0] for i in range(count)]) // count
-            meany = sum([points[i][1] for i in range(count)]) // count
-            dev = sum([
-                (points[i][0] - meanx) ** 2 + (points[i][1] - meany) ** 2
-                for i in range(count)
-            ]) / count
-
-            if dev <= self.__margin:
-                x, y = self._normalize(meanx, meany)
-                if self._debug:
-                    print(f'{self.__class__.__name__}_TP_DATA(x={meanx}, y={meany}, z={z})')  # NOQA
-                return self.PRESSED, x, y
-
-        return None
+        return count
+
+    def _get_coords(self):
+        if self.burst:
+            count = self._read_burst()
+        else:
+            count = self._read_samples()
+
+        if not count:
+            self.sample_filter.reset()
+            return None
+
+        xs = self.__xs
+        ys = self.__ys
+
+        meanx = 0
+        meany = 0
+        for i in range(count):
+            meanx += xs[i]
+            meany += ys[i]
+
+        meanx //= count
+        meany //= count
+
+        dev = 0
+        for i in range(count):
+            dev += (xs[i] - meanx) ** 2 + (ys[i] - meany) ** 2
+
+        if dev > self.__margin * count:
+            return None
+
+        rawx = self.sample_filter.apply(xs, count, 0)
+        rawy = self.sample_filter.apply(ys, count, 1)
+
+        x, y = self._normalize(rawx, rawy)
+        if self._debug:
+            print(f'{self.__class__.__name__}_TP_DATA(x={rawx}, y={rawy}, z={self.__z})')  # NOQA
+
+        return self.PRESSED, x, y
 
     def _normalize(self, x, y):
         x = pointer_framework.remap(
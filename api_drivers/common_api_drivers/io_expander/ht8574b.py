@@ -3,6 +3,7 @@
 import io_expander_framework
 
 
+EXIO0 = 0x00
 EXIO1 = 0x01
 EXIO2 = 0x02
 EXIO3 = 0x03
@@ -19,50 +20,30 @@ BITS = 8
 
 
 class Pin(io_expander_framework.Pin):
+    # The pins are quasi bidirectional, there is only the port. A pin that
+    # is written high is weakly pulled up and can be read as an input.
     _output_states = 0xFF
     _reg_int_pins = []
 
-    @property
-    def __bit(self):
-        return 1 << self._id
+    @classmethod
+    def _write_output(cls, states):
+        cls._buf[0] = states & 0xFF
+        cls._device.write(buf=cls._mv[:1])
 
-    def __read_reg(self):
-        self._buf[0] = 0
-        Pin._device.read(buf=self._mv[:1])
-        return self._buf[0]
+    @classmethod
+    def _write_dir(cls, states):
+        # inputs need to be high
+        cls.write_port(~states & 0xFF, 0xFF)
 
-    def __write_reg(self, value):
-        self._buf[0] = value & 0xFF
-        Pin._device.write(buf=self._mv[:1])
-
-    def _set_dir(self, direction):
-        if direction == self.OPEN_DRAIN:
-            raise ValueError('OPEN_DRAIN is not supported')
-
-    def _set_level(self, level):
-        if self._mode == self.OUT:
-            if level:
-                states = Pin._output_states | self.__bit
-            else:
-                states = Pin._output_states & ~self.__bit
-
-            # 0nly set if there is an actual change
-            if states != Pin._output_states:
-                self.__write_reg(Pin._output_states)
-                Pin._output_states = states
-
-    def _get_level(self):
-        if self._mode == self.IN:
-            states = self.__read_reg()
-        elif self.mode == self.OUT:
-            states = Pin._output_states
-        else:
-            raise ValueError('Unsupported pin mode')
+    @classmethod
+    def _write_pull(cls, enabled, up):
+        pass
 
-        return int(bool(states & self.__bit))
+    @classmethod
+    def _read_input(cls):
+        cls._buf[0] = 0
+        cls._device.read(buf=cls._mv[:1])
+        return cls._buf[0]
 
     def _set_irq(self, handler, trigger):
         pass
-
-    def _set_pull(self, pull):
-        pass
@@ -4,6 +4,7 @@ from micropython import const  # NOQA
 import io_expander_framework
 
 
+EXIO0 = 0x00
 EXIO1 = 0x01
 EXIO2 = 0x02
 EXIO3 = 0x03
@@ -32,59 +33,47 @@ BITS = 8
 
 
 class Pin(io_expander_framework.Pin):
-    _config_settings = 0x00
-    _output_states = 0x00
+    # power on state, all pins are inputs. Port 0 is the high byte so EXIO0
+    # is P1_0 and EXIO8 is P0_0, the numbering the driver has always had.
+    _output_states = 0xFFFF
+    _dir_states = 0x0000
     _reg_int_pins = []
 
-    @property
-    def __bit(self):
-        return 1 << self._id
-
-    def __read_reg(self, reg):
-        self._buf[0] = 0
-        self._buf[1] = 0
-        Pin._device.read_mem(reg, buf=self._mv)
-        return self._buf[0] << 8 | self._buf[1]
-
-    def __write_reg(self, reg, value):
-        self._buf[0] = value >> 8 & 0xFF
-        self._buf[1] = value & 0xFF
-        Pin._device.write_mem(reg, buf=self._mv)
-
-    def _set_dir(self, direction):
-        if direction == self.OUT:
-            Pin._config_settings &= ~self.__bit
-        elif direction == self.IN:
-            Pin._config_settings |= self.__bit
-        else:
-            raise ValueError('OPEN_DRAIN is not supported')
-
-        self.__write_reg(_CONFIGURATION_REG, Pin._config_settings)
-
-    def _set_level(self, level):
-        if self._mode == self.OUT:
-            if level:
-                states = Pin._output_states | self.__bit
-            else:
-                states = Pin._output_states & ~self.__bit
-
-            # 0nly set if there is an actual change
-            if states != Pin._output_states:
-                self.__write_reg(_OUTPUT_PORT_REG, Pin._output_states)
-                Pin._output_states = states
-
-    def _get_level(self):
-        if self._mode == self.IN:
-            states = self.__read_reg(_INPUT_PORT_REG)
-        elif self._mode == self.OUT:
-            states = Pin._output_states
-        else:
-            raise ValueError('Unsupported pin mode')
-
-        return int(bool(states & self.__bit))
+    @classmethod
+    def __read_reg(cls, reg):
+        # the registers come in pairs, port 0 then port 1
+        cls._device.read_mem(reg, buf=cls._mv)
+        return cls._buf[0] << 8 | cls._buf[1]
 
-    def _set_irq(self, handler, trigger):
+    @classmethod
+    def __write_reg(cls, reg, value):
+        cls._buf[0] = value >> 8 & 0xFF
+        cls._buf[1] = value & 0xFF
+        cls._device.write_mem(reg, buf=cls._mv)
+
+    @classmethod
+    def _init_device(cls):
+        cls._output_states = cls.__read_reg(_OUTPUT_PORT_REG)
+
+        # a 1 in the configuration register is an input
+        cls._dir_states = ~cls.__read_reg(_CONFIGURATION_REG) & 0xFFFF
+
+    @classmethod
+    def _write_output(cls, states):
+        cls.__write_reg(_OUTPUT_PORT_REG, states)
+
+    @classmethod
+    def _write_dir(cls, states):
+        cls.__write_reg(_CONFIGURATION_REG, ~states & 0xFFFF)
+
+    @classmethod
+    def _write_pull(cls, enabled, up):
+        # there are no pull resistors
         pass
 
-    def _set_pull(self, pull):
+    @classmethod
+    def _read_input(cls):
+        return cls.__read_reg(_INPUT_PORT_REG)
+
+    def _set_irq(self, handler, trigger):
         pass
@@ -15,9 +15,9 @@ EXIO8 = 0x08
 
 
 _INPUT_PORT_REG = const(0x00)
-_OUTPUT_PORT_REG = const(0x02)
-_POLARITY_INVERSION_REG = const(0x04)
-_CONFIGURATION_REG = const(0x06)
+_OUTPUT_PORT_REG = const(0x01)
+_POLARITY_INVERSION_REG = const(0x02)
+_CONFIGURATION_REG = const(0x03)
 
 I2C_ADDR = 0x20
 BITS = 8
@@ -30,59 +30,43 @@ I2C_TCA9554A_ADDR = 0x38
 
 
 class Pin(io_expander_framework.Pin):
-    _config_settings = 0x00
-    _output_states = 0x00
+    # power on state, all pins are inputs
+    _output_states = 0xFF
+    _dir_states = 0x00
     _reg_int_pins = []
 
-    @property
-    def __bit(self):
-        return 1 << (self._id - 1)
-
-    def __read_reg(self, reg):
-        self._buf[0] = 0
-        self._buf[1] = 0
-        self._device.read_mem(reg, buf=self._mv)
-        return self._buf[0] << 8 | self._buf[1]
-
-    def __write_reg(self, reg, value):
-        self._buf[0] = value >> 8 & 0xFF
-        self._buf[1] = value & 0xFF
-        self._device.write_mem(reg, buf=self._mv)
-
-    def _set_dir(self, direction):
-        if direction == self.OUT:
-            Pin._config_settings &= ~self.__bit
-        elif direction == self.IN:
-            Pin._config_settings |= self.__bit
-        else:
-            raise ValueError('OPEN_DRAIN is not supported')
-
-        self.__write_reg(_CONFIGURATION_REG, Pin._config_settings)
-
-    def _set_level(self, level):
-        if self._mode == self.OUT:
-            if level:
-                states = Pin._output_states | self.__bit
-            else:
-                states = Pin._output_states & ~self.__bit
-
-            # 0nly set if there is an actual change
-            if states != Pin._output_states:
-                self.__write_reg(_OUTPUT_PORT_REG, Pin._output_states)
-                Pin._output_states = states
-
-    def _get_level(self):
-        if self._mode == self.IN:
-            states = self.__read_reg(_INPUT_PORT_REG)
-        elif self._mode == self.OUT:
-            states = Pin._output_states
-        else:
-            raise ValueError('Unsupported pin mode')
-
-        return int(bool(states & self.__bit))
+    @staticmethod
+    def _pin_bit(id):  # NOQA
+        return 1 << (id - 1)
 
-    def _set_irq(self, handler, trigger):
+    @classmethod
+    def _init_device(cls):
+        cls._device.read_mem(_OUTPUT_PORT_REG, buf=cls._mv[:1])
+        cls._output_states = cls._buf[0]
+
+        # a 1 in the configuration register is an input
+        cls._device.read_mem(_CONFIGURATION_REG, buf=cls._mv[:1])
+        cls._dir_states = ~cls._buf[0] & 0xFF
+
+    @classmethod
+    def _write_output(cls, states):
+        cls._buf[0] = states
+        cls._device.write_mem(_OUTPUT_PORT_REG, buf=cls._mv[:1])
+
+    @classmethod
+    def _write_dir(cls, states):
+        cls._buf[0] = ~states & 0xFF
+        cls._device.write_mem(_CONFIGURATION_REG, buf=cls._mv[:1])
+
+    @classmethod
+    def _write_pull(cls, enabled, up):
+        # there are no pull resistors
         pass
 
-    def _set_pull(self, pull):
+    @classmethod
+    def _read_input(cls):
+        cls._device.read_mem(_INPUT_PORT_REG, buf=cls._mv[:1])
+        return cls._buf[0]
+
+    def _set_irq(self, handler, trigger):
         pass
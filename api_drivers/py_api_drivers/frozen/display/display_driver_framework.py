@@ -26,6 +26,21 @@ _RASET = const(0x2B)
 _CASET = const(0x2A)
 _RAMWR = const(0x2C)
 _MADCTL = const(0x36)
+_SWRESET = const(0x01)
+_SLPIN = const(0x10)
+_SLPOUT = const(0x11)
+
+# commands after which the column and page addresses the display is using
+# are not known anymore, see _invalidate_window
+_WINDOW_CMDS = (_CASET, _RASET, _MADCTL, _SWRESET, _SLPIN, _SLPOUT)
+
+# how long a new staging run waits for the bus to finish sending the last
+# one before the area gets sent on its own
+_STAGE_TIMEOUT_MS = const(100)
+
+_INIT_OP_CMD = const(0x01)
+_INIT_OP_CMD_DELAY = const(0x02)
+_INIT_OP_DELAY = const(0x03)
 
 
 _MADCTL_MH = const(0x04)  # Refresh 0=Left to Right, 1=Right to Left
@@ -54,6 +69,10 @@ class DisplayDriver:
 
     _displays = []
 
+    # prints which init commands get used, the precompiled stream or the
+    # python init module and why the stream was not able to be used.
+    debug = False
+
     @staticmethod
     def get_default():
         disp = lv.display_get_default()  # NOQA
@@ -133,6 +152,31 @@ class DisplayDriver:
         self._cmd_bits = _cmd_bits
         self._param_bits = _param_bits
 
+        # flush plan, see _update_flush_plan
+        self._color_size = 0
+        self._tx_color = None
+        self._win_x1 = -1
+        self._win_y1 = -1
+        self._win_x2 = -1
+        self._win_y2 = -1
+
+        # flush coalescing, see set_flush_coalescing
+        self._coalesce_max_size = 0
+        self._coalesce_buf = None
+        self._coalesce_mv = None
+        self._pending_size = 0
+        self._pending_x1 = 0
+        self._pending_y1 = 0
+        self._pending_x2 = 0
+        self._pending_y2 = 0
+        self._skip_sent = 0
+        self._skip_done = 0
+        self._tx_count = 0
+        self._done_count = 0
+        self._stage_tx = 0
+        self._flush_areas = 0
+        self._flush_transactions = 0
+
         if data_bus is None:
             self._reset_pin = None
             self._power_pin = None
@@ -260,6 +304,7 @@ class DisplayDriver:
             self._param_bits
         )
 
+        self._update_flush_plan()
         self._disp_drv.set_flush_cb(self._flush_cb)
 
         full_screen_size = (
@@ -310,6 +355,7 @@ class DisplayDriver:
             return
 
         self._rotation = rotation
+        self._invalidate_window()
 
         if not isinstance(self._data_bus, lcd_bus.RGBBus) and self._initilized:
             self._param_buf[0] = (self._madctl(
@@ -342,6 +388,7 @@ class DisplayDriver:
 
     def set_offset(self, x, y):
         self._offset_x, self._offset_y = x, y
+        self._invalidate_window()
 
     def get_offset_x(self):
         return self._disp_drv.get_offset_x()
@@ -358,6 +405,7 @@ class DisplayDriver:
     def set_color_format(self, color_space):
         self._disp_drv.set_color_format(color_space)
         self._color_space = color_space
+        self._update_flush_plan()
 
     def get_color_format(self):
         return self._color_space
@@ -468,14 +516,15 @@ class DisplayDriver:
         # it allows for dynamically importing the initilization commands
         # and then deletimng them from memory since they are a run
         # once and done
+        # the init commands are able to change the address window
+        self._invalidate_window()
+
         if type is None:
             mod_name = f'_{self.__class__.__name__.lower()}_init'
         else:
             mod_name = f'_{self.__class__.__name__.lower()}_init_type{type}'
 
-        mod = __import__(mod_name)
-        mod.init(self)
-        del sys.modules[mod_name]
+        self._run_init_module(mod_name)
         # =======================================
 
         full_frame_size = (
@@ -500,7 +549,142 @@ class DisplayDriver:
 
         self._initilized = True
 
+    def _run_init_module(self, mod_name):
+        # if the build precompiled the init module into a command stream
+        # (see builder/init_stream.py) that stream gets used instead of the
+        # python module. The stream is a bytes object that is stored in flash
+        # so running it doesn't allocate anything for each of the commands.
+        # The stream is only valid if the driver settings the init module
+        # looked at when it was compiled match the ones being used now.
+        stream_name = mod_name + '_stream'
+        try:
+            mod = __import__(stream_name)
+        except ImportError:
+            mod = None
+
+        if mod is not None:
+            if self._init_stream_matches(mod.CONFIG):
+                if self.debug:
+                    print(f'{self.__class__.__name__}: running {stream_name}')
+
+                self.run_init_stream(mod.STREAM)
+
+                for name, value in mod.STATE:
+                    setattr(self, name, value)
+
+                del sys.modules[stream_name]
+                return
+
+            del sys.modules[stream_name]
+
+            if self.debug:
+                print(
+                    f'{self.__class__.__name__}: {stream_name} was compiled '
+                    f'for other driver settings, running {mod_name}'
+                )
+        elif self.debug:
+            print(
+                f'{self.__class__.__name__}: there is no {stream_name}, '
+                f'running {mod_name}'
+            )
+
+        mod = __import__(mod_name)
+        mod.init(self)
+        del sys.modules[mod_name]
+
+    def _init_stream_matches(self, config):
+        for name, value in config:
+            if '.' in name:
+                name, method = name.split('.', 1)
+                current = getattr(getattr(self, name), method)()
+            else:
+                current = getattr(self, name, None)
+
+                if name == '_data_bus':
+                    current = current.__class__.__name__
+                elif isinstance(current, list):
+                    current = tuple(current)
+
+            if current != value:
+                if self.debug:
+                    print(
+                        f'{self.__class__.__name__}: {name} is {current!r}, '
+                        f'the init stream expects {value!r}'
+                    )
+                return False
+
+        return True
+
+    def run_init_stream(self, stream):
+        # stream records:
+        #   0x01 cmd:u16 len:u16 params[len]
+        #   0x02 cmd:u16 len:u16 params[len] delay_ms:u16
+        #   0x03 delay_ms:u16
+        set_params = self.set_params
+        end = len(stream)
+
+        # the parameters get copied into a single buffer that is sized for
+        # the longest command. There is a view of that buffer for every
+        # parameter length the stream uses so slicing the stream doesn't
+        # allocate a new memoryview for every command.
+        max_length = 0
+        i = 0
+        while i < end:
+            op = stream[i]
+            if op == _INIT_OP_DELAY:
+                i += 3
+                continue
+
+            length = stream[i + 3] | (stream[i + 4] << 8)
+            if length > max_length:
+                max_length = length
+
+            i += 5 + length
+            if op == _INIT_OP_CMD_DELAY:
+                i += 2
+
+        params = bytearray(max_length)
+        params_mv = memoryview(params)
+        views = {}
+        i = 0
+
+        while i < end:
+            op = stream[i]
+
+            if op == _INIT_OP_DELAY:
+                time.sleep_ms(stream[i + 1] | (stream[i + 2] << 8))  # NOQA
+                i += 3
+                continue
+
+            if op not in (_INIT_OP_CMD, _INIT_OP_CMD_DELAY):
+                raise RuntimeError(f'invalid init stream opcode ({op})')
+
+            cmd = stream[i + 1] | (stream[i + 2] << 8)
+            length = stream[i + 3] | (stream[i + 4] << 8)
+            i += 5
+
+            if length:
+                view = views.get(length, None)
+                if view is None:
+                    view = params_mv[:length]
+                    views[length] = view
+
+                for j in range(length):
+                    params[j] = stream[i + j]
+
+                set_params(cmd, view)
+                i += length
+            else:
+                set_params(cmd)
+
+            if op == _INIT_OP_CMD_DELAY:
+                time.sleep_ms(stream[i] | (stream[i + 1] << 8))  # NOQA
+                i += 2
+
     def set_params(self, cmd, params=None):
+        if cmd in _WINDOW_CMDS:
+            self._invalidate_window()
+
         self._data_bus.tx_param(cmd, params)
 
     def get_params(self, cmd, params):
@@ -520,6 +704,8 @@ class DisplayDriver:
         if self._power_pin is None:
             return
 
+        self._invalidate_window()
+
         if self._power_on_state:
             self._power_pin.value(value)
         else:
@@ -535,6 +721,8 @@ class DisplayDriver:
         if self._reset_pin is None:
             return
 
+        self._invalidate_window()
+
         self._reset_pin.value(self._reset_state)
         time.sleep_ms(120)  # NOQA
         self._reset_pin.value(not self._reset_state)
@@ -568,24 +756,52 @@ class DisplayDriver:
     def _dummy_set_memory_location(self, *_, **__):  # NOQA
         return _RAMWR
 
-    def _set_memory_location(self, x1, y1, x2, y2):
-        # Column addresses
-        param_buf = self._param_buf  # NOQA
+    def _update_flush_plan(self):
+        # the values the flush function needs that only change when the
+        # color format, the offsets or the rotation change get worked out
+        # here instead of every time a buffer gets flushed.
+        self._color_size = lv.color_format_get_size(self._color_space)
 
-        param_buf[0] = (x1 >> 8) & 0xFF
-        param_buf[1] = x1 & 0xFF
-        param_buf[2] = (x2 >> 8) & 0xFF
-        param_buf[3] = x2 & 0xFF
+        if self._data_bus is not None:
+            self._tx_color = self._data_bus.tx_color
 
-        self._data_bus.tx_param(_CASET, self._param_mv)
+        self._invalidate_window()
 
-        # Page addresses
-        param_buf[0] = (y1 >> 8) & 0xFF
-        param_buf[1] = y1 & 0xFF
-        param_buf[2] = (y2 >> 8) & 0xFF
-        param_buf[3] = y2 & 0xFF
+    def _invalidate_window(self):
+        # the display remembers the last column and page addresses that were
+        # set. If something else could have changed them the next flush has
+        # to send both of them again.
+        self._win_x1 = -1
+        self._win_y1 = -1
+        self._win_x2 = -1
+        self._win_y2 = -1
+
+    def _set_memory_location(self, x1, y1, x2, y2):
+        param_buf = self._param_buf  # NOQA
 
-        self._data_bus.tx_param(_RASET, self._param_mv)
+        # LVGL renders partial updates in strips that have the same columns,
+        # only the address that changed gets sent to the display.
+        if x1 != self._win_x1 or x2 != self._win_x2:
+            # Column addresses
+            param_buf[0] = (x1 >> 8) & 0xFF
+            param_buf[1] = x1 & 0xFF
+            param_buf[2] = (x2 >> 8) & 0xFF
+            param_buf[3] = x2 & 0xFF
+
+            self._data_bus.tx_param(_CASET, self._param_mv)
+            self._win_x1 = x1
+            self._win_x2 = x2
+
+        if y1 != self._win_y1 or y2 != self._win_y2:
+            # Page addresses
+            param_buf[0] = (y1 >> 8) & 0xFF
+            param_buf[1] = y1 & 0xFF
+            param_buf[2] = (y2 >> 8) & 0xFF
+            param_buf[3] = y2 & 0xFF
+
+            self._data_bus.tx_param(_RASET, self._param_mv)
+            self._win_y1 = y1
+            self._win_y2 = y2
 
         return _RAMWR
 
@@ -596,11 +812,7 @@ class DisplayDriver:
         y1 = area.y1 + self._offset_y
         y2 = area.y2 + self._offset_y
 
-        size = (
-            (x2 - x1 + 1) *
-            (y2 - y1 + 1) *
-            lv.color_format_get_size(self._color_space)
-        )
+        size = (x2 - x1 + 1) * (y2 - y1 + 1) * self._color_size
 
         cmd = self._set_memory_location(x1, y1, x2, y2)
 
@@ -608,8 +820,214 @@ class DisplayDriver:
         # what converts from the C_Array object the binding passes into a
         # memoryview object that can be passed to the bus drivers
         data_view = color_p.__dereference__(size)
-        self._data_bus.tx_color(cmd, data_view, x1, y1, x2, y2,
-                                self._rotation, self._disp_drv.flush_is_last())
+        self._flush_areas += 1
+        self._flush_transactions += 1
+        self._tx_color(cmd, data_view, x1, y1, x2, y2,
+                       self._rotation, self._disp_drv.flush_is_last())
+
+    def set_flush_coalescing(self, max_area, buffer_size=None):
+        # When LVGL renders small widgets (labels, spinners, etc) it hands the
+        # flush function a lot of small areas. Each one of those areas costs
+        # a CASET/RASET window command on top of the pixel data and for small
+        # areas that overhead is larger than the pixel data itself.
+        #
+        # Areas that are max_area pixels or smaller get copied into a staging
+        # buffer and areas that are directly below the previous one and have
+        # the same width get appended to it so they are sent as a single
+        # window. The staging buffer gets sent when an area is not able to be
+        # merged or when LVGL flushes the last area of a frame.
+        #
+        # setting max_area to 0 turns coalescing off.
+        if self._coalesce_buf is not None:
+            try:
+                self._data_bus.free_framebuffer(self._coalesce_buf)
+            except:  # NOQA
+                pass
+
+            self._coalesce_buf = None
+            self._coalesce_mv = None
+
+        self._pending_size = 0
+        self._skip_sent = 0
+        self._skip_done = 0
+        self._tx_count = 0
+        self._done_count = 0
+        self._stage_tx = 0
+
+        if not max_area:
+            self._coalesce_max_size = 0
+            self._disp_drv.set_flush_cb(self._flush_cb)
+            self._data_bus.register_callback(self._flush_ready_cb)
+            return
+
+        if (
+            isinstance(self._data_bus, lcd_bus.RGBBus) or
+            self._backup_set_memory_location is not None
+        ):
+            raise RuntimeError(
+                'flush coalescing is not supported when the '
+                'full frame is being sent to the display'
+            )
+
+        max_size = max_area * lv.color_format_get_size(self._color_space)
+
+        if buffer_size is None:
+            buffer_size = len(self._frame_buffer1)
+
+        buffer_size = max(buffer_size, max_size)
+
+        for flags in (
+            lcd_bus.MEMORY_INTERNAL | lcd_bus.MEMORY_DMA,
+            lcd_bus.MEMORY_SPIRAM | lcd_bus.MEMORY_DMA,
+            lcd_bus.MEMORY_INTERNAL,
+            lcd_bus.MEMORY_SPIRAM
+        ):
+            try:
+                self._coalesce_buf = (
+                    self._data_bus.allocate_framebuffer(buffer_size, flags)
+                )
+                break
+            except MemoryError:
+                pass
+        else:
+            raise MemoryError(
+                f'Unable to allocate memory for coalescing buffer ({buffer_size})'  # NOQA
+            )
+
+        self._coalesce_mv = memoryview(self._coalesce_buf)
+        self._coalesce_max_size = max_size
+        self._update_flush_plan()
+
+        self._data_bus.register_callback(self._coalesce_flush_ready_cb)
+        self._disp_drv.set_flush_cb(self._coalesce_flush_cb)
+
+    def get_flush_stats(self):
+        # returns (areas received from LVGL, color transactions sent to the
+        # bus). With flush coalescing turned off they are the same.
+        return self._flush_areas, self._flush_transactions
+
+    def reset_flush_stats(self):
+        self._flush_areas = 0
+        self._flush_transactions = 0
+
+    def _send_pending(self, last):
+        size = self._pending_size
+        x1 = self._pending_x1
+        y1 = self._pending_y1
+        x2 = self._pending_x2
+        y2 = self._pending_y2
+
+        self._pending_size = 0
+
+        # if this is not the last area LVGL gets told the flush has finished
+        # for the area that caused the staging buffer to be sent, so the bus
+        # callback for the staging buffer must not tell LVGL as well.
+        if not last:
+            self._skip_sent += 1
+
+        cmd = self._set_memory_location(x1, y1, x2, y2)
+        self._flush_transactions += 1
+        self._tx_count += 1
+        self._stage_tx = self._tx_count
+        self._tx_color(cmd, self._coalesce_mv[:size], x1, y1, x2, y2,
+                       self._rotation, last)
+
+    def _start_pending(self, data_view, x1, y1, x2, y2, size):
+        # the bus could still be sending the last run out of the staging
+        # buffer, it can't be written to until that has finished. If the bus
+        # doesn't report the send as done in time False is returned and the
+        # area needs to be sent on its own.
+        if self._done_count < self._stage_tx:
+            start = time.ticks_ms()  # NOQA
+            while self._done_count < self._stage_tx:
+                if time.ticks_diff(time.ticks_ms(), start) > _STAGE_TIMEOUT_MS:  # NOQA
+                    # stop waiting on that send. The bus callback must not
+                    # skip telling LVGL about the area that gets sent instead
+                    self._stage_tx = 0
+                    self._tx_count = self._done_count
+                    self._skip_sent = self._skip_done
+                    return False
+
+        self._coalesce_mv[:size] = data_view
+        self._pending_x1 = x1
+        self._pending_y1 = y1
+        self._pending_x2 = x2
+        self._pending_y2 = y2
+        self._pending_size = size
+        return True
+
+    def _coalesce_flush_cb(self, _, area, color_p):
+        x1 = area.x1 + self._offset_x
+        x2 = area.x2 + self._offset_x
+
+        y1 = area.y1 + self._offset_y
+        y2 = area.y2 + self._offset_y
+
+        size = (x2 - x1 + 1) * (y2 - y1 + 1) * self._color_size
+
+        self._flush_areas += 1
+
+        # nothing is being sent, the transaction counters get started over
+        # so they stay small ints. This is the only place the flush side
+        # writes the counters of the bus callback and there is no callback
+        # that can be running.
+        if self._done_count >= self._tx_count:
+            self._tx_count = 0
+            self._done_count = 0
+            self._stage_tx = 0
+            self._skip_sent = 0
+            self._skip_done = 0
+
+        last = self._disp_drv.flush_is_last()
+        data_view = color_p.__dereference__(size)
+        pending_size = self._pending_size
+
+        if size <= self._coalesce_max_size:
+            if (
+                pending_size and
+                x1 == self._pending_x1 and
+                x2 == self._pending_x2 and
+                y1 == self._pending_y2 + 1 and
+                pending_size + size <= len(self._coalesce_buf)
+            ):
+                self._coalesce_mv[pending_size:pending_size + size] = data_view
+                self._pending_y2 = y2
+                self._pending_size = pending_size + size
+                staged = True
+            else:
+                # the area can't be added to the run that is waiting so
+                # that run gets sent and the area starts a new one.
+                if pending_size:
+                    self._send_pending(False)
+                    pending_size = 0
+
+                staged = self._start_pending(data_view, x1, y1, x2, y2, size)
+
+            if staged:
+                # the data has been copied so LVGL is able to reuse
+                # the buffer right away.
+                if last:
+                    self._send_pending(True)
+                else:
+                    self._disp_drv.flush_ready()
+                return
+
+        if pending_size:
+            self._send_pending(False)
+
+        cmd = self._set_memory_location(x1, y1, x2, y2)
+        self._flush_transactions += 1
+        self._tx_count += 1
+        self._tx_color(cmd, data_view, x1, y1, x2, y2, self._rotation, last)
+
+    def _coalesce_flush_ready_cb(self, *_):
+        self._done_count += 1
+
+        if self._skip_done < self._skip_sent:
+            self._skip_done += 1
+            return
+
+        self._disp_drv.flush_ready()
 
     # we always register this callback no matter what. This is what tells LVGL
     # that the buffer is able to be written to. If this callback doesn't get
@@ -3,19 +3,209 @@
 import lvgl as lv  # NOQA
 import _indev_base
 import micropython  # NOQA
+import array
+import math
 from lcd_utils import remap as _remap  # NOQA
+from micropython import const  # NOQA
 
 remap = _remap
 
+# fixed point scale of the coordinate transform
+_TRANSFORM_SHIFT = const(16)
+_TRANSFORM_ONE = const(1 << _TRANSFORM_SHIFT)
+_TRANSFORM_HALF = const(1 << (_TRANSFORM_SHIFT - 1))
+
+# every touch point takes 3 slots in the point array, id, x and y
+_POINT_SIZE = const(3)
+
+# i2c.I2C.PRIORITY_HIGHEST
+_I2C_PRIORITY = const(3)
+
+
+class GestureRecognizer(object):
+    """
+    Two finger pinch, rotate and pan.
+
+    The events get sent to the pointer driver's indev and to the object that
+    is being pressed. The event codes are registered with LVGL when the first
+    recognizer gets created and the values are read from the recognizer in
+    the event callback:
+
+        gestures = indev.enable_gestures()
+
+        def on_pinch(e):
+            print(gestures.scale)
+
+        indev.add_event_cb(on_pinch, gestures.PINCH, None)
+
+    scale is the distance between the fingers compared to when the second
+    finger touched, rotation the change in the angle between them in degrees
+    (clockwise) and pan_x/pan_y how far the point in the middle of them moved.
+    A gesture starts once it goes past its threshold and lasts until one of
+    the fingers is lifted, END is sent then.
+    """
+
+    PINCH = None
+    ROTATE = None
+    PAN = None
+    END = None
+
+    pinch_threshold = 0.1
+    rotate_threshold = 10
+    pan_threshold = 10
+
+    def __init__(self, pointer):
+        cls = GestureRecognizer
+        if cls.PINCH is None:
+            cls.PINCH = lv.event_register_id()  # NOQA
+            cls.ROTATE = lv.event_register_id()  # NOQA
+            cls.PAN = lv.event_register_id()  # NOQA
+            cls.END = lv.event_register_id()  # NOQA
+
+        self._pointer = pointer
+        self._ids = [-1, -1]
+        self._start = [0.0, 0.0, 0, 0]
+
+        self.active = False
+        self.pinching = False
+        self.rotating = False
+        self.panning = False
+
+        self.scale = 1.0
+        self.rotation = 0.0
+        self.pan_x = 0
+        self.pan_y = 0
+        self.center_x = 0
+        self.center_y = 0
+
+    def _send(self, code):
+        self._pointer.send_event(code, None)
+
+        obj = self._pointer.get_active_obj()
+        if obj is not None:
+            obj.send_event(code, None)  # NOQA
+
+    def _end(self):
+        if self.pinching or self.rotating or self.panning:
+            self._send(self.END)
+
+        self.active = False
+        self.pinching = False
+        self.rotating = False
+        self.panning = False
+        self.scale = 1.0
+        self.rotation = 0.0
+        self.pan_x = 0
+        self.pan_y = 0
+
+    def update(self, points, count):
+        if count < 2:
+            if self.active:
+                self._end()
+            return
+
+        first = 0
+        second = _POINT_SIZE
+
+        if self.active:
+            # the controller doesn't always report the fingers in the same
+            # order, they get matched by their touch id
+            first = -1
+            second = -1
+            for i in range(0, count * _POINT_SIZE, _POINT_SIZE):
+                if points[i] == self._ids[0]:
+                    first = i
+                elif points[i] == self._ids[1]:
+                    second = i
+
+            # a different pair of fingers starts a new gesture
+            if first == -1 or second == -1:
+                self._end()
+                first = 0
+                second = _POINT_SIZE
+
+        calc_coords = self._pointer._calc_coords  # NOQA
+        x1, y1 = calc_coords(points[first + 1], points[first + 2])
+        x2, y2 = calc_coords(points[second + 1], points[second + 2])
+
+        dx = x2 - x1
+        dy = y2 - y1
+        distance = math.sqrt(dx * dx + dy * dy)
+        angle = math.degrees(math.atan2(dy, dx))
+        self.center_x = (x1 + x2) >> 1
+        self.center_y = (y1 + y2) >> 1
+
+        start = self._start
+
+        if not self.active:
+            self._ids[0] = points[first]
+            self._ids[1] = points[second]
+            start[0] = max(distance, 1.0)
+            start[1] = angle
+            start[2] = self.center_x
+            start[3] = self.center_y
+            self.active = True
+            return
+
+        scale = distance / start[0]
+        rotation = (angle - start[1] + 180.0) % 360.0 - 180.0
+        pan_x = self.center_x - start[2]
+        pan_y = self.center_y - start[3]
+
+        if not self.pinching and abs(scale - 1.0) >= self.pinch_threshold:
+            self.pinching = True
+        if not self.rotating and abs(rotation) >= self.rotate_threshold:
+            self.rotating = True
+        if (
+            not self.panning and
+            pan_x * pan_x + pan_y * pan_y >=
+            self.pan_threshold * self.pan_threshold
+        ):
+            self.panning = True
+
+        if self.pinching and scale != self.scale:
+            self.scale = scale
+            self._send(self.PINCH)
+        if self.rotating and rotation != self.rotation:
+            self.rotation = rotation
+            self._send(self.ROTATE)
+        if self.panning and (pan_x != self.pan_x or pan_y != self.pan_y):
+            self.pan_x = pan_x
+            self.pan_y = pan_y
+            self._send(self.PAN)
+
 
 class PointerDriver(_indev_base.IndevBase):
 
+    # how many touch points the controller reports, drivers that read more
+    # than one override _get_points and call _get_multi_coords from
+    # _get_coords
+    max_points = 1
+
+    # touch gets the shared I2C bus before anything else
+    _i2c_priority = _I2C_PRIORITY
+
     def __init__(self, touch_cal=None, startup_rotation=lv.DISPLAY_ROTATION._0, debug=False):  # NOQA
+        # only an i2c.I2C.Device has a priority
+        set_priority = getattr(
+            getattr(self, '_device', None), 'set_default_priority', None)
+        if set_priority is not None:
+            set_priority(self._i2c_priority)
+
         self._last_x = -1
         self._last_y = -1
 
+        self._points = array.array('h', [0] * (self.max_points * _POINT_SIZE))
+        self._point_count = 0
+        self._primary_id = -1
+        self.gestures = None
+
         self._last_state = self.RELEASED
 
+        self._irq_pin = None
+        self._irq_timer = None
+        self._irq_scheduled = False
+
         super().__init__(debug=debug)
 
         if touch_cal is None:
@@ -28,6 +218,8 @@ class PointerDriver(_indev_base.IndevBase):
         self._orig_height = self._height
         self._set_type(lv.INDEV_TYPE.POINTER)  # NOQA
         self._startup_rotation = startup_rotation
+        self._transform = None
+        self.update_transform()
 
         self._indev_drv.enable(True)
 
@@ -47,15 +239,158 @@ class PointerDriver(_indev_base.IndevBase):
         if last_state == self.PRESSED:
             lv.refr_now(self._disp_drv)
 
+    def enable_irq(self, pin, trigger=None, poll_period=30):
+        # Puts the indev into event mode so the touch controller only gets
+        # read after the interrupt pin fires instead of every time the LVGL
+        # read timer runs. While the screen is being touched it gets polled
+        # every poll_period milliseconds until it is released, not all
+        # controllers send an interrupt when the touch ends.
+        import machine  # NOQA
+
+        if isinstance(pin, int):
+            pin = machine.Pin(pin, machine.Pin.IN)
+
+        if trigger is None:
+            trigger = machine.Pin.IRQ_FALLING
+
+        self.disable_irq()
+
+        # Allocation occurs here
+        self._irq_read_ref = self._irq_read
+
+        self._irq_timer = lv.timer_create(
+            self._irq_timer_cb, poll_period, None)  # NOQA
+        self._irq_timer.pause()  # NOQA
+        self._irq_scheduled = False
+        self._irq_pin = pin
+
+        self._indev_drv.set_mode(lv.INDEV_MODE.EVENT)  # NOQA
+        pin.irq(handler=self._irq_cb, trigger=trigger)
+
+    def disable_irq(self):
+        if self._irq_pin is None:
+            return
+
+        self._irq_pin.irq(handler=None)
+        self._irq_pin = None
+
+        self._irq_timer.delete()  # NOQA
+        self._irq_timer = None
+
+        self._indev_drv.set_mode(lv.INDEV_MODE.TIMER)  # NOQA
+
+    def _irq_cb(self, _):
+        # interrupt context, nothing can be allocated in here.
+        if self._irq_scheduled:
+            return
+
+        try:
+            micropython.schedule(self._irq_read_ref, None)
+            self._irq_scheduled = True
+        except:  # NOQA
+            pass
+
+    def _irq_read(self, _):
+        self._irq_scheduled = False
+
+        if lv._nesting.value:  # NOQA
+            # LVGL is in the middle of something, have the poll timer do the
+            # read the next time LVGL runs its timers.
+            self._irq_timer.resume()  # NOQA
+            self._irq_timer.ready()  # NOQA
+            return
+
+        self.read()
+
+        if self._last_state == self.PRESSED:
+            self._irq_timer.resume()  # NOQA
+
+    def _irq_timer_cb(self, _):
+        self.read()
+
+        if self._last_state == self.RELEASED:
+            self._irq_timer.pause()  # NOQA
+
+    def enable_gestures(self):
+        if self.max_points < 2:
+            raise RuntimeError(
+                f'{self.__class__.__name__} only reads a single touch point'
+            )
+
+        if self.gestures is None:
+            self.gestures = GestureRecognizer(self)
+
+        return self.gestures
+
+    def disable_gestures(self):
+        self.gestures = None
+
+    def get_point_count(self):
+        return self._point_count
+
+    def get_touch_point(self, index):
+        # the point as (id, x, y) in display coordinates
+        if index >= self._point_count:
+            raise IndexError(index)
+
+        index *= _POINT_SIZE
+        points = self._points
+        x, y = self._calc_coords(points[index + 1], points[index + 2])
+        return points[index], x, y
+
     def calibrate(self):
         import touch_calibrate
 
         if touch_calibrate.calibrate(self, self._cal):  # NOQA
             self._cal.save()
+            self.update_transform()
             return True
 
         return False
 
+    def update_transform(self):
+        # The calibration, mirroring and startup rotation get folded into a
+        # single 2x3 matrix (fixed point) that _calc_coords applies to every
+        # sample. This needs to be called if the calibration data gets
+        # changed by something other than the calibrate method.
+        width = self._orig_width
+        height = self._orig_height
+
+        if self.is_calibrated:
+            cal = self._cal
+            a, b, c = cal.alphaX, cal.betaX, cal.deltaX
+            d, e, f = cal.alphaY, cal.betaY, cal.deltaY
+
+            if cal.mirrorX:
+                a, b, c = -a, -b, width - 1 - c
+            if cal.mirrorY:
+                d, e, f = -d, -e, height - 1 - f
+        else:
+            a, b, c = 1, 0, 0
+            d, e, f = 0, 1, 0
+
+            if (
+                self._startup_rotation == lv.DISPLAY_ROTATION._180 or  # NOQA
+                self._startup_rotation == lv.DISPLAY_ROTATION._270  # NOQA
+            ):
+                a, b, c = -a, -b, width - 1 - c
+                d, e, f = -d, -e, height - 1 - f
+
+            if (
+                self._startup_rotation == lv.DISPLAY_ROTATION._90 or  # NOQA
+                self._startup_rotation == lv.DISPLAY_ROTATION._270  # NOQA
+            ):
+                a, b, c, d, e, f = -d, -e, height - 1 - f, a, b, c
+
+        self._transform = (
+            int(round(a * _TRANSFORM_ONE)),
+            int(round(b * _TRANSFORM_ONE)),
+            int(round(c * _TRANSFORM_ONE)) + _TRANSFORM_HALF,
+            int(round(d * _TRANSFORM_ONE)),
+            int(round(e * _TRANSFORM_ONE)),
+            int(round(f * _TRANSFORM_ONE)) + _TRANSFORM_HALF
+        )
+
     @property
     def is_calibrated(self):
         cal = self._cal
@@ -77,31 +412,43 @@ class PointerDriver(_indev_base.IndevBase):
         # of (state, x, y) or None if no touch even has occured
         raise NotImplementedError
 
-    def _calc_coords(self, x, y):
-        if self.is_calibrated:
-            cal = self._cal
-            x = int(round(x * cal.alphaX + y * cal.betaX + cal.deltaX))
-            y = int(round(x * cal.alphaY + y * cal.betaY + cal.deltaY))
+    def _get_points(self, points):  # NOQA
+        # Multi touch drivers override this. It reads all of the active
+        # touch points in as few transactions as possible and writes them to
+        # points as id, x, y. The number of points gets returned, returning
+        # self._point_count keeps the points from the last read.
+        raise NotImplementedError
 
-            if cal.mirrorX:
-                x = self._orig_width - x - 1
-            if cal.mirrorY:
-                y = self._orig_height - y - 1
+    def _get_multi_coords(self):
+        points = self._points
+        count = self._get_points(points)
+        self._point_count = count
+
+        if self.gestures is not None:
+            self.gestures.update(points, count)
+
+        if not count:
+            self._primary_id = -1
+            return None
+
+        # LVGL gets the finger that touched first for as long as it stays
+        # down, a second finger doesn't make the point jump around.
+        index = 0
+        for i in range(0, count * _POINT_SIZE, _POINT_SIZE):
+            if points[i] == self._primary_id:
+                index = i
+                break
         else:
-            if (
-                self._startup_rotation == lv.DISPLAY_ROTATION._180 or  # NOQA
-                self._startup_rotation == lv.DISPLAY_ROTATION._270  # NOQA
-            ):
-                x = self._orig_width - x - 1
-                y = self._orig_height - y - 1
+            self._primary_id = points[0]
 
-            if (
-                self._startup_rotation == lv.DISPLAY_ROTATION._90 or  # NOQA
-                self._startup_rotation == lv.DISPLAY_ROTATION._270  # NOQA
-            ):
-                x, y = self._orig_height - y - 1, x
+        return self.PRESSED, points[index + 1], points[index + 2]
 
-        return x, y
+    def _calc_coords(self, x, y):
+        a, b, c, d, e, f = self._transform
+        return (
+            (a * x + b * y + c) >> _TRANSFORM_SHIFT,
+            (d * x + e * y + f) >> _TRANSFORM_SHIFT
+        )
 
     def _read(self, drv, data):  # NOQA
         coords = self._get_coords()
@@ -1,6 +1,11 @@
 # Copyright (c) 2024 - 2025 Kevin G. Schlosser
 import machine
+import micropython  # NOQA
 import lcd_utils
+from micropython import const  # NOQA
+
+# i2c.I2C.PRIORITY_HIGH
+_I2C_PRIORITY = const(2)
 
 
 class Pin(object):
@@ -17,22 +22,67 @@ class Pin(object):
     _int_pin = None
     _reg_int_pins = []
 
+    # the level of all of the pins the last time the interrupt fired
+    _int_states = 0
+    _int_scheduled = False
+    _int_read_ref = None
+
     _device = None
 
+    # the priority the device gets on a shared I2C bus
+    _i2c_priority = _I2C_PRIORITY
+
+    # Copies of the output, direction and pull registers of the device. A
+    # pin change gets made here and the whole register is written in a
+    # single transaction, the state of an output is read from here and not
+    # from the device. The bits are the same as in the registers, a 1 in
+    # _dir_states is an output and a 1 in _pull_up_states a pull up.
+    _output_states = 0x00
+    _dir_states = 0x00
+    _pull_states = 0x00
+    _pull_up_states = 0x00
+
+    # one buffer for all of the pins of the device, set_device creates it
+    _buf = None
+    _mv = None
+
     @classmethod
     def _int_cb(cls, _):
+        # This can be interrupt context, nothing can be allocated and the
+        # bus can't be used. The read gets scheduled, the interrupt line
+        # stays active until the port has been read.
+        if cls._int_scheduled:
+            return
+
+        try:
+            micropython.schedule(cls._int_read_ref, None)
+            cls._int_scheduled = True
+        except:  # NOQA
+            pass
+
+    @classmethod
+    def _int_read(cls, _):
+        cls._int_scheduled = False
+
+        # one read for all of the pins, only the pins that changed since the
+        # last time get their handler called
+        states = cls._read_int_states()
+        changed = states ^ cls._int_states
+        cls._int_states = states
+
+        if not changed:
+            return
+
         for ext_pin in cls._reg_int_pins:
-            ext_pin._interrupt_cb()  # NOQA
+            if changed & ext_pin._bit:  # NOQA
+                ext_pin._interrupt_cb(states)  # NOQA
 
-    def _interrupt_cb(self):
+    def _interrupt_cb(self, states):
         if self._irq is None:
             # sanity check
             return
 
-        value = self.value()
-        if value == self._irq_input_state:
-            return
-
+        value = int(bool(states & self._bit))
         self._irq_input_state = value
 
         handler, trigger = self._irq
@@ -49,12 +99,15 @@ class Pin(object):
             raise ValueError('Interrupt pin has already been set')
 
         try:
-            cls._int_cb(None)
+            cls._int_states = cls._read_int_states()
         except NotImplementedError:
             raise NotImplementedError
         except:  # NOQA
             pass
 
+        # Allocation occurs here
+        cls._int_read_ref = cls._int_read
+
         if pull == -1:
             int_pin = machine.Pin(pin_num, machine.Pin.IN)
         else:
@@ -72,15 +125,41 @@ class Pin(object):
             raise ValueError('device has already been set')
 
         cls._device = device
+        # only an i2c.I2C.Device has a priority
+        set_priority = getattr(device, 'set_default_priority', None)
+        if set_priority is not None:
+            set_priority(cls._i2c_priority)
+
+        cls._buf = bytearray(2)
+        cls._mv = memoryview(cls._buf)
+        cls._init_device()
+
+    @classmethod
+    def write_port(cls, mask, values):
+        """
+        Sets the outputs in mask to the matching bits in values using a single
+        write, nothing gets written if none of them change.
+        """
+        states = (cls._output_states & ~mask) | (values & mask)
+
+        if states != cls._output_states:
+            cls._output_states = states
+            cls._write_output(states)
+
+    @classmethod
+    def read_port(cls):
+        """
+        Reads the level of all of the pins at once.
+        """
+        return cls._read_input()
 
     def __init__(self, id, mode=-1, pull=-1, value=-1):  # NOQA
-        if Pin._device is None:
+        if self._device is None:
             raise RuntimeError('The expander device has not been set')
 
         self._id = id
+        self._bit = self._pin_bit(id)
         self._mode = 0
-        self._buf = bytearray(2)
-        self._mv = memoryview(self._buf)
 
         self._adc = None
         self._pwm = None
@@ -108,7 +187,9 @@ class Pin(object):
                     'before setting the pins IRQ'
                 )
 
-            self._irq_input_state = self.value()
+            cls = self.__class__
+            cls._int_states = cls._read_int_states()
+            self._irq_input_state = int(bool(cls._int_states & self._bit))
             self._set_irq(handler, trigger=trigger)
 
             if handler is None:
@@ -155,17 +236,89 @@ class Pin(object):
         raise NotImplementedError
 
     def _set_pull(self, pull):
-        raise NotImplementedError
+        cls = self.__class__
+        bit = self._bit
+
+        if pull is None:
+            enabled = cls._pull_states & ~bit
+            up = cls._pull_up_states
+        elif pull == self.PULL_UP:
+            enabled = cls._pull_states | bit
+            up = cls._pull_up_states | bit
+        elif pull == self.PULL_DOWN:
+            enabled = cls._pull_states | bit
+            up = cls._pull_up_states & ~bit
+        else:
+            raise ValueError('Unsupported pull')
+
+        if enabled != cls._pull_states or up != cls._pull_up_states:
+            cls._pull_states = enabled
+            cls._pull_up_states = up
+            cls._write_pull(enabled, up)
 
     def _set_dir(self, direction):
-        raise NotImplementedError
+        cls = self.__class__
+
+        if direction == self.OUT:
+            states = cls._dir_states | self._bit
+        elif direction == self.IN:
+            states = cls._dir_states & ~self._bit
+        else:
+            raise ValueError('OPEN_DRAIN is not supported')
+
+        if states != cls._dir_states:
+            cls._dir_states = states
+            cls._write_dir(states)
 
     def _set_level(self, level):
-        raise NotImplementedError
+        if self._mode == self.OUT:
+            self.write_port(self._bit, self._bit if level else 0)
 
     def _get_level(self):
+        if self._mode == self.IN:
+            states = self._read_input()
+        elif self._mode == self.OUT:
+            states = self._output_states
+        else:
+            raise ValueError('Unsupported pin mode')
+
+        return int(bool(states & self._bit))
+
+    # The drivers implement these. _init_device gets called once the device
+    # is set and is where the copies of the registers get loaded from the
+    # device. The _write_* methods write a whole register.
+
+    @staticmethod
+    def _pin_bit(id):  # NOQA
+        return 1 << id
+
+    @classmethod
+    def _init_device(cls):
+        pass
+
+    @classmethod
+    def _write_output(cls, states):
         raise NotImplementedError
 
+    @classmethod
+    def _write_dir(cls, states):
+        raise NotImplementedError
+
+    @classmethod
+    def _write_pull(cls, enabled, up):
+        raise NotImplementedError
+
+    @classmethod
+    def _read_input(cls):
+        raise NotImplementedError
+
+    @classmethod
+    def _read_int_states(cls):
+        # Reading the input port is what clears the interrupt on most
+        # expanders. A chip with an interrupt status register can use it here
+        # instead, what gets returned is the level of all of the pins.
+        return cls._read_input()
+
 
 class PWM:
     def __init__(self, pin: Pin, freq: int = -1, duty=-1):
@@ -0,0 +1,124 @@
+# Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+# Display flush throughput benchmark.
+#
+# This is a MicroPython script, run it with the unix (or macOS) build:
+#
+#   lvgl_micropy_unix benchmarks/flush_benchmark.py
+#
+# The display uses a bus that doesn't send anything anywhere so the numbers
+# only show the cost of the python flush path and LVGL rendering. Run it on
+# two builds to compare the flushes per second before and after a change.
+
+import time
+import lvgl as lv  # NOQA
+import display_driver_framework
+
+
+_WIDTH = 320
+_HEIGHT = 240
+_ITERATIONS = 20000
+_FRAMES = 500
+
+
+class NullBus:
+
+    def __init__(self):
+        self.callback = None
+        self.params = 0
+        self.colors = 0
+
+    def init(self, *_):
+        pass
+
+    def register_callback(self, callback):
+        self.callback = callback
+
+    def tx_param(self, cmd, params=None):
+        self.params += 1
+
+    def tx_color(self, cmd, data, x1, y1, x2, y2, rotation, last):
+        self.colors += 1
+        self.callback(None, None)
+
+    def get_lane_count(self):
+        return 8
+
+
+class ColorP:
+    # stands in for the C_Array object the binding passes to the flush
+    # callback.
+
+    def __init__(self, buf):
+        self._mv = memoryview(buf)
+
+    def __dereference__(self, size):
+        return self._mv[:size]
+
+
+def _report(name, count, ticks, bus):
+    seconds = ticks / 1000000.0
+    print(
+        f'{name:<24} {count / seconds:>12.1f} flushes/s  '
+        f'({bus.params} param / {bus.colors} color transactions)'
+    )
+
+
+def bench_flush_cb(display, bus):
+    # calls the flush function directly with the strips LVGL hands it when
+    # redrawing a 32 pixel wide widget 8 rows at a time.
+    color_p = ColorP(display._frame_buffer1)  # NOQA
+    area = lv.area_t()
+    area.x1 = 10
+    area.x2 = 41
+
+    flush_cb = display._flush_cb  # NOQA
+    bus.params = bus.colors = 0
+
+    start = time.ticks_us()  # NOQA
+    for i in range(_ITERATIONS):
+        area.y1 = (i & 0x0F) * 8
+        area.y2 = area.y1 + 7
+        flush_cb(None, area, color_p)
+
+    _report('flush_cb', _ITERATIONS, time.ticks_diff(time.ticks_us(), start), bus)  # NOQA
+
+
+def bench_refresh(display, bus):
+    # full LVGL refresh of a label that changes every frame.
+    scrn = lv.screen_active()
+    label = lv.label(scrn)
+    label.center()
+
+    bus.params = bus.colors = 0
+
+    start = time.ticks_us()  # NOQA
+    for i in range(_FRAMES):
+        label.set_text(str(i))
+        lv.refr_now(None)
+
+    ticks = time.ticks_diff(time.ticks_us(), start)  # NOQA
+    _report('refresh (label)', bus.colors, ticks, bus)
+    label.delete()
+
+
+def main():
+    bus = NullBus()
+
+    color_space = lv.COLOR_FORMAT.RGB565  # NOQA
+    buf_size = _WIDTH * _HEIGHT * 2 // 10
+
+    display = display_driver_framework.DisplayDriver(
+        data_bus=bus,
+        display_width=_WIDTH,
+        display_height=_HEIGHT,
+        frame_buffer1=bytearray(buf_size),
+        color_space=color_space
+    )
+    display._initilized = True  # NOQA
+
+    bench_flush_cb(display, bus)
+    bench_refresh(display, bus)
+
+
+main()
@@ -0,0 +1,149 @@
+# Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+# Binding generator timing benchmark.
+#
+# Unlike the other benchmarks this one runs with the host Python:
+#
+#   python3 benchmarks/gen_benchmark.py [--header lib/lvgl/lvgl.h] [--runs 3]
+#
+# Without --header a synthetic LVGL style header is generated that pulls in
+# the fake libc headers from gen/fake_libc and declares a few hundred structs,
+# enums, callbacks and functions. The generator is run with the AST cache
+# turned off and then with a warm cache. Use --profile to get the per phase
+# cProfile stats from the generator.
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+SCRIPT_DIR = os.path.abspath(os.path.dirname(__file__))
+GEN_SCRIPT = os.path.join(SCRIPT_DIR, '..', 'gen', 'lvgl_api_gen_mpy.py')
+
+
+def write_header(path, count):
+    lines = [
+        '#include <stdint.h>',
+        '#include <stdbool.h>',
+        '#include <stddef.h>',
+        '#include <string.h>',
+        '',
+        'typedef int32_t lv_coord_t;',
+        ''
+    ]
+
+    for i in range(count):
+        lines.extend([
+            f'typedef enum {{',
+            f'    LV_BENCH{i}_MODE_A,',
+            f'    LV_BENCH{i}_MODE_B,',
+            f'    LV_BENCH{i}_MODE_C = 0x10,',
+            f'}} lv_bench{i}_mode_t;',
+            '',
+            f'struct _lv_bench{i}_t;',
+            f'typedef void (*lv_bench{i}_cb_t)(struct _lv_bench{i}_t * obj, void * user_data);',
+            '',
+            f'typedef struct _lv_bench{i}_t {{',
+            f'    lv_coord_t x;',
+            f'    lv_coord_t y;',
+            f'    uint8_t flags;',
+            f'    lv_bench{i}_mode_t mode;',
+            f'    lv_bench{i}_cb_t cb;',
+            f'    void * user_data;',
+            f'}} lv_bench{i}_t;',
+            '',
+            f'void lv_bench{i}_init(lv_bench{i}_t * obj);',
+            f'void lv_bench{i}_set_pos(lv_bench{i}_t * obj, lv_coord_t x, lv_coord_t y);',
+            f'lv_coord_t lv_bench{i}_get_x(const lv_bench{i}_t * obj);',
+            f'void lv_bench{i}_set_mode(lv_bench{i}_t * obj, lv_bench{i}_mode_t mode);',
+            f'void lv_bench{i}_set_cb(lv_bench{i}_t * obj, lv_bench{i}_cb_t cb, void * user_data);',
+            f'bool lv_bench{i}_copy(lv_bench{i}_t * dst, const lv_bench{i}_t * src, size_t size);',
+            ''
+        ])
+
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines))
+
+
+def run_gen(header, out_dir, cache_dir, profile):
+    cmd = [
+        sys.executable,
+        GEN_SCRIPT,
+        f'--output={os.path.join(out_dir, "lv_mpy.c")}',
+        f'--include={os.path.dirname(os.path.abspath(header))}',
+        f'--cache-dir={cache_dir}',
+        '--module_name=lvgl',
+        '--module_prefix=lv',
+        header
+    ]
+    if profile:
+        cmd.append('--profile')
+
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    duration = time.perf_counter() - start
+
+    if proc.returncode:
+        sys.stderr.write(proc.stderr.decode('utf-8'))
+        raise RuntimeError('binding generation failed')
+
+    if profile:
+        sys.stderr.write(proc.stderr.decode('utf-8'))
+
+    return duration
+
+
+def report(name, timings):
+    print(
+        f'{name:<12} min {min(timings):>7.3f}s  '
+        f'median {statistics.median(timings):>7.3f}s  '
+        f'({len(timings)} runs)'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--header', default=None)
+    parser.add_argument('--count', type=int, default=300)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--profile', action='store_true')
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='gen_benchmark_')
+    try:
+        header = args.header
+        if header is None:
+            header = os.path.join(work_dir, 'lv_bench.h')
+            write_header(header, args.count)
+
+        cache_dir = os.path.join(work_dir, 'ast_cache')
+
+        cold = [
+            run_gen(header, work_dir, '', args.profile)
+            for _ in range(args.runs)
+        ]
+
+        # first run fills the cache
+        run_gen(header, work_dir, cache_dir, False)
+        warm = [
+            run_gen(header, work_dir, cache_dir, False)
+            for _ in range(args.runs)
+        ]
+
+        with open(os.path.join(work_dir, 'lv_mpy.c'), 'r') as f:
+            line_count = f.read().count('\n')
+
+        print(f'{header}: {line_count} lines generated')
+        report('no cache', cold)
+        report('warm cache', warm)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+# Render throughput benchmark that doesn't need a display or display server.
+#
+# This is a MicroPython script for the unix build, it uses lcd_bus.HeadlessBus
+# so it can be run in CI:
+#
+#   lvgl_micropy_unix benchmarks/headless_benchmark.py [screenshot.png]
+#
+# The checksum printed at the end changes when what gets rendered changes,
+# compare it between builds to catch visual regressions. When a file name is
+# given the last frame is saved to it (.ppm or .png).
+
+import sys
+import time
+from micropython import const  # NOQA
+import lcd_bus  # NOQA
+import lvgl as lv  # NOQA
+import headless_display  # NOQA
+
+
+_WIDTH = const(320)
+_HEIGHT = const(240)
+_FRAMES = const(300)
+
+
+def main():
+    bus = lcd_bus.HeadlessBus(checksum=True)
+    display = headless_display.HeadlessDisplay(
+        data_bus=bus,
+        display_width=_WIDTH,
+        display_height=_HEIGHT,
+        color_space=lv.COLOR_FORMAT.RGB565  # NOQA
+    )
+    display.init()
+
+    scrn = lv.screen_active()
+
+    bar = lv.bar(scrn)
+    bar.set_size(_WIDTH - 40, 20)
+    bar.align(lv.ALIGN.TOP_MID, 0, 20)  # NOQA
+
+    label = lv.label(scrn)
+    label.center()
+
+    arc = lv.arc(scrn)
+    arc.set_size(100, 100)
+    arc.align(lv.ALIGN.BOTTOM_MID, 0, -10)  # NOQA
+
+    lv.refr_now(None)
+    display.reset_bus_stats()
+
+    start = time.ticks_us()  # NOQA
+    for i in range(_FRAMES):
+        bar.set_value(i % 100, False)
+        arc.set_value((i * 3) % 100)
+        label.set_text(str(i))
+        lv.refr_now(None)
+
+    ticks = time.ticks_diff(time.ticks_us(), start)  # NOQA
+    stats = display.get_bus_stats()
+
+    seconds = ticks / 1000000.0
+    print(f'frames:          {stats["frames"]}')
+    print(f'frames/s:        {stats["frames"] / seconds:.1f}')
+    print(f'flushes/frame:   {stats["flushes"] / max(stats["frames"], 1):.1f}')
+    print(f'bytes/frame:     {stats["bytes"] // max(stats["frames"], 1)}')
+    print(f'params:          {stats["params"]}')
+    print(f'frame checksum:  0x{stats["frame_checksum"]:08X}')
+
+    if len(sys.argv) > 1:
+        file_name = sys.argv[1]
+        if file_name.endswith('.png'):
+            display.save_png(file_name)
+        else:
+            display.save_ppm(file_name)
+
+        print(f'saved {file_name}')
+
+
+main()
@@ -0,0 +1,101 @@
+# Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+# Repeatable scroll benchmark using recorded input.
+#
+# This is a MicroPython script for the unix (or macOS) build with the SDL
+# display. Make a recording by scrolling the list with the mouse:
+#
+#   lvgl_micropy_unix benchmarks/replay_benchmark.py record scroll.lvir
+#
+# then play it back as many times as needed, optionally faster than real
+# time, and compare the frame timings between builds:
+#
+#   lvgl_micropy_unix benchmarks/replay_benchmark.py replay scroll.lvir 2.0
+
+import sys
+import time
+from micropython import const  # NOQA
+import lcd_bus  # NOQA
+
+
+_WIDTH = const(480)
+_HEIGHT = const(320)
+_RECORD_SECONDS = const(15)
+
+bus = lcd_bus.SDLBus(flags=0)
+buf1 = bus.allocate_framebuffer(_WIDTH * _HEIGHT * 3, 0)
+
+import lvgl as lv  # NOQA
+import sdl_display  # NOQA
+import task_handler  # NOQA
+import indev_replay  # NOQA
+
+
+display = sdl_display.SDLDisplay(
+    data_bus=bus,
+    display_width=_WIDTH,
+    display_height=_HEIGHT,
+    frame_buffer1=buf1,
+    color_space=lv.COLOR_FORMAT.RGB888
+)
+display.init()
+
+
+def build_ui():
+    scrn = lv.screen_active()
+    lst = lv.list(scrn)
+    lst.set_size(_WIDTH - 40, _HEIGHT - 40)
+    lst.center()
+
+    for i in range(100):
+        lst.add_button(lv.SYMBOL.FILE, f'Item {i}')
+
+
+def record(file_name):
+    import sdl_pointer  # NOQA
+
+    mouse = sdl_pointer.SDLPointer()
+    th = task_handler.TaskHandler(duration=5)
+    build_ui()
+
+    recorder = indev_replay.InputRecorder(mouse, file_name)
+    recorder.start()
+    print(f'recording for {_RECORD_SECONDS} seconds')
+    time.sleep(_RECORD_SECONDS)
+    recorder.stop()
+    th.deinit()
+    print(f'{recorder.count} records saved to {file_name}')
+
+
+def replay(file_name, speed):
+    replay_drv = indev_replay.ReplayDriver(file_name, speed=speed)
+    th = task_handler.TaskHandler(duration=5)
+    profiler = th.enable_profiling(256)
+    build_ui()
+
+    replay_drv.restart()
+    start = time.ticks_ms()  # NOQA
+    while not replay_drv.is_done():
+        time.sleep_ms(10)  # NOQA
+
+    ticks = time.ticks_diff(time.ticks_ms(), start)  # NOQA
+    th.deinit()
+
+    print(f'replayed in {ticks} ms at {speed}x')
+    for key, value in profiler.summary().items():
+        print(f'  {key:<10} {value}')
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ('record', 'replay'):
+        print('usage: replay_benchmark.py record|replay FILE [SPEED]')
+        return
+
+    if sys.argv[1] == 'record':
+        record(sys.argv[2])
+    else:
+        speed = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+        replay(sys.argv[2], speed)
+
+
+main()
@@ -0,0 +1,109 @@
+# Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+# Output pump benchmark for builder.spawn.
+#
+# Like gen_benchmark.py this runs with the host Python:
+#
+#   python3 benchmarks/spawn_benchmark.py [--lines 100000] [--runs 3]
+#
+# A child process writes compiler style output (progress lines, "CC ..."
+# lines, warnings on stderr) as fast as it can and it is run through
+# builder.spawn the same way a port build is, with the progress line
+# rendering turned on. What spawn writes to the screen goes to /dev/null.
+# Lines per second and the CPU time used by make.py's side are reported.
+
+import argparse
+import os
+import resource
+import statistics
+import sys
+import time
+
+
+SCRIPT_DIR = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(SCRIPT_DIR, '..'))
+
+import builder  # NOQA
+
+
+CHILD_SCRIPT = '''\
+import sys
+out = sys.stdout
+err = sys.stderr
+for i in range({count}):
+    if i % 50 == 0:
+        err.write(f"src/widgets/file{{i}}.c:12:5: warning: unused variable\\n")
+    elif i % 3 == 0:
+        out.write(f"[{{i * 100 // {count}:3d}}%] Building C object esp-idf/main/CMakeFiles/file{{i}}.c.obj\\n")
+    else:
+        out.write(f"CC ../../lib/lvgl/src/widgets/lv_file{{i}}.c\\n")
+'''
+
+
+def run_spawn(count, script_path):
+    cmd = [sys.executable, script_path]
+
+    stdout = sys.stdout
+    stderr = sys.stderr
+    devnull = open(os.devnull, 'w')
+
+    sys.stdout = devnull
+    sys.stderr = devnull
+
+    start_cpu = time.process_time()
+    start = time.perf_counter()
+    try:
+        return_code, output = builder.spawn(cmd, cmpl=True)
+    finally:
+        duration = time.perf_counter() - start
+        cpu = time.process_time() - start_cpu
+        sys.stdout = stdout
+        sys.stderr = stderr
+        devnull.close()
+
+    if return_code:
+        raise RuntimeError('child process failed')
+
+    lines = output.count('\n') + 1
+    if lines != count:
+        raise RuntimeError(f'expected {count} lines, got {lines}')
+
+    return duration, cpu
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    script_path = os.path.join(
+        os.path.dirname(os.path.abspath(builder.__file__)),
+        '..', 'build', 'spawn_benchmark_child.py'
+    )
+    script_path = os.path.abspath(script_path)
+    if not os.path.exists(os.path.dirname(script_path)):
+        os.mkdir(os.path.dirname(script_path))
+
+    with open(script_path, 'w') as f:
+        f.write(CHILD_SCRIPT.format(count=args.lines))
+
+    try:
+        timings = [run_spawn(args.lines, script_path) for _ in range(args.runs)]
+    finally:
+        os.remove(script_path)
+
+    durations = [t[0] for t in timings]
+    cpus = [t[1] for t in timings]
+    child_cpu = resource.getrusage(resource.RUSAGE_CHILDREN)
+    child_cpu = (child_cpu.ru_utime + child_cpu.ru_stime) / args.runs
+
+    print(f'{args.lines} lines, {args.runs} runs')
+    print(f'lines/s          {args.lines / statistics.median(durations):>12.0f}')
+    print(f'wall time        {statistics.median(durations):>11.3f}s')
+    print(f'spawn CPU time   {statistics.median(cpus):>11.3f}s')
+    print(f'child CPU time   {child_cpu:>11.3f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+# Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+# XPT2046 read path benchmark.
+#
+# This is a MicroPython script for the unix build, xpt2046 needs to be
+# compiled in and it uses lcd_bus.HeadlessBus so no display is needed:
+#
+#   python3 make.py unix INDEV=xpt2046
+#   lvgl_micropy_unix benchmarks/xpt2046_benchmark.py
+#
+# The touch controller is a fake SPI device that answers the conversions
+# from a noisy press at a fixed spot. Every filter is run with burst reads
+# and with a transfer per conversion, the SPI transactions per read, the time
+# per read and the point that was read are printed. Both modes read the same
+# samples so the points have to match.
+
+import time
+from micropython import const  # NOQA
+import lcd_bus  # NOQA
+import lvgl as lv  # NOQA
+import headless_display  # NOQA
+import xpt2046  # NOQA
+
+
+_WIDTH = const(320)
+_HEIGHT = const(240)
+_READS = const(500)
+
+
+class FakeXPT2046(object):
+
+    def __init__(self, x, y, z1, z2, noise):
+        self.values = {
+            0xD0: x,
+            0x90: y,
+            0xB0: z1,
+            0xC0: z2
+        }
+        self.noise = noise
+        self.transactions = 0
+        self._seed = {0xD0: 1, 0x90: 2, 0xB0: 3, 0xC0: 4}
+
+    def _convert(self, cmd):
+        # every channel has its own noise sequence so the samples don't
+        # depend on how the conversions are split into transfers
+        seed = (self._seed[cmd] * 1103515245 + 12345) & 0x7FFFFFFF
+        self._seed[cmd] = seed
+        noise = (seed >> 16) % (self.noise * 2 + 1) - self.noise
+        return self.values[cmd] + noise
+
+    def write_readinto(self, tx, rx):
+        self.transactions += 1
+
+        for i in range(len(tx)):
+            if tx[i] & 0x80:
+                value = self._convert(tx[i]) << 3
+                rx[i + 1] = value >> 8
+                rx[i + 2] = value & 0xFF
+
+    def write(self, _):
+        self.transactions += 1
+
+
+def run(name, sample_filter, burst):
+    device = FakeXPT2046(2000, 1500, 1200, 2800, 30)
+    indev = xpt2046.XPT2046(device, sample_filter=sample_filter)
+    indev.burst = burst
+
+    start = time.ticks_us()  # NOQA
+    for _ in range(_READS):
+        coords = indev._get_coords()  # NOQA
+    ticks = time.ticks_diff(time.ticks_us(), start)  # NOQA
+
+    print(
+        f'{name:<12} {"burst" if burst else "single":<7} '
+        f'{device.transactions / _READS:>6.1f} {ticks / _READS:>9.1f}us  '
+        f'{coords}'
+    )
+
+    indev._indev_drv.delete()  # NOQA
+    return coords
+
+
+def main():
+    bus = lcd_bus.HeadlessBus()
+    display = headless_display.HeadlessDisplay(
+        data_bus=bus,
+        display_width=_WIDTH,
+        display_height=_HEIGHT,
+        color_space=lv.COLOR_FORMAT.RGB565  # NOQA
+    )
+    display.init()
+
+    filters = (
+        ('mean', xpt2046.MeanFilter),
+        ('median', xpt2046.MedianFilter),
+        ('trimmed', xpt2046.TrimmedMeanFilter),
+        ('iir', xpt2046.IIRFilter)
+    )
+
+    print('filter       mode    trans/read  time/read  point')
+    failed = False
+    for name, filter_class in filters:
+        burst = run(name, filter_class(), True)
+        single = run(name, filter_class(), False)
+
+        if burst != single:
+            print(f'{name}: burst and single reads differ')
+            failed = True
+
+    if failed:
+        raise SystemExit(1)
+
+
+main()
@@ -6,13 +6,19 @@ import os
 import subprocess
 import threading
 import random
-import queue
+import selectors
+
+from . import init_stream
 
 _windows_env = None
 
 
 DO_NOT_SCRUB_BUILD_FOLDER = False
 
+# overrides for the display settings the init streams get compiled with.
+# see init_stream.CONFIG for the available keys
+INIT_STREAM_CONFIG = None
+
 
 def scrub_build_folder():
     if DO_NOT_SCRUB_BUILD_FOLDER:
@@ -449,6 +455,17 @@ def generate_manifest(
                 entry = f"freeze('{tmp_file}', '{file_name}')"
                 if entry not in manifest_files:
                     manifest_files.append(entry)
+
+            # precompile the init modules into command streams that
+            # get stored in flash, see builder/init_stream.py
+            for file in init_stream.compile_display(
+                tmp_file, 'build/init_streams', INIT_STREAM_CONFIG
+            ):
+                print(file)
+                file_path, file_name = os.path.split(os.path.abspath(file))
+                entry = f"freeze('{file_path}', '{file_name}')"
+                if entry not in manifest_files:
+                    manifest_files.append(entry)
         else:
             print(file)
             file_path, file_name = os.path.split(file)
@@ -575,15 +592,84 @@ def _convert_line(lne):
     return lne
 
 
-def process_output(myproc, out_to_screen, spinner, cmpl, out_queue):
-    line = b''
-    err_line = b''
-    last_line_len = -1
-    line_updated = False
-    err_updated = False
+def _is_progress_line(line):
+    return (
+        line.startswith('[') or
+        line.startswith('CC ') or
+        line.startswith('MPY ') or
+        (
+            line.startswith('--') and
+            len(line) <= 80
+        )
+    )
+
+
+class _OutputRenderer(object):
+    """
+    Writes the output of a child process to the screen.
+
+    When compiling the progress lines overwrite each other on a single line,
+    everything else is written out normally.
+    """
 
-    os.set_blocking(myproc.stdout.fileno(), False)
-    os.set_blocking(myproc.stderr.fileno(), False)
+    def __init__(self, spinner, cmpl, spinner_lock):
+        self.spinner = spinner
+        self.cmpl = cmpl
+        self.spinner_lock = spinner_lock
+        self.last_line_len = -1
+
+    def progress(self, line):
+        if self.last_line_len != -1:
+            sys.stdout.write('\r')
+
+        if len(line) < self.last_line_len:
+            padding = ' ' * (self.last_line_len - len(line))
+        else:
+            padding = ''
+
+        sys.stdout.write(line + padding)
+        sys.stdout.flush()
+
+        self.last_line_len = len(line)
+
+    def stdout(self, line):
+        if self.spinner:
+            with self.spinner_lock:
+                sys.stdout.write('\r' + line + '\n')
+                sys.stdout.flush()
+        elif self.last_line_len == -1:
+            sys.stdout.write(line + '\n')
+            sys.stdout.flush()
+        else:
+            sys.stdout.write('\n' + line + '\n')
+            sys.stdout.flush()
+
+        self.last_line_len = -1
+
+    def stderr_data(self):
+        # the progress line gets ended before anything from stderr is shown
+        if not self.spinner and self.cmpl and self.last_line_len != -1:
+            sys.stdout.write('\n')
+            sys.stdout.flush()
+            self.last_line_len = -1
+
+    def stderr(self, line):
+        if self.spinner:
+            with self.spinner_lock:
+                sys.stderr.write('\r' + line + '\n')
+                sys.stdout.flush()
+        else:
+            sys.stderr.write(line + '\n')
+            sys.stderr.flush()
+
+
+def process_output(myproc, out_to_screen, spinner, cmpl, output_buffer):
+    # stdout and stderr are read in large chunks when the selector says there
+    # is data, the lines get split off of the chunks.
+    sel = selectors.DefaultSelector()
+    sel.register(myproc.stdout, selectors.EVENT_READ, False)
+    sel.register(myproc.stderr, selectors.EVENT_READ, True)
+    partial = {False: b'', True: b''}
 
     event = threading.Event()
     spinner_lock = threading.Lock()
@@ -594,112 +680,64 @@ def process_output(myproc, out_to_screen, spinner, cmpl, out_queue):
     else:
         t = None
 
-    while True:
-        # --- extract line using read(1)
-        out = myproc.stdout.read(1)
-        while out:
-            line_updated = True
-            line += out
-            if out == b'\n':
-                line = _convert_line(line.strip())
-                if not line:
-                    line = b''
-                    break
-
-                out_queue.put(line)
-
-                if out_to_screen:
-                    if (
-                        cmpl and (
-                            line.startswith('[') or
-                            line.startswith('CC ') or
-                            line.startswith('MPY ') or
-                            (
-                                line.startswith('--') and
-                                len(line) <= 80
-                            )
-                        )
-                    ):
-                        if last_line_len != -1:
-                            sys.stdout.write('\r')
-                            sys.stdout.flush()
-
-                        if len(line) < last_line_len:
-                            padding = ' ' * (last_line_len - len(line))
-                        else:
-                            padding = ''
-
-                        sys.stdout.write(line + padding)
-                        sys.stdout.flush()
-
-                        last_line_len = len(line)
-                    else:
-                        if last_line_len == -1:
-                            if spinner:
-                                with spinner_lock:
-                                    sys.stdout.write('\r' + line + '\n')
-                                    sys.stdout.flush()
-                            else:
-                                sys.stdout.write(line + '\n')
-                                sys.stdout.flush()
-                        else:
-                            if spinner:
-                                with spinner_lock:
-                                    sys.stdout.write('\r' + line + '\n')
-                                    sys.stdout.flush()
-                            else:
-                                sys.stdout.write('\n' + line + '\n')
-                                sys.stdout.flush()
-
-                            last_line_len = -1
-
-                line = b''
-
-            out = myproc.stdout.read(1)
-
-        out = myproc.stderr.read(1)
-
-        while out:
-            err_updated = True
-            if not spinner and out_to_screen and cmpl and last_line_len != -1:
-                sys.stdout.write('\n')
-                sys.stdout.flush()
-                last_line_len = -1
-
-            err_line += out
-            if out == b'\n':
-                err_line = _convert_line(err_line.strip())
-                if not err_line:
-                    err_line = b''
-                    break
-
-                out_queue.put(err_line)
-                if out_to_screen:
-                    if spinner:
-                        with spinner_lock:
-                            sys.stderr.write('\r' + err_line + '\n')
-                            sys.stdout.flush()
-                    else:
-                        sys.stderr.write(err_line + '\n')
-                        sys.stderr.flush()
-
-                err_line = b''
-
-            out = myproc.stderr.read(1)
-
-        if not err_updated and not line_updated:
-            if myproc.poll() is not None:
-                break
-            event.wait(0.1)
+    renderer = _OutputRenderer(spinner, cmpl, spinner_lock)
+
+    def handle_lines(lines, is_stderr):
+        progress_line = None
+
+        for line in lines:
+            line = _convert_line(line.strip())
+            if not line:
+                continue
+
+            output_buffer.append(line)
+
+            if not out_to_screen:
+                continue
+
+            if is_stderr:
+                renderer.stderr(line)
+            elif cmpl and _is_progress_line(line):
+                # only the last of the progress lines in a chunk would be
+                # seen so that is the only one that gets written
+                progress_line = line
+            else:
+                if progress_line is not None:
+                    renderer.progress(progress_line)
+                    progress_line = None
+
+                renderer.stdout(line)
+
+        if progress_line is not None:
+            renderer.progress(progress_line)
+
+    while sel.get_map():
+        for key, _ in sel.select():
+            is_stderr = key.data
+            data = os.read(key.fd, 65536)
+
+            if not data:
+                sel.unregister(key.fileobj)
+                if partial[is_stderr]:
+                    handle_lines([partial[is_stderr]], is_stderr)
+                    partial[is_stderr] = b''
+                continue
+
+            if is_stderr and out_to_screen:
+                renderer.stderr_data()
 
-        err_updated = False
-        line_updated = False
+            lines = (partial[is_stderr] + data).split(b'\n')
+            partial[is_stderr] = lines.pop()
+            handle_lines(lines, is_stderr)
+
+    sel.close()
+    myproc.wait()
 
     if t is not None:
         event.set()
         t.join()
 
-    elif out_to_screen and cmpl and last_line_len != -1:
+    elif out_to_screen and cmpl and renderer.last_line_len != -1:
         sys.stdout.write('\n')
         sys.stdout.flush()
 
@@ -714,8 +752,6 @@ def spawn(cmd_, out_to_screen=True, spinner=False, env=None, cmpl=False):
 
     cmd_ = list(' '.join(c) for c in cmd_)
 
-    que = queue.Queue()
-
     p = subprocess.Popen(
         'bash',
         stdout=subprocess.PIPE,
@@ -725,16 +761,16 @@ def spawn(cmd_, out_to_screen=True, spinner=False, env=None, cmpl=False):
         env=env
     )
 
-    os.set_blocking(p.stdout.fileno(), False)
-    os.set_blocking(p.stderr.fileno(), False)
+    output_buffer = []
 
+    # the output gets read while the commands are written so a child that
+    # writes a lot before reading all of its input can't block on a full pipe
     proc_thread = threading.Thread(
         target=process_output,
-        args=(p, out_to_screen, spinner, cmpl, que)
+        args=(p, out_to_screen, spinner, cmpl, output_buffer)
     )
 
     proc_thread.start()
-    output_buffer = []
 
     while cmd_:
         item = cmd_.pop(0)
@@ -751,24 +787,7 @@ def spawn(cmd_, out_to_screen=True, spinner=False, env=None, cmpl=False):
         p.stdin.write(item.encode('utf-8') + b'\n')
 
     p.stdin.close()
-
-    while proc_thread and proc_thread.is_alive():  # wait for thread to finish
-        try:
-            line = que.get_nowait()  # or q.get(timeout=.1)
-            output_buffer.append(line)
-        except queue.Empty:
-            pass
-        try:
-            proc_thread.join(0.025)
-        except:  # NOQA
-            break
-
-    while True:
-        try:
-            line = que.get_nowait()  # or q.get(timeout=.1)
-            output_buffer.append(line)
-        except queue.Empty:
-            break
+    proc_thread.join()
 
     if not p.stdout.closed:
         p.stdout.close()
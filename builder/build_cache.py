@@ -0,0 +1,287 @@
+# Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+# Local cache of finished builds.
+#
+# The key is a sha256 of everything that goes into a build: the command line,
+# the TOML file, the driver files, the sources in this repo, the commits the
+# submodules are at and the versions of the toolchain. After a build the
+# firmware files that got copied into build/ and the generated lv_mpy.c are
+# stored under the key. When the same build gets run again they are put back
+# without running make.
+#
+#   python3 make.py esp32 BOARD=ESP32_GENERIC_S3 DISPLAY=st7796 --build-cache
+#
+# The cache lives in build_cache/ next to make.py unless a directory is given
+# with --build-cache=<path>.
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+
+CACHE_VERSION = 1
+
+# sources in this repo that end up in the firmware or drive the build
+SOURCE_PATHS = (
+    'api_drivers',
+    'builder',
+    'ext_mod',
+    'gen',
+    'micropy_updates',
+    'lib/lv_conf.h',
+    'make.py'
+)
+
+# micropy_updates/originals holds the backups the builder makes while it
+# patches micropython, it changes during every build
+SKIP_DIRS = ('__pycache__', '.git', 'originals')
+
+# files in the sources that the build writes. esp32_components.cmake gets
+# rewritten from the esp32 components and user C modules, make.py adds those
+# to the key instead.
+SKIP_FILES = ('esp32_components.cmake',)
+
+SUBMODULES = ('lib/micropython', 'lib/lvgl')
+
+# environment variables the build reads
+ENV_VARS = (
+    'LV_CFLAGS',
+    'LV_REUSE_CALLBACK_ARGS',
+    'LV_FLAT_METHOD_TABLES',
+    'FUSION',
+    'IDF_PATH',
+    'CC'
+)
+
+_gcc_arm = [['arm-none-eabi-gcc', '--version']]
+_gcc_host = [['cc', '--version']]
+
+TOOLCHAINS = {
+    'esp32': [['cmake', '--version']],
+    'unix': _gcc_host,
+    'macOS': _gcc_host,
+    'raspberry_pi': _gcc_host,
+    'windows': [],
+    'stm32': _gcc_arm,
+    'rp2': _gcc_arm + [['cmake', '--version']],
+    'nrf': _gcc_arm,
+    'renesas-ra': _gcc_arm,
+    'mimxrt': _gcc_arm,
+    'samd': _gcc_arm,
+}
+
+
+def _hash_file(h, path):
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+
+            h.update(chunk)
+
+
+def _hash_path(h, path):
+    if os.path.isfile(path):
+        h.update(path.encode('utf-8'))
+        _hash_file(h, path)
+        return
+
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+
+        for file in sorted(files):
+            if file.endswith('.pyc') or file in SKIP_FILES:
+                continue
+
+            file = os.path.join(root, file)
+            h.update(file.encode('utf-8'))
+            _hash_file(h, file)
+
+
+def _git_revision(path):
+    try:
+        result = subprocess.run(
+            ['git', '-C', path, 'rev-parse', 'HEAD'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+    except OSError:
+        return None
+
+    if result.returncode:
+        return None
+
+    return result.stdout.decode('utf-8').strip()
+
+
+def _tool_version(cmd):
+    try:
+        result = subprocess.run(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT
+        )
+    except OSError:
+        return 'not found'
+
+    return result.stdout.decode('utf-8', 'replace').split('\n', 1)[0].strip()
+
+
+def get_key(target, board, lv_cflags, build_args, toml_path, driver_paths):
+    """
+    Returns the cache key for a build or None when it can't be worked out.
+
+    build_args is the final argument list handed to the port, driver_paths
+    the DISPLAY/INDEV/EXPANDER/IMU values and any other files the build
+    reads (custom board, frozen manifest, esp32 user C modules).
+    """
+    h = hashlib.sha256()
+
+    config = dict(
+        version=CACHE_VERSION,
+        python=sys.version,
+        target=target,
+        board=board,
+        lv_cflags=lv_cflags,
+        build_args=list(build_args),
+        drivers=list(driver_paths),
+        env={key: os.environ.get(key, None) for key in ENV_VARS},
+        toolchain=[_tool_version(cmd) for cmd in TOOLCHAINS.get(target, [])]
+    )
+
+    for submodule in SUBMODULES:
+        revision = _git_revision(submodule)
+        if revision is None:
+            print(f'build cache: unable to get the revision of {submodule}')
+            return None
+
+        config[submodule] = revision
+
+    if target == 'esp32':
+        idf_path = os.environ.get('IDF_PATH', 'lib/esp-idf')
+        config['esp-idf'] = _git_revision(idf_path)
+
+    h.update(json.dumps(config, sort_keys=True).encode('utf-8'))
+
+    if toml_path is not None:
+        _hash_path(h, toml_path)
+
+    # a driver can be given by name or as a path to a file
+    for path in driver_paths:
+        if path and os.path.exists(path):
+            _hash_path(h, path)
+
+    for path in SOURCE_PATHS:
+        if os.path.exists(path):
+            _hash_path(h, path)
+
+    return h.hexdigest()
+
+
+class BuildCache(object):
+
+    def __init__(self, cache_dir, key):
+        self.cache_dir = cache_dir
+        self.key = key
+        self.entry_path = os.path.join(cache_dir, key)
+        self._start_time = None
+
+    def restore(self):
+        """
+        Puts the stored build files back. Returns False on a cache miss.
+        """
+        manifest_path = os.path.join(self.entry_path, 'manifest.json')
+        if not os.path.exists(manifest_path):
+            return False
+
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+        for name, dst in manifest['files'].items():
+            dst_path = os.path.split(dst)[0]
+            if dst_path and not os.path.exists(dst_path):
+                os.makedirs(dst_path)
+
+            shutil.copyfile(os.path.join(self.entry_path, name), dst)
+            print(f'restored {os.path.abspath(dst)}')
+
+        # keeps recently used entries at the front when looking at the
+        # directory sorted by time
+        os.utime(manifest_path)
+        return True
+
+    def start(self):
+        # anything written after this gets picked up by store
+        self._start_time = time.time() - 1
+
+    def _get_build_files(self):
+        files = []
+
+        for file in os.listdir('build'):
+            path = os.path.join('build', file)
+            if (
+                file.startswith('lvgl_micropy') and
+                os.path.isfile(path) and
+                os.path.getmtime(path) >= self._start_time
+            ):
+                files.append(path)
+
+        # the binding generator only replaces lv_mpy.c when it changed but it
+        # always writes a temporary file next to it, the directory it is in
+        # has been modified by this build.
+        ports_path = 'lib/micropython/ports'
+        for port in os.listdir(ports_path):
+            port_path = os.path.join(ports_path, port)
+            if not os.path.isdir(port_path):
+                continue
+
+            for build_dir in os.listdir(port_path):
+                build_path = os.path.join(port_path, build_dir)
+                if (
+                    not build_dir.startswith('build') or
+                    not os.path.isdir(build_path) or
+                    os.path.getmtime(build_path) < self._start_time
+                ):
+                    continue
+
+                for file in ('lv_mpy.c', 'lv_mp.c'):
+                    path = os.path.join(build_path, file)
+                    if os.path.exists(path):
+                        files.append(path)
+
+        return files
+
+    def store(self):
+        files = self._get_build_files()
+        if not any(
+            os.path.split(file)[-1].startswith('lvgl_micropy')
+            for file in files
+        ):
+            print('build cache: no firmware found in build/, nothing stored')
+            return
+
+        tmp_path = f'{self.entry_path}.{os.getpid()}.tmp'
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+
+        os.makedirs(tmp_path)
+
+        manifest = dict(key=self.key, files={})
+        for i, file in enumerate(files):
+            name = f'{i:02d}_{os.path.split(file)[-1]}'
+            shutil.copyfile(file, os.path.join(tmp_path, name))
+            manifest['files'][name] = file
+
+        with open(os.path.join(tmp_path, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=4)
+
+        if os.path.exists(self.entry_path):
+            shutil.rmtree(self.entry_path)
+
+        os.rename(tmp_path, self.entry_path)
+        print(f'build cache: stored {len(files)} file(s) as {self.key[:12]}')
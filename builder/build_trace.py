@@ -0,0 +1,285 @@
+# Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+# Timing of the build steps.
+#
+# make.py wraps the steps of a build (fetching submodules, patching
+# micropython, mpy-cross, generating the manifest, compiling) and every
+# command run with spawn. The binding generators add their own phases
+# (parsing the headers, emitting the C code, ...) when LV_BUILD_TRACE_DIR
+# is set in the environment they run in.
+#
+# When make.py exits the events are saved to build/build_trace.json in the
+# Chrome trace event format, open it with chrome://tracing or
+# https://ui.perfetto.dev. A summary ranked by the time spent in each step
+# itself (not counting the steps it ran) gets printed.
+
+import atexit
+import contextlib
+import functools
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+
+
+TRACE_DIR_ENV = 'LV_BUILD_TRACE_DIR'
+
+# the steps make.py runs in the builder modules. Not every module has all
+# of them.
+PHASES = (
+    'get_micropython',
+    'get_lvgl',
+    'get_pycparser',
+    'get_espidf',
+    'setup_idf_environ',
+    'parse_args',
+    'build_commands',
+    'force_clean',
+    'clean',
+    'mpy_cross',
+    'submodules',
+    'build_manifest',
+    'generate_manifest',
+    'build_sdkconfig',
+    'add_components',
+    'user_c_module',
+    'build_sdl',
+    'compile'
+)
+
+# the functions that change files in micropython before compiling
+PATCHES = (
+    'copy_micropy_updates',
+    'revert_files',
+    'revert_custom_board',
+    'set_mp_version'
+)
+
+
+def _is_patch(name):
+    return (
+        name in PATCHES or
+        name.startswith('update_') or
+        name.startswith('_update_')
+    )
+
+
+def _spawn_name(cmd):
+    if isinstance(cmd[0], str):
+        cmd = [cmd]
+
+    name = ' '.join(cmd[0])
+    if len(cmd) > 1:
+        name += f' (+{len(cmd) - 1})'
+
+    if len(name) > 60:
+        name = name[:57] + '...'
+
+    return name
+
+
+class BuildTrace(object):
+
+    def __init__(self, build_path):
+        self.build_path = build_path
+        self.trace_path = os.path.join(build_path, 'build_trace.json')
+        self.events = []
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._start_time = time.time()
+
+        # the binding generators run as child processes of make, they save
+        # their events in this directory
+        self.gen_path = os.path.join(build_path, 'trace')
+        if os.path.exists(self.gen_path):
+            shutil.rmtree(self.gen_path)
+
+        os.makedirs(self.gen_path)
+        os.environ[TRACE_DIR_ENV] = self.gen_path
+
+    def add(self, name, cat, start, duration, **args):
+        event = dict(
+            name=name,
+            cat=cat,
+            ph='X',
+            ts=int(start * 1000000),
+            dur=int(duration * 1000000),
+            pid=self._pid,
+            tid=threading.get_ident()
+        )
+        if args:
+            event['args'] = args
+
+        with self._lock:
+            self.events.append(event)
+
+    @contextlib.contextmanager
+    def phase(self, name, cat='phase', **args):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.add(name, cat, start, time.time() - start, **args)
+
+    def wrap(self, func, name=None, cat='phase'):
+        if getattr(func, '_build_trace', None) is self:
+            return func
+
+        if name is None:
+            name = func.__name__
+
+        @functools.wraps(func)
+        def _wrapper(*args, **kwargs):
+            with self.phase(name, cat):
+                return func(*args, **kwargs)
+
+        _wrapper._build_trace = self
+        return _wrapper
+
+    def _wrap_spawn(self, func):
+        if getattr(func, '_build_trace', None) is self:
+            return func
+
+        @functools.wraps(func)
+        def _wrapper(cmd_, *args, **kwargs):
+            start = time.time()
+            return_code = None
+            try:
+                return_code, output = func(cmd_, *args, **kwargs)
+                return return_code, output
+            finally:
+                self.add(
+                    _spawn_name(cmd_),
+                    'spawn',
+                    start,
+                    time.time() - start,
+                    return_code=return_code
+                )
+
+        _wrapper._build_trace = self
+        return _wrapper
+
+    def instrument(self, mod):
+        """
+        Replaces the build steps in a builder module with timed versions.
+        The module's own functions look them up in the module globals so the
+        steps they call get timed as well.
+        """
+        for name, value in list(vars(mod).items()):
+            if not callable(value) or isinstance(value, type):
+                continue
+
+            if name == 'spawn':
+                setattr(mod, name, self._wrap_spawn(value))
+            elif name in PHASES:
+                setattr(mod, name, self.wrap(value, name))
+            elif _is_patch(name):
+                setattr(mod, name, self.wrap(value, name.lstrip('_'), 'patch'))
+
+    def _load_gen_events(self):
+        events = []
+
+        for file in sorted(glob.glob(os.path.join(self.gen_path, 'gen_*.json'))):
+            try:
+                with open(file, 'r') as f:
+                    events.extend(json.load(f))
+            except (OSError, ValueError):
+                continue
+
+        return events
+
+    def save(self):
+        events = self.events + self._load_gen_events()
+        events.sort(key=lambda e: (e['ts'], -e['dur']))
+
+        with open(self.trace_path, 'w') as f:
+            json.dump(
+                dict(traceEvents=events, displayTimeUnit='ms'),
+                f,
+                indent=1
+            )
+
+        return events
+
+    @staticmethod
+    def _self_times(events):
+        # time spent in an event minus the time of the events inside of it,
+        # events nest per process and thread
+        groups = {}
+        for event in events:
+            groups.setdefault((event['pid'], event['tid']), []).append(event)
+
+        totals = {}
+        for group in groups.values():
+            group.sort(key=lambda e: (e['ts'], -e['dur']))
+            stack = []
+            self_times = []
+
+            for event in group:
+                end = event['ts'] + event['dur']
+                while stack and stack[-1][1] < end:
+                    stack.pop()
+
+                if stack:
+                    self_times[stack[-1][0]] -= event['dur']
+
+                stack.append((len(self_times), end))
+                self_times.append(event['dur'])
+
+            for event, self_time in zip(group, self_times):
+                key = (event['name'], event['cat'])
+                entry = totals.setdefault(key, [0, 0, 0])
+                entry[0] += max(self_time, 0)
+                entry[1] += event['dur']
+                entry[2] += 1
+
+        return totals
+
+    def report(self, top=20):
+        events = self.save()
+        if not events:
+            return
+
+        total = time.time() - self._start_time
+        totals = self._self_times(events)
+        ranked = sorted(totals.items(), key=lambda item: -item[1][0])
+
+        print()
+        print(
+            f'{"build step":<60} {"self":>6} {"%":>6} '
+            f'{"total":>6} {"calls":>6}  category'
+        )
+        for (name, cat), (self_time, duration, calls) in ranked[:top]:
+            print(
+                f'{name:<60} {self_time / 1000000:>6.1f} '
+                f'{self_time / 1000000 / total * 100:>6.1f} '
+                f'{duration / 1000000:>6.1f} {calls:>6}  {cat}'
+            )
+
+        # the top level steps of make.py run one after the other, the chain
+        # of them is the critical path of the build
+        phases = [
+            e for e in events
+            if e['pid'] == self._pid and e['cat'] != 'spawn'
+        ]
+        top_level = []
+        end = 0
+        for event in sorted(phases, key=lambda e: (e['ts'], -e['dur'])):
+            if event['ts'] >= end:
+                top_level.append(event)
+                end = event['ts'] + event['dur']
+
+        if top_level:
+            print()
+            print('critical path: ' + ' -> '.join(
+                f'{e["name"]} ({e["dur"] / 1000000:.1f}s)' for e in top_level
+            ))
+
+        print(f'total time {total:.1f}s, trace saved to {self.trace_path}')
+
+    def register(self):
+        # sys.exit gets called by the builders when a step fails, the report
+        # is still wanted then
+        atexit.register(self.report)
@@ -0,0 +1,753 @@
+# Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+# Host side compiler for the display initialization command streams.
+#
+# The `_<chip>_init*.py` modules are run once on the host against a tracing
+# display driver. Every `set_params` call and every `time.sleep*` call is
+# recorded and packed into a compact byte stream that gets frozen into the
+# firmware as a `bytes` object (which lives in flash and not in the heap).
+# At runtime `DisplayDriver.run_init_stream` replays the stream.
+#
+# Stream format (all values are little endian):
+#
+#   0x01 cmd:u16 len:u16 params[len]             send command
+#   0x02 cmd:u16 len:u16 params[len] delay:u16   send command then sleep (ms)
+#   0x03 delay:u16                               sleep (ms)
+#
+# Any driver attribute that the init module reads (color format, byte order,
+# data bus type, etc...) is stored in the generated module as CONFIG. The
+# runtime only uses the stream when all of those values match the live
+# driver, otherwise it falls back to running the python init module. Any
+# attribute the init module sets on the driver is stored as STATE so it can
+# be applied after the stream has been run.
+
+import os
+import sys
+import math
+import types
+import importlib.util
+
+from argparse import ArgumentParser
+
+
+OP_CMD = 0x01
+OP_CMD_DELAY = 0x02
+OP_DELAY = 0x03
+
+SCRIPT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+DISPLAY_PATH = os.path.join(
+    SCRIPT_DIR, 'api_drivers', 'common_api_drivers', 'display')
+FRAMEWORK_PATH = os.path.join(
+    SCRIPT_DIR, 'api_drivers', 'py_api_drivers', 'frozen', 'display')
+
+# values match the LVGL lv_color_format_t enumeration
+COLOR_FORMATS = {
+    'RAW': (0x01, 0),
+    'RAW_ALPHA': (0x02, 0),
+    'L8': (0x06, 1),
+    'I1': (0x07, 1),
+    'I2': (0x08, 1),
+    'I4': (0x09, 1),
+    'I8': (0x0A, 1),
+    'A8': (0x0E, 1),
+    'RGB888': (0x0F, 3),
+    'ARGB8888': (0x10, 4),
+    'XRGB8888': (0x11, 4),
+    'RGB565': (0x12, 2),
+    'RGB565A8': (0x14, 2),
+    'I420': (0x20, 1),
+    'I422': (0x21, 1),
+    'I444': (0x22, 1),
+    'I400': (0x23, 1),
+    'NV21': (0x24, 1),
+    'NV12': (0x25, 1),
+    'YUY2': (0x26, 2),
+    'UYVY': (0x27, 2),
+}
+
+BUS_TYPES = ('I80Bus', 'SPIBus', 'I2CBus', 'RGBBus', 'SDLBus', 'DSIBus')
+
+# the configuration the init modules get recorded against. Modules that
+# do not read any of these values produce a stream that is valid for all
+# configurations.
+CONFIG = {
+    'display_width': 320,
+    'display_height': 240,
+    'color_space': 'RGB565',
+    'color_byte_order': 0x00,
+    'rgb565_byte_swap': False,
+    'data_bus': 'SPIBus',
+    'lane_count': 1,
+    'cmd_bits': 8,
+    'param_bits': 8,
+}
+
+# scratch buffers, the content of these is not part of the configuration
+_SCRATCH = ('_param_buf', '_param_mv')
+
+_SIMPLE_TYPES = (int, bool, float, str, type(None))
+
+
+class NotStreamable(Exception):
+    pass
+
+
+class _Permissive:
+
+    def __init__(self, name):
+        self.__name = name
+
+    def __getattr__(self, item):
+        if item.startswith('__'):
+            raise AttributeError(item)
+
+        value = _Permissive(self.__name + '.' + item)
+        setattr(self, item, value)
+        return value
+
+    def __call__(self, *args, **kwargs):
+        raise NotStreamable(f'{self.__name}() is not available on the host')
+
+
+class _Recorder:
+
+    def __init__(self):
+        self.events = []
+        self.config = []
+        self.state = {}
+        self.tracing = False
+
+    def command(self, cmd, params):
+        if not isinstance(cmd, int) or not 0 <= cmd <= 0xFFFF:
+            raise NotStreamable(f'command {cmd!r} does not fit in 16 bits')
+
+        if params is None:
+            params = b''
+        else:
+            params = bytes(params)
+
+        if len(params) > 0xFFFF:
+            raise NotStreamable('parameters are too large')
+
+        self.events.append(('cmd', cmd, params))
+
+    def delay(self, ms):
+        ms = int(math.ceil(ms))
+        if ms <= 0:
+            return
+
+        if self.events and self.events[-1][0] == 'delay':
+            ms += self.events.pop()[1]
+
+        self.events.append(('delay', ms))
+
+    def read(self, name, value):
+        if not self.tracing or name in self.state or name in _SCRATCH:
+            return
+
+        if isinstance(value, _MockBus):
+            value = value.__class__.__name__
+        elif isinstance(value, list):
+            value = tuple(value)
+
+        if isinstance(value, tuple):
+            if not all(isinstance(v, _SIMPLE_TYPES) for v in value):
+                raise NotStreamable(f'unable to record "{name}"')
+        elif not isinstance(value, _SIMPLE_TYPES):
+            raise NotStreamable(f'unable to record "{name}"')
+
+        entry = (name, value)
+        if entry not in self.config:
+            self.config.append(entry)
+
+    def write(self, name, value):
+        if not self.tracing or name in _SCRATCH:
+            return
+
+        if not isinstance(value, _SIMPLE_TYPES):
+            raise NotStreamable(f'unable to store "{name}"')
+
+        self.state[name] = value
+
+
+class _MockDisplay:
+
+    def delete(self):
+        pass
+
+
+class _MockBus:
+    recorder = None
+
+    def __init__(self, lane_count=1):
+        self.lane_count = lane_count
+        self.transactions = []
+
+    def tx_param(self, cmd, params=None):
+        if self.recorder is not None and self.recorder.tracing:
+            raise NotStreamable('init module writes to the bus directly')
+
+        if params is None:
+            params = b''
+
+        self.transactions.append((cmd, bytes(params)))
+
+    def rx_param(self, cmd, params):
+        raise NotStreamable('init module reads from the display')
+
+    def get_lane_count(self):
+        if self.recorder is not None:
+            self.recorder.read('_data_bus.get_lane_count', self.lane_count)
+        return self.lane_count
+
+    def __getattr__(self, item):
+        if item.startswith('__'):
+            raise AttributeError(item)
+
+        raise NotStreamable(f'data bus attribute "{item}" is not available')
+
+
+def _make_time(recorder):
+    mod = types.ModuleType('time')
+
+    def sleep_ms(ms):
+        recorder.delay(ms)
+
+    def sleep_us(us):
+        recorder.delay(us / 1000.0)
+
+    def sleep(s):
+        recorder.delay(s * 1000.0)
+
+    def unsupported(*_, **__):
+        raise NotStreamable('init module depends on the system clock')
+
+    mod.sleep_ms = sleep_ms
+    mod.sleep_us = sleep_us
+    mod.sleep = sleep
+    mod.ticks_ms = unsupported
+    mod.ticks_us = unsupported
+    mod.ticks_diff = unsupported
+    mod.ticks_add = unsupported
+    return mod
+
+
+def _make_lvgl():
+    mod = _Permissive('lvgl')
+
+    color_format = _Permissive('lvgl.COLOR_FORMAT')
+    sizes = {}
+    for name, (value, size) in COLOR_FORMATS.items():
+        setattr(color_format, name, value)
+        sizes[value] = size
+
+    def color_format_get_size(color_space):
+        return sizes[color_space]
+
+    rotation = _Permissive('lvgl.DISPLAY_ROTATION')
+    for i, name in enumerate(('_0', '_90', '_180', '_270')):
+        setattr(rotation, name, i)
+
+    mod.COLOR_FORMAT = color_format
+    mod.DISPLAY_ROTATION = rotation
+    mod.color_format_get_size = color_format_get_size
+    mod.is_initialized = lambda: True
+    return mod
+
+
+def _make_micropython():
+    mod = types.ModuleType('micropython')
+    mod.const = lambda value: value
+    mod.native = lambda func: func
+    mod.viper = lambda func: func
+    mod.schedule = lambda func, arg: func(arg)
+    return mod
+
+
+def _make_lcd_bus():
+    mod = _Permissive('lcd_bus')
+    for name in BUS_TYPES:
+        setattr(mod, name, type(name, (_MockBus,), {}))
+
+    for i, name in enumerate((
+        'MEMORY_32BIT', 'MEMORY_8BIT', 'MEMORY_DMA',
+        'MEMORY_SPIRAM', 'MEMORY_INTERNAL', 'MEMORY_DEFAULT'
+    )):
+        setattr(mod, name, 1 << i)
+    return mod
+
+
+class _Environment:
+    """
+    Loads the display framework, a driver and its init module using mock
+    versions of the MicroPython only modules.
+    """
+
+    def __init__(self):
+        self.recorder = _Recorder()
+        self.lcd_bus = _make_lcd_bus()
+        self.modules = {
+            'time': _make_time(self.recorder),
+            'lvgl': _make_lvgl(),
+            'micropython': _make_micropython(),
+            'lcd_bus': self.lcd_bus,
+            'machine': _Permissive('machine'),
+            'io_expander_framework': _Permissive('io_expander_framework'),
+        }
+
+        _MockBus.recorder = self.recorder
+
+        self.load(os.path.join(FRAMEWORK_PATH, 'display_driver_framework.py'))
+        self.load(os.path.join(FRAMEWORK_PATH, 'rgb_display_framework.py'))
+
+    def load(self, path, name=None):
+        if name is None:
+            name = os.path.splitext(os.path.split(path)[-1])[0]
+
+        # sibling modules of the driver (ra8876 for the lt768x as an example)
+        # get imported from the driver directory using the mock modules.
+        existing = set(sys.modules.keys())
+        saved = {key: sys.modules.get(key) for key in self.modules}
+        sys.modules.update(self.modules)
+        sys.path.insert(0, os.path.dirname(path))
+        try:
+            spec = importlib.util.spec_from_file_location(name, path)
+            mod = importlib.util.module_from_spec(spec)
+            sys.modules[name] = mod
+            spec.loader.exec_module(mod)
+        finally:
+            sys.path.remove(os.path.dirname(path))
+            for key in set(sys.modules.keys()) - existing:
+                sys.modules.pop(key, None)
+
+            for key, value in saved.items():
+                if value is None:
+                    sys.modules.pop(key, None)
+                else:
+                    sys.modules[key] = value
+
+        self.modules[name] = mod
+        return mod
+
+    def driver_class(self, init_path):
+        directory, file_name = os.path.split(init_path)
+        chip = file_name[1:].split('_', 1)[0]
+
+        driver_path = os.path.join(directory, chip + '.py')
+        if not os.path.exists(driver_path):
+            raise NotStreamable(f'unable to locate driver "{driver_path}"')
+
+        driver_mod = self.load(driver_path)
+
+        for value in driver_mod.__dict__.values():
+            if isinstance(value, type) and value.__name__.lower() == chip:
+                return value
+
+        raise NotStreamable(f'unable to locate driver class in "{driver_path}"')
+
+    def make_driver(self, cls, config, tracing):
+        recorder = self.recorder
+
+        class Driver(cls):
+
+            def __getattribute__(self, name):
+                value = object.__getattribute__(self, name)
+                if not name.startswith('__') and not callable(value):
+                    recorder.read(name, value)
+                return value
+
+            def __setattr__(self, name, value):
+                recorder.write(name, value)
+                object.__setattr__(self, name, value)
+
+        if tracing:
+            Driver.set_params = lambda self, cmd, params=None: recorder.command(cmd, params)
+
+        Driver.__name__ = cls.__name__
+
+        color_space = COLOR_FORMATS[config['color_space']][0]
+        bus = getattr(self.lcd_bus, config['data_bus'])(config['lane_count'])
+
+        drv = object.__new__(Driver)
+        attrs = dict(
+            display_width=config['display_width'],
+            display_height=config['display_height'],
+            _physical_width=config['display_width'],
+            _physical_height=config['display_height'],
+            _color_space=color_space,
+            _color_byte_order=config['color_byte_order'],
+            _rgb565_byte_swap=config['rgb565_byte_swap'],
+            _cmd_bits=config['cmd_bits'],
+            _param_bits=config['param_bits'],
+            _offset_x=0,
+            _offset_y=0,
+            _rotation=0,
+            _reset_pin=None,
+            _reset_state=1,
+            _power_pin=None,
+            _power_on_state=1,
+            _backlight_pin=None,
+            _backlight_on_state=1,
+            _initilized=False,
+            _data_bus=bus,
+            _disp_drv=_MockDisplay(),
+            _init_disp_bus=True,
+            _spi_3wire=None,
+            _bus_shared_pins=False,
+            _param_buf=bytearray(4),
+        )
+        attrs['_param_mv'] = memoryview(attrs['_param_buf'])
+
+        for name, value in attrs.items():
+            object.__setattr__(drv, name, value)
+
+        return drv
+
+
+def record(init_path, config=None):
+    """
+    Runs an init module against a tracing driver.
+
+    Returns a tuple of (events, config, state).
+    """
+    cfg = dict(CONFIG)
+    if config:
+        cfg.update(config)
+
+    env = _Environment()
+    cls = env.driver_class(init_path)
+    init_mod = env.load(init_path)
+    drv = env.make_driver(cls, cfg, True)
+
+    recorder = env.recorder
+    recorder.tracing = True
+    try:
+        init_mod.init(drv)
+    finally:
+        recorder.tracing = False
+
+    return recorder.events, recorder.config, recorder.state
+
+
+def encode(events):
+    stream = bytearray()
+    events = list(events)
+
+    while events:
+        event = events.pop(0)
+
+        if event[0] == 'delay':
+            ms = event[1]
+            while ms > 0:
+                chunk = min(ms, 0xFFFF)
+                stream.append(OP_DELAY)
+                stream.extend(chunk.to_bytes(2, 'little'))
+                ms -= chunk
+            continue
+
+        _, cmd, params = event
+
+        if events and events[0][0] == 'delay' and events[0][1] <= 0xFFFF:
+            delay = events.pop(0)[1]
+            stream.append(OP_CMD_DELAY)
+        else:
+            delay = None
+            stream.append(OP_CMD)
+
+        stream.extend(cmd.to_bytes(2, 'little'))
+        stream.extend(len(params).to_bytes(2, 'little'))
+        stream.extend(params)
+
+        if delay is not None:
+            stream.extend(delay.to_bytes(2, 'little'))
+
+    return bytes(stream)
+
+
+def decode(stream):
+    events = []
+    i = 0
+    end = len(stream)
+
+    while i < end:
+        op = stream[i]
+
+        if op == OP_DELAY:
+            events.append(('delay', int.from_bytes(stream[i + 1:i + 3], 'little')))
+            i += 3
+            continue
+
+        if op not in (OP_CMD, OP_CMD_DELAY):
+            raise ValueError(f'invalid opcode 0x{op:02X} at offset {i}')
+
+        cmd = int.from_bytes(stream[i + 1:i + 3], 'little')
+        length = int.from_bytes(stream[i + 3:i + 5], 'little')
+        i += 5
+        events.append(('cmd', cmd, bytes(stream[i:i + length])))
+        i += length
+
+        if op == OP_CMD_DELAY:
+            events.append(('delay', int.from_bytes(stream[i:i + 2], 'little')))
+            i += 2
+
+    return events
+
+
+def _split_records(stream):
+    i = 0
+    end = len(stream)
+    while i < end:
+        start = i
+        op = stream[i]
+        if op == OP_DELAY:
+            i += 3
+        else:
+            i += 5 + int.from_bytes(stream[i + 3:i + 5], 'little')
+            if op == OP_CMD_DELAY:
+                i += 2
+
+        yield stream[start:i]
+
+
+def generate_module(init_path, stream, config, state):
+    file_name = os.path.split(init_path)[-1]
+
+    output = [
+        '# Copyright (c) 2024 - 2025 Kevin G. Schlosser',
+        '',
+        f'# Generated by builder/init_stream.py from {file_name}',
+        '# DO NOT EDIT. Regenerate it from the init module instead.',
+        '',
+        'CONFIG = (',
+    ]
+
+    for name, value in config:
+        output.append(f'    ({name!r}, {value!r}),')
+
+    output.extend([')', '', 'STATE = ('])
+
+    for name, value in state.items():
+        output.append(f'    ({name!r}, {value!r}),')
+
+    output.extend([')', '', 'STREAM = ('])
+
+    for record_ in _split_records(stream):
+        output.append(f'    {bytes(record_)!r}')
+
+    if not stream:
+        output.append("    b''")
+
+    output.extend([')', ''])
+    return '\n'.join(output)
+
+
+def compile_module(init_path, output_path, config=None):
+    events, cfg, state = record(init_path, config)
+    stream = encode(events)
+
+    with open(output_path, 'w') as f:
+        f.write(generate_module(init_path, stream, cfg, state))
+
+    return stream, cfg, state
+
+
+def _run_through_bus(env, cls, config, func):
+    drv = env.make_driver(cls, config, False)
+    delays = []
+
+    time_mod = env.modules['time']
+    saved = time_mod.sleep_ms, time_mod.sleep_us, time_mod.sleep
+    time_mod.sleep_ms = lambda ms: delays.append(int(math.ceil(ms)))
+    time_mod.sleep_us = lambda us: delays.append(int(math.ceil(us / 1000.0)))
+    time_mod.sleep = lambda s: delays.append(int(math.ceil(s * 1000.0)))
+
+    try:
+        func(drv)
+    finally:
+        time_mod.sleep_ms, time_mod.sleep_us, time_mod.sleep = saved
+
+    state = {
+        name: getattr(drv, name) for name in drv.__dict__
+        if name not in _SCRATCH and name not in ('_data_bus', '_disp_drv')
+    }
+    return drv._data_bus.transactions, sum(delays), state
+
+
+def verify(init_path, config=None):
+    """
+    Runs the python init module and the compiled stream through a mock
+    lcd_bus and compares the bytes that get sent to the display.
+    """
+    cfg = dict(CONFIG)
+    if config:
+        cfg.update(config)
+
+    events, config_values, state = record(init_path, cfg)
+    stream = encode(events)
+
+    if decode(stream) != events:
+        raise AssertionError('stream does not round trip')
+
+    env = _Environment()
+    cls = env.driver_class(init_path)
+    init_mod = env.load(init_path)
+
+    def run_stream(drv):
+        if not drv._init_stream_matches(config_values):  # NOQA
+            raise AssertionError('recorded configuration does not match')
+
+        drv.run_init_stream(stream)
+        for name, value in state.items():
+            setattr(drv, name, value)
+
+    expected = _run_through_bus(env, cls, cfg, init_mod.init)
+    actual = _run_through_bus(env, cls, cfg, run_stream)
+
+    if expected[0] != actual[0]:
+        for i, (exp, act) in enumerate(zip(expected[0], actual[0])):
+            if exp != act:
+                raise AssertionError(
+                    f'transaction {i} differs: expected {exp!r}, got {act!r}')
+
+        raise AssertionError(
+            f'expected {len(expected[0])} transactions, '
+            f'got {len(actual[0])}'
+        )
+
+    if expected[1] > actual[1]:
+        raise AssertionError(
+            f'stream delays ({actual[1]}ms) are shorter than '
+            f'the init module ({expected[1]}ms)'
+        )
+
+    if expected[2] != actual[2]:
+        raise AssertionError('driver state differs after init')
+
+    return len(expected[0]), len(stream)
+
+
+def is_init_module(file_name):
+    if not file_name.startswith('_') or not file_name.endswith('.py'):
+        return False
+
+    name = file_name[:-3]
+    return '_init' in name or '_type' in name
+
+
+def compile_display(display_path, output_path, config=None):
+    """
+    Compiles every init module of a display driver directory.
+
+    Returns a list of the stream modules that were written. Init modules
+    that are unable to be compiled are skipped and the driver will use the
+    python init module at runtime.
+    """
+    if not os.path.exists(output_path):
+        os.makedirs(output_path)
+
+    generated = []
+
+    for file_name in sorted(os.listdir(display_path)):
+        if not is_init_module(file_name):
+            continue
+
+        init_path = os.path.join(display_path, file_name)
+        out_file = os.path.join(output_path, file_name[:-3] + '_stream.py')
+
+        try:
+            compile_module(init_path, out_file, config)
+        except Exception as err:  # NOQA
+            print(f'init stream skipped for {file_name}: {err}')
+            if os.path.exists(out_file):
+                os.remove(out_file)
+            continue
+
+        generated.append(out_file)
+
+    return generated
+
+
+def parse_config(items):
+    config = {}
+    for item in items:
+        key, value = item.split('=', 1)
+        if key not in CONFIG:
+            raise RuntimeError(f'unknown configuration key "{key}"')
+
+        if isinstance(CONFIG[key], bool):
+            value = value.lower() in ('1', 'true', 'yes')
+        elif isinstance(CONFIG[key], int):
+            value = int(value, 0)
+
+        config[key] = value
+
+    return config
+
+
+def main(argv=None):
+    parser = ArgumentParser(
+        description='display init module <-> init stream tool')
+    parser.add_argument(
+        'command',
+        choices=['compile', 'verify', 'dump', 'display'],
+        help=(
+            'compile: write the stream module for an init module. '
+            'verify: check the stream is byte identical to the init module. '
+            'dump: print the records of a stream module. '
+            'display: compile all init modules of a display driver.'
+        )
+    )
+    parser.add_argument('path', help='init module, stream module or display')
+    parser.add_argument(
+        '-o', '--output', dest='output', default=None, action='store')
+    parser.add_argument(
+        '-c', '--config',
+        dest='config',
+        default=[],
+        action='append',
+        help='configuration override, KEY=VALUE (keys: ' + ', '.join(CONFIG) + ')'
+    )
+
+    args = parser.parse_args(argv)
+    config = parse_config(args.config)
+    path = os.path.abspath(args.path)
+
+    if args.command == 'display':
+        if not os.path.isdir(path):
+            path = os.path.join(DISPLAY_PATH, args.path.lower())
+
+        output = args.output or os.path.join(SCRIPT_DIR, 'build', 'init_streams')
+        for file in compile_display(path, output, config):
+            print(file)
+
+    elif args.command == 'compile':
+        output = args.output
+        if output is None:
+            output = os.path.splitext(path)[0] + '_stream.py'
+
+        stream, cfg, state = compile_module(path, output, config)
+        print(f'{output}: {len(stream)} bytes')
+        for name, value in cfg:
+            print(f'  requires {name} == {value!r}')
+        for name, value in state.items():
+            print(f'  sets {name} = {value!r}')
+
+    elif args.command == 'verify':
+        count, size = verify(path, config)
+        print(f'OK: {count} transactions, {size} bytes')
+
+    else:
+        namespace = {}
+        with open(path, 'r') as f:
+            exec(f.read(), namespace)  # NOQA
+
+        for event in decode(namespace['STREAM']):
+            if event[0] == 'delay':
+                print(f'delay {event[1]}ms')
+            else:
+                params = ' '.join(f'{b:02X}' for b in event[2])
+                print(f'0x{event[1]:04X} [{len(event[2])}] {params}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+# Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+# Builds several boards at the same time.
+#
+#   python3 make.py matrix --jobs=3 board1.toml board2.toml \
+#       "esp32 BOARD=ESP32_GENERIC_S3 DISPLAY=st7796 INDEV=gt911"
+#
+# A job is either a TOML file or the arguments that would be given to make.py
+# in quotes. --file=<path> reads the jobs from a file, one per line.
+#
+# The builders patch the files of the port they compile for and keep backups
+# in micropy_updates/originals so two builds can't share a tree. Every job
+# gets a directory in build/matrix that is an overlay of this repo: everything
+# is a symlink to the real thing except for build/, micropy_updates/,
+# ext_mod/esp32_components.cmake and the directory of the port being compiled
+# in lib/micropython/ports, those are copies. The job directories are kept so
+# the next run is an incremental build. The output of each job goes to
+# build.log in its directory.
+#
+# Paths given to a job are relative to the root of the job directory which
+# has the same layout as this repo. Fetching submodules is not safe to do
+# from more than one job at a time, build every port once the normal way
+# before using this.
+
+import hashlib
+import os
+import re
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+
+
+TARGETS = (
+    'esp32', 'windows', 'stm32', 'unix', 'rp2',
+    'renesas-ra', 'nrf', 'mimxrt', 'samd', 'macOS', 'raspberry_pi'
+)
+
+# targets that are compiled in another port's directory
+PORTS = {
+    'macOS': 'unix',
+    'raspberry_pi': 'unix'
+}
+
+_print_lock = threading.Lock()
+
+
+class Job(object):
+
+    def __init__(self, spec, script_dir):
+        self.spec = spec
+
+        if spec.endswith('.toml'):
+            self.args = [f'--toml={os.path.abspath(spec)}']
+            self.target = self._get_toml_target(spec)
+        else:
+            self.args = shlex.split(spec)
+            for arg in self.args:
+                if arg in TARGETS:
+                    self.target = arg
+                    break
+            else:
+                raise RuntimeError(f'no build target in job "{spec}"')
+
+        self.port = PORTS.get(self.target, self.target)
+
+        name = re.sub(r'[^A-Za-z0-9_.-]+', '_', os.path.split(spec)[-1])[:40]
+        spec_hash = hashlib.sha1(spec.encode('utf-8')).hexdigest()[:8]
+        self.path = os.path.join(
+            script_dir, 'build', 'matrix', f'{name}_{spec_hash}')
+        self.log_path = os.path.join(self.path, 'build.log')
+
+        self.return_code = None
+        self.duration = 0.0
+        self.firmware = []
+
+    @staticmethod
+    def _get_toml_target(toml_path):
+        import toml
+
+        with open(toml_path, 'r') as f:
+            mcu = toml.load(f).get('MCU', {})
+
+        for target in mcu.keys():
+            return target
+
+        raise RuntimeError(f'{toml_path} has no [MCU.<target>] section')
+
+    def run(self):
+        cmd = [sys.executable, os.path.join(self.path, 'make.py')] + self.args
+
+        with _print_lock:
+            print(f'started  {self.spec}')
+
+        start = time.time()
+        with open(self.log_path, 'w') as log:
+            self.return_code = subprocess.call(
+                cmd,
+                cwd=self.path,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.DEVNULL
+            )
+        self.duration = time.time() - start
+
+        build_path = os.path.join(self.path, 'build')
+        for file in sorted(os.listdir(build_path)):
+            file = os.path.join(build_path, file)
+            if (
+                os.path.split(file)[-1].startswith('lvgl_micropy') and
+                os.path.getmtime(file) >= start
+            ):
+                self.firmware.append(file)
+
+        with _print_lock:
+            result = 'finished' if self.return_code == 0 else 'FAILED  '
+            print(f'{result} {self.spec} ({self.duration:.1f}s)')
+
+        return self
+
+
+def _ignore_build_dirs(_, names):
+    return [
+        name for name in names
+        if name.startswith('build') or name == '__pycache__'
+    ]
+
+
+def _overlay(src_path, dst_path, copies):
+    """
+    Fills dst_path with a symlink for every entry in src_path. The entries in
+    copies get copied instead, a dict value means the entry is a directory
+    that gets overlaid the same way and None an empty directory.
+    """
+    if not os.path.exists(dst_path):
+        os.makedirs(dst_path)
+
+    for name in os.listdir(src_path):
+        src = os.path.join(src_path, name)
+        dst = os.path.join(dst_path, name)
+
+        if name in copies:
+            # an entry that was a symlink in an earlier run would get
+            # written through to this repo
+            if os.path.islink(dst):
+                os.remove(dst)
+
+            if copies[name] is None:
+                if not os.path.exists(dst):
+                    os.mkdir(dst)
+            elif isinstance(copies[name], dict):
+                _overlay(src, dst, copies[name])
+            elif os.path.isdir(src):
+                # copy2 keeps the timestamps so make doesn't rebuild files
+                # that didn't change since the last run
+                shutil.copytree(
+                    src, dst,
+                    symlinks=True,
+                    ignore=_ignore_build_dirs,
+                    dirs_exist_ok=True
+                )
+            else:
+                shutil.copy2(src, dst)
+
+        elif not os.path.lexists(dst):
+            os.symlink(src, dst)
+
+
+def prepare_job(job, script_dir):
+    _overlay(
+        script_dir,
+        job.path,
+        {
+            'build': None,
+            'micropy_updates': True,
+            # the esp32 builder writes the components of the board into it
+            'ext_mod': {'esp32_components.cmake': True},
+            'lib': {
+                'micropython': {
+                    'ports': {job.port: True}
+                }
+            }
+        }
+    )
+
+    build_path = os.path.join(job.path, 'build')
+    if not os.path.exists(build_path):
+        os.mkdir(build_path)
+
+    # the backups of the last run were reverted, they belong to the copy
+    # of the port that just got replaced
+    originals = os.path.join(job.path, 'micropy_updates', 'originals')
+    if os.path.exists(originals):
+        shutil.rmtree(originals)
+
+    os.makedirs(originals)
+
+
+def print_summary(jobs):
+    rows = [('job', 'result', 'time', 'firmware', 'size')]
+
+    for job in jobs:
+        if job.return_code is None:
+            result = 'not run'
+        elif job.return_code:
+            result = f'failed ({job.return_code})'
+        else:
+            result = 'ok'
+
+        firmware = job.firmware or [None]
+        for i, file in enumerate(firmware):
+            rows.append((
+                job.spec if i == 0 else '',
+                result if i == 0 else '',
+                f'{job.duration:.1f}s' if i == 0 else '',
+                os.path.relpath(file) if file else '',
+                f'{os.path.getsize(file):,}' if file else ''
+            ))
+
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+
+    print()
+    for i, row in enumerate(rows):
+        print('  '.join(
+            cell.rjust(width) if col == 4 else cell.ljust(width)
+            for col, (cell, width) in enumerate(zip(row, widths))
+        ).rstrip())
+
+        if i == 0:
+            print('  '.join('-' * width for width in widths))
+
+    failed = [job for job in jobs if job.return_code]
+    if failed:
+        print()
+        for job in failed:
+            print(f'{job.spec}: see {os.path.relpath(job.log_path)}')
+
+
+def run(script_dir, argv):
+    parser = ArgumentParser(prog='make.py matrix')
+    parser.add_argument(
+        '-j', '--jobs',
+        dest='jobs',
+        help='number of boards to build at the same time',
+        type=int,
+        default=2
+    )
+    parser.add_argument(
+        '--file',
+        dest='files',
+        help='file with a job per line',
+        action='append',
+        default=[]
+    )
+    parser.add_argument(
+        'specs',
+        help='TOML file or the make.py arguments for a board in quotes',
+        nargs='*'
+    )
+    args = parser.parse_args(argv)
+
+    specs = args.specs[:]
+    for file in args.files:
+        with open(file, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    specs.append(line)
+
+    if not specs:
+        parser.error('no jobs given')
+
+    if not os.path.exists(os.path.join(script_dir, 'lib/micropython/ports')):
+        raise RuntimeError(
+            'lib/micropython is missing, run a normal build first'
+        )
+
+    jobs = [Job(spec, script_dir) for spec in specs]
+
+    print(f'preparing {len(jobs)} job directories....')
+    for job in jobs:
+        prepare_job(job, script_dir)
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        list(executor.map(Job.run, jobs))
+
+    print_summary(jobs)
+    print()
+    print(f'total time {time.time() - start:.1f}s')
+
+    return 1 if any(job.return_code for job in jobs) else 0
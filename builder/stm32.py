@@ -138,6 +138,11 @@ def compile(*args):  # NOQA
         if f.startswith('lvgl'):
             continue
 
+        # make.py keeps its generated files (init streams, ...) in
+        # directories in here
+        if os.path.isdir(os.path.join('build', f)):
+            continue
+
         os.remove(os.path.join('build', f))
 
     if board_variant:
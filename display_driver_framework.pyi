@@ -36,6 +36,9 @@ class DisplayDriver:
 
     _displays: ClassVar[list[_DatabusType]] = ...
 
+    # prints whether init() used the precompiled init stream
+    debug: ClassVar[bool] = ...
+
     display_width: int = ...
     display_height: int = ...
     _reset_pin: Optional[_PinType] = ...
@@ -244,6 +247,17 @@ class DisplayDriver:
     def init(self) -> None:
         ...
 
+    def _run_init_module(self, mod_name: str) -> None:
+        ...
+
+    def _init_stream_matches(self, config: Tuple[Tuple[str, Any], ...]) -> bool:
+        ...
+
+    # runs a command stream that was precompiled from an init module
+    # by builder/init_stream.py
+    def run_init_stream(self, stream: Union[bytes, bytearray, memoryview]) -> None:
+        ...
+
     def set_params(self, cmd: int, params: Optional[_BufferType] = None) -> None:
         ...
 
@@ -274,6 +288,15 @@ class DisplayDriver:
     def _dummy_set_memory_location(self, *_, **__) -> int:  # NOQA
         ...
 
+    # caches the color size and the bus tx_color method used by the flush
+    # function. Called when the color format, offsets or rotation change.
+    def _update_flush_plan(self) -> None:
+        ...
+
+    # forces the next flush to send both the column and page addresses.
+    def _invalidate_window(self) -> None:
+        ...
+
     # this function is handeled in the viper code emitter. This will
     # increase the performance to near C code execution times. While this is
     # not really heavy lifting in terms of work being done every cycle counts
@@ -285,6 +308,31 @@ class DisplayDriver:
     def _flush_cb(self, disp: lv.display_driver_t, area: lv.area_t, color_p: lv.CArray) -> None:  # NOQA
         ...
 
+    # Small areas (max_area pixels or less) are copied into a staging buffer
+    # and vertically adjacent areas of the same width are merged so they
+    # get sent using a single CASET/RASET window. 0 turns it off.
+    def set_flush_coalescing(self, max_area: int, buffer_size: Optional[int] = None) -> None:
+        ...
+
+    # (areas received from LVGL, color transactions sent to the bus)
+    def get_flush_stats(self) -> Tuple[int, int]:
+        ...
+
+    def reset_flush_stats(self) -> None:
+        ...
+
+    def _send_pending(self, last: bool) -> None:
+        ...
+
+    def _start_pending(self, data_view: memoryview, x1: int, y1: int, x2: int, y2: int, size: int) -> bool:
+        ...
+
+    def _coalesce_flush_cb(self, disp: lv.display_driver_t, area: lv.area_t, color_p: lv.CArray) -> None:  # NOQA
+        ...
+
+    def _coalesce_flush_ready_cb(self, *param) -> None:
+        ...
+
     # we always register this callback no matter what. This is what tells LVGL
     # that the buffer is able to be written to. If this callback doesn't get
     # registered then the flush function is going to block until the buffer
@@ -0,0 +1,306 @@
+// Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+// Display bus that doesn't have a display. The flushed areas get copied into
+// a frame buffer in memory and the bus keeps count of the flushes and bytes
+// sent. Used for rendering benchmarks and screenshot comparisons on machines
+// that have no display server.
+
+// local includes
+#include "lcd_types.h"
+#include "modlcd_bus.h"
+#include "headless_bus.h"
+
+// micropython includes
+#include "py/obj.h"
+#include "py/runtime.h"
+#include "py/objarray.h"
+#include "py/binary.h"
+
+// stdlib includes
+#include <string.h>
+
+#ifdef MP_PORT_UNIX
+
+    #define FNV_OFFSET_BASIS  0x811C9DC5
+    #define FNV_PRIME         0x01000193
+
+    mp_lcd_err_t headless_tx_param(mp_obj_t obj, int lcd_cmd, void *param, size_t param_size);
+    mp_lcd_err_t headless_rx_param(mp_obj_t obj, int lcd_cmd, void *param, size_t param_size);
+    mp_lcd_err_t headless_tx_color(mp_obj_t obj, int lcd_cmd, void *color, size_t color_size, int x_start, int y_start, int x_end, int y_end, uint8_t rotation, bool last_update);
+    mp_lcd_err_t headless_del(mp_obj_t obj);
+    mp_lcd_err_t headless_init(mp_obj_t obj, uint16_t width, uint16_t height, uint8_t bpp, uint32_t buffer_size, bool rgb565_byte_swap, uint8_t cmd_bits, uint8_t param_bits);
+    mp_lcd_err_t headless_get_lane_count(mp_obj_t obj, uint8_t *lane_count);
+
+
+    static uint32_t headless_checksum(mp_lcd_headless_bus_obj_t *self)
+    {
+        // FNV-1a
+        uint32_t hash = FNV_OFFSET_BASIS;
+
+        for (size_t i = 0; i < self->fb_size; i++) {
+            hash ^= self->fb[i];
+            hash *= FNV_PRIME;
+        }
+
+        return hash;
+    }
+
+
+    static mp_obj_t mp_lcd_headless_bus_make_new(const mp_obj_type_t *type, size_t n_args, size_t n_kw, const mp_obj_t *all_args)
+    {
+        enum { ARG_checksum };
+        const mp_arg_t make_new_args[] = {{ MP_QSTR_checksum, MP_ARG_BOOL | MP_ARG_KW_ONLY, { .u_bool = false } } };
+
+        mp_arg_val_t args[MP_ARRAY_SIZE(make_new_args)];
+        mp_arg_parse_all_kw_array(
+            n_args,
+            n_kw,
+            all_args,
+            MP_ARRAY_SIZE(make_new_args),
+            make_new_args,
+            args
+        );
+
+        // create new object
+        mp_lcd_headless_bus_obj_t *self = m_new_obj(mp_lcd_headless_bus_obj_t);
+        memset(self, 0, sizeof(mp_lcd_headless_bus_obj_t));
+
+        self->base.type = &mp_lcd_headless_bus_type;
+
+        self->callback = mp_const_none;
+        self->frame_checksum = (bool)args[ARG_checksum].u_bool;
+
+        self->panel_io_handle.del = headless_del;
+        self->panel_io_handle.init = headless_init;
+        self->panel_io_handle.tx_param = headless_tx_param;
+        self->panel_io_handle.rx_param = headless_rx_param;
+        self->panel_io_handle.tx_color = headless_tx_color;
+        self->panel_io_handle.get_lane_count = headless_get_lane_count;
+
+        return MP_OBJ_FROM_PTR(self);
+    }
+
+
+    mp_lcd_err_t headless_rx_param(mp_obj_t obj, int lcd_cmd, void *param, size_t param_size)
+    {
+        LCD_UNUSED(obj);
+        LCD_UNUSED(lcd_cmd);
+        LCD_UNUSED(param);
+        LCD_UNUSED(param_size);
+        return LCD_OK;
+    }
+
+
+    mp_lcd_err_t headless_tx_param(mp_obj_t obj, int lcd_cmd, void *param, size_t param_size)
+    {
+        LCD_UNUSED(lcd_cmd);
+        LCD_UNUSED(param);
+        LCD_UNUSED(param_size);
+
+        mp_lcd_headless_bus_obj_t *self = MP_OBJ_TO_PTR(obj);
+        self->param_count++;
+
+        return LCD_OK;
+    }
+
+
+    mp_lcd_err_t headless_tx_color(mp_obj_t obj, int lcd_cmd, void *color, size_t color_size, int x_start, int y_start, int x_end, int y_end, uint8_t rotation, bool last_update)
+    {
+        LCD_UNUSED(lcd_cmd);
+        LCD_UNUSED(rotation);
+
+        mp_lcd_headless_bus_obj_t *self = MP_OBJ_TO_PTR(obj);
+
+        if (self->fb == NULL) return LCD_ERR_INVALID_STATE;
+
+        uint8_t bytes_per_pixel = self->bytes_per_pixel;
+        size_t src_pitch = (size_t)(x_end - x_start + 1) * bytes_per_pixel;
+        size_t dst_pitch = (size_t)self->width * bytes_per_pixel;
+
+        // areas that are partly off of the display get clipped
+        int x1 = x_start < 0 ? 0 : x_start;
+        int x2 = x_end >= (int)self->width ? (int)self->width - 1 : x_end;
+        int y1 = y_start < 0 ? 0 : y_start;
+        int y2 = y_end >= (int)self->height ? (int)self->height - 1 : y_end;
+
+        if (x1 <= x2 && src_pitch > 0) {
+            size_t row_size = (size_t)(x2 - x1 + 1) * bytes_per_pixel;
+            uint8_t *src = (uint8_t *)color + (size_t)(x1 - x_start) * bytes_per_pixel;
+            uint8_t *dst = self->fb + (size_t)x1 * bytes_per_pixel;
+
+            for (int y = y1; y <= y2; y++) {
+                size_t src_offset = (size_t)(y - y_start) * src_pitch;
+                if (src_offset + row_size > color_size) break;
+
+                memcpy(dst + (size_t)y * dst_pitch, src + src_offset, row_size);
+            }
+        }
+
+        self->flush_count++;
+        self->frame_flushes++;
+        self->frame_bytes += (uint32_t)color_size;
+        self->total_bytes += color_size;
+
+        if (last_update) {
+            self->frame_count++;
+            self->last_frame_flushes = self->frame_flushes;
+            self->last_frame_bytes = self->frame_bytes;
+            self->frame_flushes = 0;
+            self->frame_bytes = 0;
+
+            if (self->frame_checksum) {
+                self->last_checksum = headless_checksum(self);
+            }
+        }
+
+        bus_trans_done_cb(&self->panel_io_handle, NULL, self);
+
+        return LCD_OK;
+    }
+
+
+    mp_lcd_err_t headless_del(mp_obj_t obj)
+    {
+        mp_lcd_headless_bus_obj_t *self = MP_OBJ_TO_PTR(obj);
+
+        if (self->fb != NULL) {
+            m_free(self->fb);
+            self->fb = NULL;
+            self->fb_size = 0;
+        }
+
+        return LCD_OK;
+    }
+
+
+    mp_lcd_err_t headless_init(mp_obj_t obj, uint16_t width, uint16_t height, uint8_t bpp, uint32_t buffer_size, bool rgb565_byte_swap, uint8_t cmd_bits, uint8_t param_bits)
+    {
+        LCD_UNUSED(buffer_size);
+        LCD_UNUSED(cmd_bits);
+        LCD_UNUSED(param_bits);
+
+        mp_lcd_headless_bus_obj_t *self = MP_OBJ_TO_PTR(obj);
+
+        self->width = width;
+        self->height = height;
+        self->bytes_per_pixel = bpp / 8;
+        self->rgb565_byte_swap = rgb565_byte_swap;
+
+        size_t fb_size = (size_t)width * height * self->bytes_per_pixel;
+
+        if (self->fb == NULL) {
+            self->fb = m_malloc(fb_size);
+        } else {
+            self->fb = m_realloc(self->fb, fb_size);
+        }
+
+        if (self->fb == NULL) {
+            self->fb_size = 0;
+            return LCD_ERR_NO_MEM;
+        }
+
+        memset(self->fb, 0x00, fb_size);
+        self->fb_size = fb_size;
+        self->trans_done = true;
+
+        return LCD_OK;
+    }
+
+
+    mp_lcd_err_t headless_get_lane_count(mp_obj_t obj, uint8_t *lane_count)
+    {
+        LCD_UNUSED(obj);
+        *lane_count = 1;
+        return LCD_OK;
+    }
+
+
+    static mp_obj_t mp_lcd_headless_get_framebuffer(mp_obj_t self_in)
+    {
+        mp_lcd_headless_bus_obj_t *self = MP_OBJ_TO_PTR(self_in);
+
+        if (self->fb == NULL) return mp_const_none;
+
+        return mp_obj_new_memoryview(BYTEARRAY_TYPECODE, self->fb_size, self->fb);
+    }
+
+    MP_DEFINE_CONST_FUN_OBJ_1(mp_lcd_headless_get_framebuffer_obj, mp_lcd_headless_get_framebuffer);
+
+
+    static mp_obj_t mp_lcd_headless_checksum(mp_obj_t self_in)
+    {
+        mp_lcd_headless_bus_obj_t *self = MP_OBJ_TO_PTR(self_in);
+        return mp_obj_new_int_from_uint(headless_checksum(self));
+    }
+
+    MP_DEFINE_CONST_FUN_OBJ_1(mp_lcd_headless_checksum_obj, mp_lcd_headless_checksum);
+
+
+    static mp_obj_t mp_lcd_headless_get_stats(mp_obj_t self_in)
+    {
+        mp_lcd_headless_bus_obj_t *self = MP_OBJ_TO_PTR(self_in);
+
+        mp_obj_t stats = mp_obj_new_dict(7);
+
+        mp_obj_dict_store(stats, MP_OBJ_NEW_QSTR(MP_QSTR_frames), mp_obj_new_int_from_uint(self->frame_count));
+        mp_obj_dict_store(stats, MP_OBJ_NEW_QSTR(MP_QSTR_flushes), mp_obj_new_int_from_uint(self->flush_count));
+        mp_obj_dict_store(stats, MP_OBJ_NEW_QSTR(MP_QSTR_params), mp_obj_new_int_from_uint(self->param_count));
+        mp_obj_dict_store(stats, MP_OBJ_NEW_QSTR(MP_QSTR_bytes), mp_obj_new_int_from_ull(self->total_bytes));
+        mp_obj_dict_store(stats, MP_OBJ_NEW_QSTR(MP_QSTR_frame_flushes), mp_obj_new_int_from_uint(self->last_frame_flushes));
+        mp_obj_dict_store(stats, MP_OBJ_NEW_QSTR(MP_QSTR_frame_bytes), mp_obj_new_int_from_uint(self->last_frame_bytes));
+        mp_obj_dict_store(stats, MP_OBJ_NEW_QSTR(MP_QSTR_frame_checksum), mp_obj_new_int_from_uint(self->last_checksum));
+
+        return stats;
+    }
+
+    MP_DEFINE_CONST_FUN_OBJ_1(mp_lcd_headless_get_stats_obj, mp_lcd_headless_get_stats);
+
+
+    static mp_obj_t mp_lcd_headless_reset_stats(mp_obj_t self_in)
+    {
+        mp_lcd_headless_bus_obj_t *self = MP_OBJ_TO_PTR(self_in);
+
+        self->frame_count = 0;
+        self->flush_count = 0;
+        self->param_count = 0;
+        self->total_bytes = 0;
+        self->frame_flushes = 0;
+        self->frame_bytes = 0;
+        self->last_frame_flushes = 0;
+        self->last_frame_bytes = 0;
+        self->last_checksum = 0;
+
+        return mp_const_none;
+    }
+
+    MP_DEFINE_CONST_FUN_OBJ_1(mp_lcd_headless_reset_stats_obj, mp_lcd_headless_reset_stats);
+
+
+    static const mp_rom_map_elem_t mp_lcd_headless_bus_locals_dict_table[] = {
+        { MP_ROM_QSTR(MP_QSTR_get_lane_count),       MP_ROM_PTR(&mp_lcd_bus_get_lane_count_obj)       },
+        { MP_ROM_QSTR(MP_QSTR_register_callback),    MP_ROM_PTR(&mp_lcd_bus_register_callback_obj)    },
+        { MP_ROM_QSTR(MP_QSTR_tx_color),             MP_ROM_PTR(&mp_lcd_bus_tx_color_obj)             },
+        { MP_ROM_QSTR(MP_QSTR_rx_param),             MP_ROM_PTR(&mp_lcd_bus_rx_param_obj)             },
+        { MP_ROM_QSTR(MP_QSTR_tx_param),             MP_ROM_PTR(&mp_lcd_bus_tx_param_obj)             },
+        { MP_ROM_QSTR(MP_QSTR_free_framebuffer),     MP_ROM_PTR(&mp_lcd_bus_free_framebuffer_obj)     },
+        { MP_ROM_QSTR(MP_QSTR_allocate_framebuffer), MP_ROM_PTR(&mp_lcd_bus_allocate_framebuffer_obj) },
+        { MP_ROM_QSTR(MP_QSTR_init),                 MP_ROM_PTR(&mp_lcd_bus_init_obj)                 },
+        { MP_ROM_QSTR(MP_QSTR_deinit),               MP_ROM_PTR(&mp_lcd_bus_deinit_obj)               },
+        { MP_ROM_QSTR(MP_QSTR___del__),              MP_ROM_PTR(&mp_lcd_bus_deinit_obj)               },
+        { MP_ROM_QSTR(MP_QSTR_get_framebuffer),      MP_ROM_PTR(&mp_lcd_headless_get_framebuffer_obj) },
+        { MP_ROM_QSTR(MP_QSTR_checksum),             MP_ROM_PTR(&mp_lcd_headless_checksum_obj)        },
+        { MP_ROM_QSTR(MP_QSTR_get_stats),            MP_ROM_PTR(&mp_lcd_headless_get_stats_obj)       },
+        { MP_ROM_QSTR(MP_QSTR_reset_stats),          MP_ROM_PTR(&mp_lcd_headless_reset_stats_obj)     }
+    };
+
+
+    static MP_DEFINE_CONST_DICT(mp_lcd_headless_bus_locals_dict, mp_lcd_headless_bus_locals_dict_table);
+
+    MP_DEFINE_CONST_OBJ_TYPE(
+        mp_lcd_headless_bus_type,
+        MP_QSTR_HeadlessBus,
+        MP_TYPE_FLAG_NONE,
+        make_new, mp_lcd_headless_bus_make_new,
+        locals_dict, (mp_obj_dict_t *)&mp_lcd_headless_bus_locals_dict
+    );
+#endif /* MP_PORT_UNIX */
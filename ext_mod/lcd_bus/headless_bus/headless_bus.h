@@ -0,0 +1,53 @@
+// Copyright (c) 2024 - 2025 Kevin G. Schlosser
+
+#ifndef _HEADLESS_BUS_H_
+    #define _HEADLESS_BUS_H_
+
+    //local_includes
+    #include "modlcd_bus.h"
+
+    // micropython includes
+    #include "py/obj.h"
+    #include "py/runtime.h"
+
+    #include <stdbool.h>
+
+    #ifdef MP_PORT_UNIX
+        typedef struct _mp_lcd_headless_bus_obj_t {
+            mp_obj_base_t base;
+
+            mp_obj_t callback;
+
+            void *buf1;
+            void *buf2;
+            uint32_t buffer_flags;
+
+            bool trans_done;
+            bool rgb565_byte_swap;
+
+            lcd_panel_io_t panel_io_handle;
+
+            // off screen copy of what would be on the display
+            uint8_t *fb;
+            size_t fb_size;
+            uint16_t width;
+            uint16_t height;
+            uint8_t bytes_per_pixel;
+
+            uint32_t frame_count;
+            uint32_t flush_count;
+            uint32_t param_count;
+            uint64_t total_bytes;
+
+            uint32_t frame_flushes;
+            uint32_t frame_bytes;
+            uint32_t last_frame_flushes;
+            uint32_t last_frame_bytes;
+            uint32_t last_checksum;
+            bool frame_checksum;
+
+        } mp_lcd_headless_bus_obj_t;
+
+        extern const mp_obj_type_t mp_lcd_headless_bus_type;
+    #endif /* MP_PORT_UNIX */
+#endif /* _HEADLESS_BUS_H_ */
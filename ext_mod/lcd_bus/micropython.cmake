@@ -36,6 +36,7 @@ else()
         ${CMAKE_CURRENT_LIST_DIR}
         ${CMAKE_CURRENT_LIST_DIR}/common_include
         ${CMAKE_CURRENT_LIST_DIR}/sdl_bus
+        ${CMAKE_CURRENT_LIST_DIR}/headless_bus
     )
 
     set(LCD_SOURCES
@@ -46,6 +47,7 @@ else()
         ${CMAKE_CURRENT_LIST_DIR}/common_src/i80_bus.c
         ${CMAKE_CURRENT_LIST_DIR}/common_src/rgb_bus.c
         ${CMAKE_CURRENT_LIST_DIR}/sdl_bus/sdl_bus.c
+        ${CMAKE_CURRENT_LIST_DIR}/headless_bus/headless_bus.c
     )
 
 endif(ESP_PLATFORM)
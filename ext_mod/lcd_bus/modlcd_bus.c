@@ -9,6 +9,7 @@
 
 #ifdef MP_PORT_UNIX
     #include "sdl_bus.h"
+    #include "headless_bus.h"
 #endif
 
 // micropython includes
@@ -295,6 +296,7 @@ static const mp_rom_map_elem_t mp_module_lcd_bus_globals_table[] = {
 
     #ifdef MP_PORT_UNIX
         { MP_ROM_QSTR(MP_QSTR_SDLBus),         MP_ROM_PTR(&mp_lcd_sdl_bus_type)        },
+        { MP_ROM_QSTR(MP_QSTR_HeadlessBus),    MP_ROM_PTR(&mp_lcd_headless_bus_type)   },
     #endif
     { MP_ROM_QSTR(MP_QSTR_DEBUG_ENABLED),    MP_ROM_INT(LCD_DEBUG) },
 
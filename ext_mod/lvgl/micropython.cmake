@@ -17,6 +17,25 @@ separate_arguments(SECOND_BUILD_ENV UNIX_COMMAND $ENV{SECOND_BUILD})
 
 set(LVGL_DIR "${BINDING_DIR}/lib/lvgl")
 
+# callbacks that hand their struct arguments to Python in a reused wrapper,
+# see --reuse-callback-args in the binding generator
+set(LV_GEN_ARGS "")
+if(DEFINED ENV{LV_REUSE_CALLBACK_ARGS})
+    list(APPEND LV_GEN_ARGS --reuse-callback-args=$ENV{LV_REUSE_CALLBACK_ARGS})
+endif()
+
+# copy the inherited lv_obj methods into the method table of every widget,
+# see --flat-method-tables in the binding generator
+if(DEFINED ENV{LV_FLAT_METHOD_TABLES})
+    list(APPEND LV_GEN_ARGS --flat-method-tables)
+endif()
+
+# keep the parsed headers between builds, see --cache-dir in the binding
+# generator
+if(DEFINED ENV{LV_AST_CACHE})
+    list(APPEND LV_GEN_ARGS --cache-dir=$ENV{LV_AST_CACHE})
+endif()
+
 
 file(GLOB_RECURSE LVGL_HEADERS ${BINDING_DIR}/lib/lvgl/src/*.h ${BINDING_DIR}/lib/lv_conf.h)
 
@@ -31,7 +50,7 @@ if(${SECOND_BUILD_ENV} EQUAL "0")
 
     execute_process(
         COMMAND
-            ${Python3_EXECUTABLE} ${BINDING_DIR}/gen/$ENV{GEN_SCRIPT}_api_gen_mpy.py ${LV_CFLAGS} --output=${CMAKE_BINARY_DIR}/lv_mp.c --include=${BINDING_DIR}/lib --include=${BINDING_DIR}/lib/lvgl --board=$ENV{LV_PORT} --module_name=lvgl --module_prefix=lv --metadata=${CMAKE_BINARY_DIR}/lv_mp.c.json --header_file=${LVGL_DIR}/lvgl.h
+            ${Python3_EXECUTABLE} ${BINDING_DIR}/gen/$ENV{GEN_SCRIPT}_api_gen_mpy.py ${LV_CFLAGS} --output=${CMAKE_BINARY_DIR}/lv_mp.c --include=${BINDING_DIR}/lib --include=${BINDING_DIR}/lib/lvgl --board=$ENV{LV_PORT} --module_name=lvgl --module_prefix=lv --metadata=${CMAKE_BINARY_DIR}/lv_mp.c.json ${LV_GEN_ARGS} --header_file=${LVGL_DIR}/lvgl.h
         WORKING_DIRECTORY
             ${CMAKE_CURRENT_LIST_DIR}
 
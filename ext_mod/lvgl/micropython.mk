@@ -28,6 +28,25 @@ endif
 ALL_LVGL_SRC = $(shell find $(LVGL_DIR) -type f -name '*.h') $(LVGL_BINDING_DIR)/lib/lv_conf.h
 
 LVGL_MPY = $(BUILD)/lv_mpy.c
+LVGL_MPY_STAMP = $(BUILD)/lv_mpy.stamp
+
+# callbacks that hand their struct arguments to Python in a reused wrapper,
+# see --reuse-callback-args in the binding generator
+ifdef LV_REUSE_CALLBACK_ARGS
+    LV_GEN_ARGS += --reuse-callback-args=$(LV_REUSE_CALLBACK_ARGS)
+endif
+
+# copy the inherited lv_obj methods into the method table of every widget,
+# see --flat-method-tables in the binding generator
+ifdef LV_FLAT_METHOD_TABLES
+    LV_GEN_ARGS += --flat-method-tables
+endif
+
+# keep the parsed headers between builds, see --cache-dir in the binding
+# generator
+ifdef LV_AST_CACHE
+    LV_GEN_ARGS += --cache-dir=$(LV_AST_CACHE)
+endif
 LVGL_MPY_METADATA = $(BUILD)/lv_mpy.json
 
 
@@ -35,11 +54,18 @@ SRC_USERMOD_LIB_C += $(shell find $(LVGL_DIR)/src -type f -name "*.c")
 SRC_USERMOD_LIB_C += $(CURRENT_DIR)/mem_core.c
 SRC_USERMOD_C += $(LVGL_MPY)
 
-$(LVGL_MPY): $(ALL_LVGL_SRC) $(LVGL_BINDING_DIR)/gen/$(GEN_SCRIPT)_api_gen_mpy.py
-	$(ECHO) "LVGL-GEN $@"
+# The generator leaves lv_mpy.c alone when the output didn't change so it
+# doesn't get compiled again. The stamp records when the generator last ran,
+# otherwise lv_mpy.c stays older than the headers and the generator runs on
+# every build.
+$(LVGL_MPY): $(LVGL_MPY_STAMP) ;
+
+$(LVGL_MPY_STAMP): $(ALL_LVGL_SRC) $(LVGL_BINDING_DIR)/gen/$(GEN_SCRIPT)_api_gen_mpy.py
+	$(ECHO) "LVGL-GEN $(LVGL_MPY)"
 	$(Q)mkdir -p $(dir $@)
 
-	$(Q)$(PYTHON) $(LVGL_BINDING_DIR)/gen/$(GEN_SCRIPT)_api_gen_mpy.py $(LV_CFLAGS) --board=$(LV_PORT) --output=$(LVGL_MPY)  --include=$(LIB_DIR) --include=$(LVGL_DIR)  --module_name=lvgl --module_prefix=lv --metadata=$(LVGL_MPY_METADATA) --header_file=$(LVGL_DIR)/lvgl.h
+	$(Q)$(PYTHON) $(LVGL_BINDING_DIR)/gen/$(GEN_SCRIPT)_api_gen_mpy.py $(LV_CFLAGS) --board=$(LV_PORT) --output=$(LVGL_MPY)  --include=$(LIB_DIR) --include=$(LVGL_DIR)  --module_name=lvgl --module_prefix=lv --metadata=$(LVGL_MPY_METADATA) $(LV_GEN_ARGS) --header_file=$(LVGL_DIR)/lvgl.h
+	$(Q)touch $@
 
 .PHONY: LVGL_MPY
 LVGL_MPY: $(LVGL_MPY)
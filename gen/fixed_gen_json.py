@@ -2,6 +2,7 @@
 
 import os
 import sys
+import json
 import shutil
 import subprocess
 import tempfile
@@ -12,6 +13,12 @@ project_path = os.path.abspath(os.path.join(base_path, '..', 'lib', 'lvgl'))
 docs_path = os.path.join(project_path, 'docs')
 sys.path.insert(0, docs_path)
 
+if __name__ == '__main__':
+    # when run as a script the paths the binding generator normally sets up
+    # need to be added.
+    sys.path.insert(0, os.path.join(project_path, 'scripts', 'gen_json'))
+    sys.path.insert(0, os.path.join(base_path, '..', 'lib', 'pycparser'))
+
 
 import create_fake_lib_c  # NOQA
 import pycparser_monkeypatch  # NOQA
@@ -137,3 +144,14 @@ def run(lvgl_config_path, target_header, filter_private):
     shutil.rmtree(temp_directory)
 
     return ast
+
+
+# The binding generator runs this as a separate process so the json AST gets
+# built while the generator preprocesses and parses the headers itself.
+#
+#   python3 fixed_gen_json.py <lv_conf.h> <target header> <output json>
+if __name__ == '__main__':
+    json_ast = run(sys.argv[1], sys.argv[2], False)
+
+    with open(sys.argv[3], 'w') as out_file:
+        json.dump(json_ast.to_dict(), out_file)
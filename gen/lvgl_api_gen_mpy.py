@@ -12,18 +12,22 @@
 
 from __future__ import print_function
 import collections
+import filecmp
 import sys
 import struct
 import copy
+import hashlib
+import pickle
 from itertools import chain
 from functools import lru_cache
 import json
+import time
 
 def memoize(func):
-    @lru_cache(maxsize=1000000)
-    def memoized(*args, **kwargs):
-        return func(*args, **kwargs)
-    return memoized
+    # the functions are called with AST nodes which hash by identity so the
+    # cache never needs to evict anything. An unbounded cache skips the LRU
+    # bookkeeping and there is no extra wrapper call.
+    return lru_cache(maxsize=None)(func)
 
 def eprint(*args, **kwargs):
     print(*args, file=sys.stderr, **kwargs)
@@ -116,7 +120,11 @@ argParser.add_argument('--module_prefix', dest='module_prefix', help='Module pre
 argParser.add_argument('--metadata', dest='metadata', help='Optional file to emit metadata (introspection)', metavar='<MetaData File Name>', action='store')
 argParser.add_argument('--board', dest='board', help='Board or OS', metavar='<Board or OS>', action='store')
 argParser.add_argument('--output', dest='output', help='Output file path', metavar='<Output path>', action='store')
+argParser.add_argument('--cache-dir', dest='cache_dir', help='Directory to cache the parsed headers in, nothing is cached when not given', metavar='<Cache path>', action='store')
 argParser.add_argument('--debug', dest='debug', help='enable debugging output', action='store_true')
+argParser.add_argument('--reuse-callback-args', dest='reuse_callback_args', help='Comma separated callbacks (C typedef or generated callback name) that pass their struct and array arguments to Python in a reused wrapper object', metavar='<Callback names>', action='append', default=[])
+argParser.add_argument('--flat-method-tables', dest='flat_method_tables', help='Copy the inherited methods into the method table of every object so a method is found in one lookup. Uses more flash', action='store_true')
+argParser.add_argument('--profile', dest='profile', help='Profile each generation phase, the stats get saved next to the output file', action='store_true')
 
 argParser.add_argument('input', nargs='+')
 
@@ -139,6 +147,137 @@ def LOG(*ags):
         log_file.flush()
 
 
+# make.py sets LV_BUILD_TRACE_DIR when it runs a build. The time spent in
+# each phase of the generation gets saved there in the Chrome trace event
+# format and make.py adds it to build/build_trace.json.
+class GenTrace(object):
+
+    def __init__(self):
+        self.path = os.environ.get('LV_BUILD_TRACE_DIR', None)
+        self.events = []
+        self._name = None
+        self._start_time = time.time()
+        self._phase_start = 0
+
+    def _add(self, name, start, end):
+        self.events.append(dict(
+            name=name,
+            cat='codegen',
+            ph='X',
+            ts=int(start * 1000000),
+            dur=int((end - start) * 1000000),
+            pid=os.getpid(),
+            tid=0
+        ))
+
+    def start(self, name):
+        if self.path is None:
+            return
+
+        self.stop()
+        self._name = name
+        self._phase_start = time.time()
+
+    def stop(self):
+        if self._name is None:
+            return
+
+        self._add(self._name, self._phase_start, time.time())
+        self._name = None
+
+    def save(self):
+        if self.path is None:
+            return
+
+        self.stop()
+        self._add(
+            'generate ' + os.path.basename(args.output),
+            self._start_time,
+            time.time()
+        )
+
+        try:
+            with open(os.path.join(self.path, f'gen_{os.getpid()}.json'), 'w') as f:
+                json.dump(self.events, f)
+        except OSError as err:
+            eprint(f'LVGL-GEN unable to save the build trace: {err}')
+
+
+gen_trace = GenTrace()
+
+
+# When --profile is given every phase of the generation gets run under
+# cProfile. The stats for each phase are saved to
+# <output directory>/profile/<index>_<phase>.prof (they can be opened with
+# pstats or snakeviz) and a summary is written to stderr at the end.
+class PhaseProfiler(object):
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.phases = []
+        self._name = None
+        self._profiler = None
+        self._start_time = 0
+
+    def start(self, name):
+        gen_trace.start(name)
+
+        if not self.enabled:
+            return
+
+        import cProfile
+
+        self.stop()
+
+        self._name = name
+        self._profiler = cProfile.Profile()
+        self._start_time = time.perf_counter()
+        self._profiler.enable()
+
+    def stop(self):
+        if self._profiler is None:
+            return
+
+        self._profiler.disable()
+        self.phases.append(
+            (self._name, time.perf_counter() - self._start_time, self._profiler)
+        )
+        self._name = None
+        self._profiler = None
+
+    def report(self, top=15):
+        self.stop()
+
+        if not self.phases:
+            return
+
+        import io
+        import pstats
+
+        profile_dir = os.path.join(os.path.dirname(os.path.abspath(args.output)), 'profile')
+        os.makedirs(profile_dir, exist_ok=True)
+
+        total = sum(phase[1] for phase in self.phases)
+
+        for i, (name, duration, profiler) in enumerate(self.phases):
+            profiler.dump_stats(os.path.join(profile_dir, f'{i:02d}_{name}.prof'))
+
+            stream = io.StringIO()
+            stats = pstats.Stats(profiler, stream=stream)
+            stats.sort_stats('cumulative').print_stats(top)
+            eprint(f'---- {name} ({duration:.3f}s) ----')
+            eprint(stream.getvalue())
+
+        eprint('phase                    seconds      %')
+        for name, duration, _ in self.phases:
+            eprint(f'{name:<22} {duration:>9.3f} {duration / total * 100:>6.1f}')
+        eprint(f'{"total":<22} {total:>9.3f}')
+        eprint(f'stats saved to {profile_dir}')
+
+
+phase_profiler = PhaseProfiler(args.profile)
+
+
 # this block of code is used to handle the generation of the preprocessor
 # output. Since pycparser has the ability to call the compiler internally
 # there is no need to do it from cmake. Data doesn't need to be going in
@@ -260,6 +399,32 @@ cpp_args.extend(unknownargs)
 # AST parsing helper functions
 #
 
+# Copies an AST the way copy.deepcopy does except only the nodes and the
+# containers holding them get copied. Names, qualifiers and the Coord objects
+# are shared, nothing modifies those in place. deepcopy used to take up most
+# of the generation time.
+def clone_ast(ast):
+    if isinstance(ast, c_ast.Node):
+        cls = ast.__class__
+        new_ast = cls.__new__(cls)
+        for slot in cls.__slots__:
+            if slot == '__weakref__':
+                continue
+            try:
+                value = getattr(ast, slot)
+            except AttributeError:
+                continue
+
+            setattr(new_ast, slot, clone_ast(value))
+
+        return new_ast
+    if isinstance(ast, list):
+        return [clone_ast(item) for item in ast]
+    if isinstance(ast, tuple):
+        return tuple(clone_ast(item) for item in ast)
+
+    return ast
+
 @memoize
 def remove_declname(ast):
     if hasattr(ast, 'declname'):
@@ -327,7 +492,7 @@ def get_type(arg, **kwargs):
     if isinstance(arg, str):
         return arg
     remove_quals_arg = 'remove_quals' in kwargs and kwargs['remove_quals']
-    arg_ast = copy.deepcopy(arg)
+    arg_ast = clone_ast(arg)
     remove_explicit_struct(arg_ast)
     if remove_quals_arg: remove_quals(arg_ast)
     return gen.visit(arg_ast)
@@ -366,7 +531,7 @@ def remove_arg_names(ast):
 # Create a function prototype AST from a function AST
 @memoize
 def function_prototype(func):
-    bare_func = copy.deepcopy(func)
+    bare_func = clone_ast(func)
     remove_declname(bare_func)
 
     ptr_decl = c_ast.PtrDecl(
@@ -582,12 +747,122 @@ func_prototypes = {}
 parser = c_parser.CParser()
 gen = c_generator.CGenerator()
 
-ast = pycparser.parse_file(
-    args.input[0], 
-    use_cpp=True, 
-    cpp_path=cpp_path,
-    cpp_args=cpp_args
-)
+# When --cache-dir is given the preprocessed text and the pickled AST get
+# stored in the cache directory and they are reused as long as the
+# preprocessor command and the contents of every file the preprocessor read
+# (lv_conf.h included) have not changed. The files are collected from the line markers in the preprocessor
+# output so there is no need to run the preprocessor to check the cache.
+
+AST_CACHE_VERSION = 1
+
+
+def _hash_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        h.update(f.read())
+    return h.hexdigest()
+
+
+def _get_dependencies(text):
+    deps = set()
+    for match in re.finditer(r'^#(?:line)?\s+\d+\s+"([^"]+)"', text, re.M):
+        path = match.group(1).replace('\\\\', '\\')
+        if os.path.isfile(path):
+            deps.add(os.path.abspath(path))
+
+    return sorted(deps)
+
+
+def _load_ast_cache(cache_path):
+    manifest_path = os.path.join(cache_path, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+        for path, digest in manifest['dependencies'].items():
+            if not os.path.isfile(path) or _hash_file(path) != digest:
+                return None
+
+        with open(os.path.join(cache_path, 'ast.pickle'), 'rb') as f:
+            return pickle.load(f)
+    except Exception as err:  # NOQA
+        LOG('AST cache could not be loaded:', err)
+        return None
+
+
+def _save_ast_cache(cache_path, text, file_ast):
+    os.makedirs(cache_path, exist_ok=True)
+
+    manifest = dict(
+        version=AST_CACHE_VERSION,
+        input=os.path.abspath(args.input[0]),
+        cpp_path=cpp_path,
+        cpp_args=cpp_args,
+        dependencies={path: _hash_file(path) for path in _get_dependencies(text)}
+    )
+
+    # the files are written to a temporary name and then renamed so an
+    # interrupted build or two builds running at the same time never leave
+    # a partial cache entry behind.
+    for file_name, mode, data in (
+        ('preprocessed.i', 'w', text),
+        ('ast.pickle', 'wb', pickle.dumps(file_ast, pickle.HIGHEST_PROTOCOL)),
+        ('manifest.json', 'w', json.dumps(manifest, indent=4))
+    ):
+        path = os.path.join(cache_path, file_name)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, mode) as f:
+            f.write(data)
+
+        os.replace(tmp_path, path)
+
+
+def parse_headers():
+    cache_dir = args.cache_dir
+
+    if not cache_dir:
+        return pycparser.parse_file(
+            args.input[0],
+            use_cpp=True,
+            cpp_path=cpp_path,
+            cpp_args=cpp_args
+        )
+
+    key = hashlib.sha256()
+    for item in (
+        str(AST_CACHE_VERSION),
+        pycparser.__version__,
+        '.'.join(str(v) for v in sys.version_info[:2]),
+        os.path.abspath(args.input[0]),
+        cpp_path
+    ) + tuple(cpp_args):
+        key.update(item.encode('utf-8'))
+        key.update(b'\x00')
+
+    cache_path = os.path.join(cache_dir, key.hexdigest()[:16])
+
+    file_ast = _load_ast_cache(cache_path)
+    if file_ast is not None:
+        eprint('LVGL-GEN using cached AST', cache_path)
+        return file_ast
+
+    text = pycparser.preprocess_file(args.input[0], cpp_path, cpp_args)
+    file_ast = parser.parse(text, args.input[0])
+
+    try:
+        _save_ast_cache(cache_path, text, file_ast)
+    except Exception as err:  # NOQA
+        eprint('LVGL-GEN unable to write the AST cache:', err)
+
+    return file_ast
+
+
+phase_profiler.start('parse')
+ast = parse_headers()
+phase_profiler.start('analyze')
 
 
 forward_struct_decls = {}
@@ -641,7 +916,11 @@ class STDOut:
 
     def __init__(self):
         self._stdout = sys.stdout
-        self._file = open(args.output, 'w')
+        # everything gets written to a temporary file first. The output file
+        # is only replaced if the content changed, an identical binding keeps
+        # its timestamp so make doesn't compile it again.
+        self._tmp_path = f'{args.output}.{os.getpid()}.tmp'
+        self._file = open(self._tmp_path, 'w')
 
         sys.stdout = self  # NOQA
         self._write_to_file = None
@@ -659,7 +938,7 @@ class STDOut:
     def flush(self):
         self._file.flush()
 
-    def close(self):
+    def close(self, discard=False):
         try:
             self._file.close()
         except:  # NOQA
@@ -667,6 +946,19 @@ class STDOut:
         else:
             sys.stdout = self._stdout  # NOQA
 
+        if not os.path.exists(self._tmp_path):
+            return
+
+        if (
+            discard or (
+                os.path.exists(args.output) and
+                filecmp.cmp(self._tmp_path, args.output, shallow=False)
+            )
+        ):
+            os.remove(self._tmp_path)
+        else:
+            os.replace(self._tmp_path, args.output)
+
     def __getattr__(self, item):
         if item in self.__dict__:
             return self.__dict__[item]
@@ -680,7 +972,8 @@ _old_excepthook = sys.excepthook
 
 
 def my_excepthook(exc_type, exc_value, tb):
-    stdout.close()
+    # a failed run leaves the previous output in place
+    stdout.close(discard=True)
     return _old_excepthook(exc_type, exc_value, tb)
 
 
@@ -735,17 +1028,22 @@ obj_ctors = [func for func in funcs if is_obj_ctor(func)]
 
 
 # eprint('CTORS(%d): %s' % (len(obj_ctors), ', '.join(sorted('%s' % ctor.name for ctor in obj_ctors))))
-for obj_ctor in obj_ctors:
-    funcs.remove(obj_ctor)
+if obj_ctors:
+    _obj_ctor_set = set(obj_ctors)
+    funcs = [func for func in funcs if func not in _obj_ctor_set]
 
 obj_names = [create_obj_pattern.match(ctor.name).group(1) for ctor in obj_ctors]
 
+# name -> ctor, the first declaration wins like the linear search it replaces
+obj_ctors_by_name = {}
+for obj_ctor in obj_ctors:
+    obj_ctors_by_name.setdefault(obj_ctor.name, obj_ctor)
+
 def has_ctor(obj_name):
-    return ctor_name_from_obj_name(obj_name) in [ctor.name for ctor in obj_ctors]
+    return ctor_name_from_obj_name(obj_name) in obj_ctors_by_name
 
 def get_ctor(obj_name):
-    global obj_ctors
-    return next(ctor for ctor in obj_ctors if ctor.name == ctor_name_from_obj_name(obj_name))
+    return obj_ctors_by_name[ctor_name_from_obj_name(obj_name)]
 
 def get_methods(obj_name):
     global funcs
@@ -1157,6 +1455,8 @@ register_int_ptr_type('i64ptr',
         'unsigned long long int *')
 
 
+phase_profiler.start('emit_helpers')
+
 #
 # Emit Header
 #
@@ -1678,18 +1978,74 @@ static mp_obj_t lv_to_mp_struct(const mp_obj_type_t *type, void *lv_struct)
     return MP_OBJ_FROM_PTR(self);
 }
 
-static void call_parent_methods(mp_obj_t obj, qstr attr, mp_obj_t *dest)
+// Callbacks listed with --reuse-callback-args hand their struct arguments to
+// Python in a statically allocated wrapper that belongs to the callback
+// instead of allocating a new one on every call. The wrapper only points to
+// the right data while the callback runs.
+
+GENMPY_UNUSED static inline mp_obj_t lv_to_mp_struct_reuse(mp_lv_struct_t *self, const mp_obj_type_t *type, void *lv_struct)
+{
+    if (lv_struct == NULL) return mp_const_none;
+    self->base.type = type;
+    self->data = lv_struct;
+    return MP_OBJ_FROM_PTR(self);
+}
+
+// The locals_dict tables of the generated types are sorted by name so
+// lookup_sorted_attr can do a binary search on them instead of the linear
+// scan mp_map_lookup does on a const dict.
+
+static const mp_obj_type_t mp_lv_base_struct_type;
+static void lookup_sorted_attr(mp_obj_t obj, qstr attr, mp_obj_t *dest);
+
+// The generator sorts the tables of the types that use lookup_sorted_attr,
+// the struct types and the struct base type. Any other table gets the
+// linear lookup.
+static inline bool has_sorted_locals(const mp_obj_type_t *type)
+{
+    return type == &mp_lv_base_struct_type ||
+        MP_OBJ_TYPE_GET_SLOT_OR_NULL(type, attr) == lookup_sorted_attr ||
+        MP_OBJ_TYPE_GET_SLOT_OR_NULL(type, parent) == &mp_lv_base_struct_type;
+}
+
+static mp_map_elem_t *lookup_sorted_map(mp_map_t *map, qstr attr, const char *name)
+{
+    size_t lo = 0;
+    size_t hi = map->used;
+    while (lo < hi) {
+        size_t mid = (lo + hi) / 2;
+        qstr key = MP_OBJ_QSTR_VALUE(map->table[mid].key);
+        if (key == attr) {
+            return &map->table[mid];
+        }
+        if (strcmp(name, qstr_str(key)) < 0) {
+            hi = mid;
+        } else {
+            lo = mid + 1;
+        }
+    }
+    return NULL;
+}
+
+static void lookup_sorted_attr(mp_obj_t obj, qstr attr, mp_obj_t *dest)
 {
+    if (dest[0] != MP_OBJ_NULL) return; // only loads are handled
+
+    const char *name = qstr_str(attr);
     const mp_obj_type_t *type = mp_obj_get_type(obj);
     while (MP_OBJ_TYPE_HAS_SLOT(type, locals_dict)) {
         // generic method lookup
         // this is a lookup in the object (ie not class or type)
-        assert(MP_OBJ_TYPE_GET_SLOT(type, locals_dict)->base.type == &mp_type_dict); // MicroPython restriction, for now
         mp_map_t *locals_map = &MP_OBJ_TYPE_GET_SLOT(type, locals_dict)->map;
-        mp_map_elem_t *elem = mp_map_lookup(locals_map, MP_OBJ_NEW_QSTR(attr), MP_MAP_LOOKUP);
+        mp_map_elem_t *elem;
+        if (locals_map->is_fixed && locals_map->is_ordered && has_sorted_locals(type)) {
+            elem = lookup_sorted_map(locals_map, attr, name);
+        } else {
+            elem = mp_map_lookup(locals_map, MP_OBJ_NEW_QSTR(attr), MP_MAP_LOOKUP);
+        }
         if (elem != NULL) {
             mp_convert_member_lookup(obj, type, elem->value, dest);
-            break;
+            return;
         }
         if (MP_OBJ_TYPE_GET_SLOT_OR_NULL(type, parent) == NULL) {
             break;
@@ -2106,6 +2462,15 @@ GENMPY_UNUSED static mp_obj_t mp_array_from_ ## name(void *lv_arr)\
 GENMPY_UNUSED static void *mp_array_to_ ## name(mp_obj_t mp_arr)\
 {\
     return mp_array_to_ptr(mp_arr, size, is_signed);\
+}\
+GENMPY_UNUSED static mp_obj_t mp_array_from_reuse_ ## name(mp_lv_array_t *self, void *lv_arr)\
+{\
+    *self = (mp_lv_array_t){\
+        { {&mp_lv_array_type}, lv_arr },\
+        size,\
+        is_signed\
+    };\
+    return MP_OBJ_FROM_PTR(self);\
 }
 
 MP_ARRAY_CONVERTOR(u8ptr, 1, false)
@@ -2119,10 +2484,19 @@ MP_ARRAY_CONVERTOR(i64ptr, 8, true)
 
 """)
 
+phase_profiler.start('enums')
+
 #
 # Add regular enums with integer values
 #
 
+# enum name -> first definition that has values. Forward declared enums get
+# resolved through this.
+enum_defs_by_name = {}
+for enum_def in enum_defs:
+    if hasattr(enum_def.type, 'name') and enum_def.type.values:
+        enum_defs_by_name.setdefault(enum_def.type.name, enum_def)
+
 enums = collections.OrderedDict()
 for enum_def in enum_defs:
     # Skip stdatomic.h memory_order, no bindings needed.
@@ -2131,7 +2505,7 @@ for enum_def in enum_defs:
 
     # eprint("--> %s" % enum_def)
     while hasattr(enum_def.type, 'name') and not enum_def.type.values:
-        enum_def = next(e for e in enum_defs if hasattr(e.type, 'name') and e.type.name == enum_def.type.name and e.type.values)
+        enum_def = enum_defs_by_name[enum_def.type.name]
 
     member_names = [member.name for member in enum_def.type.values.enumerators if not member.name.startswith('_')]
     # enum_name = commonprefix(member_names)
@@ -2427,7 +2801,7 @@ static void mp_{sanitized_struct_name}_attr(mp_obj_t self_in, qstr attr, mp_obj_
         switch(attr)
         {{
             {read_cases};
-            default: call_parent_methods(self_in, attr, dest); // fallback to locals_dict lookup
+            default: lookup_sorted_attr(self_in, attr, dest); // fallback to locals_dict lookup
         }}
     }} else {{
         if (dest[1])
@@ -2606,6 +2980,12 @@ def get_arg_name(arg):
 
 # print("// Typedefs: " + ", ".join(get_arg_name(t) for t in typedefs))
 
+# name -> typedefs, try_generate_type looks these up for every type it
+# doesn't know about yet.
+typedefs_by_name = collections.OrderedDict()
+for typedef in typedefs:
+    typedefs_by_name.setdefault(get_arg_name(typedef), []).append(typedef)
+
 def try_generate_type(type_ast):
     # eprint(' --> try_generate_type %s : %s' % (get_name(type_ast), gen.visit(type_ast)))
     # print('/* --> try_generate_type %s: %s */' % (get_name(type_ast), type_ast))
@@ -2671,7 +3051,7 @@ def try_generate_type(type_ast):
     if type in structs:
         if try_generate_struct(type, structs[type]):
             return mp_to_lv[type]
-    for new_type_ast in [x for x in typedefs if get_arg_name(x) == type]:
+    for new_type_ast in typedefs_by_name.get(type, []):
         new_type = get_type(new_type_ast, remove_quals=True)
         if isinstance(new_type_ast, c_ast.TypeDecl) and isinstance(new_type_ast.type, c_ast.Struct) and not new_type_ast.type.decls:
             explicit_struct_name = new_type_ast.type.name if hasattr(new_type_ast.type, 'name') else new_type_ast.type.names[0]
@@ -2742,7 +3122,41 @@ typedef union {
 
 generated_callbacks = collections.OrderedDict()
 
-def build_callback_func_arg(arg, index, func, func_name = None):
+# Struct, blob and array arguments of the callbacks given with
+# --reuse-callback-args are passed to Python in a static wrapper object. Only
+# callbacks where Python doesn't keep the arguments after returning should be
+# listed, the indev read and display flush callbacks are the ones that get
+# called the most.
+reuse_callback_args = set(
+    name.strip()
+    for names in args.reuse_callback_args
+    for name in names.split(',')
+    if name.strip()
+)
+
+
+def get_reuse_wrapper(func_name, index, convertor):
+    wrapper_name = 'mp_%s_arg%d_wrapper' % (sanitize(func_name), index)
+
+    if convertor.startswith('mp_read_ptr_'):
+        struct_type = '&mp_%s_type' % convertor[len('mp_read_ptr_'):]
+    elif convertor == 'ptr_to_mp':
+        struct_type = '&mp_blob_type'
+    elif convertor.startswith('mp_array_from_'):
+        return (
+            'static mp_lv_array_t %s;' % wrapper_name,
+            'mp_array_from_reuse_%s(&%s, (void *)arg%d)' % (convertor[len('mp_array_from_'):], wrapper_name, index)
+        )
+    else:
+        return None
+
+    return (
+        'static mp_lv_struct_t %s;' % wrapper_name,
+        'lv_to_mp_struct_reuse(&%s, %s, (void *)arg%d)' % (wrapper_name, struct_type, index)
+    )
+
+
+def build_callback_func_arg(arg, index, func, func_name = None, wrappers = None):
     arg_type = get_type(arg.type, remove_quals = True)
     cast_in = '(void *)' if isinstance(arg.type, c_ast.PtrDecl) and 'const' in get_type(arg.type) and 'void' in get_type(arg.type) else '' # needed when field is const. casting to void overrides it
     cast_out = f'({arg_type})'
@@ -2759,6 +3173,13 @@ def build_callback_func_arg(arg, index, func, func_name = None):
         arg_metadata['name'] = None
 
     callback_metadata[func_name]['args'].append(arg_metadata)
+
+    if wrappers is not None:
+        wrapper = get_reuse_wrapper(func_name, index, lv_to_mp[arg_type])
+        if wrapper is not None:
+            wrappers.append(wrapper[0])
+            return 'mp_args[{i}] = {wrapper};'.format(i = index, wrapper = wrapper[1])
+
     return 'mp_args[{i}] = (mp_obj_t){convertor}({cast_in}arg{i});'.format(
                 convertor = lv_to_mp[arg_type],
                 i = index, cast_in = cast_in)
@@ -2780,7 +3201,7 @@ def gen_callback_func(func, func_name = None, user_data_argument = False):
                     align=[],
                     storage=[],
                     funcspec=[],
-                    type=copy.deepcopy(arg.type),
+                    type=clone_ast(arg.type),
                     init=None,
                     bitsize=None)
         t = new_arg
@@ -2831,12 +3252,24 @@ def gen_callback_func(func, func_name = None, user_data_argument = False):
 
     callback_metadata[func_name]['c_rtype'] = return_type
     callback_metadata[func_name]['py_rtype'] = get_py_type(return_type)
+
+    if (
+        func_name in reuse_callback_args or
+        sanitize(func_name) in reuse_callback_args or
+        callback_metadata[func_name]['c_type'] in reuse_callback_args
+    ):
+        wrappers = []
+    else:
+        wrappers = None
+
+    build_args = [build_callback_func_arg(arg, i, func, func_name=func_name, wrappers=wrappers) for i,arg in enumerate(args)]
+
     print("""
 /*
  * Callback function {func_name}
  * {func_prototype}
  */
-
+{wrappers}
 GENMPY_UNUSED static {return_type} {func_name}_callback({func_args})
 {{
     mp_obj_t mp_args[{num_args}];
@@ -2853,7 +3286,8 @@ GENMPY_UNUSED static {return_type} {func_name}_callback({func_args})
         return_type = return_type,
         func_args = ', '.join([(gen.visit(arg)) for arg in enumerated_args]),
         num_args=len(args),
-        build_args="\n    ".join([build_callback_func_arg(arg, i, func, func_name=func_name) for i,arg in enumerate(args)]),
+        wrappers = ''.join('\n%s\n' % wrapper for wrapper in wrappers) if wrappers else '',
+        build_args="\n    ".join(build_args),
         user_data=full_user_data,
         return_value_assignment = '' if return_type == 'void' else 'mp_obj_t callback_result = ',
         return_value='' if return_type == 'void' else ' %s(callback_result)' % mp_to_lv[return_type]))
@@ -2868,7 +3302,7 @@ generated_funcs = collections.OrderedDict()
 def build_mp_func_arg(arg, index, func, obj_name):
     if isinstance(arg, c_ast.EllipsisParam):
         raise MissingConversionException("Cannot convert ellipsis param")
-    fixed_arg = copy.deepcopy(arg)
+    fixed_arg = clone_ast(arg)
     convert_array_to_ptr(fixed_arg)
     if not fixed_arg.name:
         fixed_arg.name = "arg%d" % index
@@ -3130,6 +3564,39 @@ def gen_obj_methods(obj_name):
     return helper_members
 
 
+locals_entry_re = re.compile(r'MP_ROM_QSTR\(MP_QSTR_(\w+)\)')
+
+
+def sort_locals_entries(entries):
+    # locals_dict tables are sorted by name for the binary search in
+    # lookup_sorted_attr. The first entry wins when a name shows up more than
+    # once, same as with the linear lookup.
+    entries_by_name = collections.OrderedDict()
+    for entry in entries:
+        name = locals_entry_re.search(entry).group(1)
+        if name not in entries_by_name:
+            entries_by_name[name] = entry
+
+    return [entries_by_name[name] for name in sorted(entries_by_name.keys())]
+
+
+obj_locals_entries = {}
+
+
+def gen_obj_locals_entries(obj_name):
+    entries = gen_obj_methods(obj_name)
+
+    # with --flat-method-tables the parent entries get copied in so a method
+    # of lv_obj is found in the table of the widget
+    parent_obj_name = parent_obj_names.get(obj_name, None)
+    if args.flat_method_tables and parent_obj_name in obj_locals_entries:
+        entries = entries + obj_locals_entries[parent_obj_name]
+
+    entries = sort_locals_entries(entries)
+    obj_locals_entries[obj_name] = entries
+    return entries
+
+
 def gen_obj(obj_name):
     # eprint('Generating object %s...' % obj_name)
     is_obj = has_ctor(obj_name)
@@ -3199,7 +3666,7 @@ static MP_DEFINE_CONST_OBJ_TYPE(
     print, {obj}_print,
     {make_new}
     {binary_op}
-    attr, call_parent_methods,
+    attr, lookup_sorted_attr,
     {buffer}
     {parent}
     locals_dict, &{obj}_locals_dict
@@ -3215,7 +3682,7 @@ GENMPY_UNUSED static const mp_lv_obj_type_t mp_lv_{obj}_type = {{
             module_name = module_name,
             obj = sanitize(obj_name), base_obj = base_obj_name,
             base_class = '&mp_%s_type' % base_obj_name if should_add_base_methods else 'NULL',
-            locals_dict_entries = ",\n    ".join(gen_obj_methods(obj_name)),
+            locals_dict_entries = ",\n    ".join(gen_obj_locals_entries(obj_name)),
             ctor = ctor.format(obj = obj_name, ctor_name = ctor_func.name) if has_ctor(obj_name) else '',
             make_new = 'make_new, %s_make_new,' % obj_name if is_obj else '',
             binary_op = 'binary_op, mp_lv_obj_binary_op,' if is_obj else '',
@@ -3233,6 +3700,8 @@ GENMPY_UNUSED static const mp_lv_obj_type_t mp_lv_{obj}_type = {{
 
 
 
+phase_profiler.start('objects')
+
 #
 # Generate Enum objects
 #
@@ -3259,6 +3728,8 @@ for obj_name in obj_names:
         gen_obj(obj_name)
         generated_obj_names[obj_name] = True
 
+phase_profiler.start('structs')
+
 #
 # Generate structs which contain function members
 # First argument of a function could be it's parent struct
@@ -3282,6 +3753,8 @@ def try_generate_structs_from_first_argument():
  */
                 '''.format(struct=arg_type, err=e))
 
+phase_profiler.start('globals')
+
 #
 # Generate globals
 #
@@ -3341,6 +3814,8 @@ for global_name in blobs:
     except MissingConversionException as exp:
         gen_func_error(global_name, exp)
 
+phase_profiler.start('struct_functions')
+
 #
 # Generate struct-functions
 #
@@ -3372,24 +3847,22 @@ def generate_struct_functions(struct_list):
         #         struct_funcs.remove(struct_func)
 
         if struct_name not in structs or structs[struct_name].decls:
-            struct_size_attr = '{{ MP_ROM_QSTR(MP_QSTR___SIZE__), MP_ROM_PTR(MP_ROM_INT(sizeof({struct_tag}{struct_name}))) }},'.format(
+            struct_size_attr = ['{{ MP_ROM_QSTR(MP_QSTR___SIZE__), MP_ROM_PTR(MP_ROM_INT(sizeof({struct_tag}{struct_name}))) }}'.format(
                 struct_name = struct_name,
                 struct_tag = 'struct ' if struct_name in structs_without_typedef.keys() else '',
-            )
+            )]
             struct_metadata[get_py_type(struct_name).replace('"', '')]['class_attributes']['__SIZE__'] = {'c_type': 'int', 'py_type': 'int'}
         else:
-            struct_size_attr = ''
+            struct_size_attr = []
         print('''
 static const mp_rom_map_elem_t mp_{sanitized_struct_name}_locals_dict_table[] = {{
-    {struct_size}
-    {functions}
+    {locals_dict_entries}
 }};
 
 static MP_DEFINE_CONST_DICT(mp_{sanitized_struct_name}_locals_dict, mp_{sanitized_struct_name}_locals_dict_table);
         '''.format(
-            struct_size = struct_size_attr,
             sanitized_struct_name = sanitized_struct_name,
-            functions =  '',
+            locals_dict_entries = ',\n    '.join(sort_locals_entries(struct_size_attr)),
         ))
 
         generated_struct_functions[struct_name] = True
@@ -3397,6 +3870,8 @@ static MP_DEFINE_CONST_DICT(mp_{sanitized_struct_name}_locals_dict, mp_{sanitize
 
 generate_struct_functions(list(generated_structs.keys()))
 
+phase_profiler.start('module_functions')
+
 #
 # Generate all module functions (not including method functions which were already generated)
 #
@@ -3417,9 +3892,12 @@ for module_func in module_funcs[:]: # clone list because we are changing it in t
     try:
         gen_mp_func(module_func, None)
         # A new function can create new struct with new function structs
-        new_structs = [s for s in generated_structs if s not in generated_struct_functions]
-        if new_structs:
-            generate_struct_functions(new_structs)
+        # every struct in generated_struct_functions is also in
+        # generated_structs so there can only be new ones if it is bigger.
+        if len(generated_structs) > len(generated_struct_functions):
+            new_structs = [s for s in generated_structs if s not in generated_struct_functions]
+            if new_structs:
+                generate_struct_functions(new_structs)
 
     except MissingConversionException as exp:
         gen_func_error(module_func, exp)
@@ -3462,6 +3940,8 @@ for (func_name, func, struct_name) in callbacks_used_on_structs:
         # lv_to_mp[func_name] = lv_to_mp['void *']
         # mp_to_lv[func_name] = mp_to_lv['void *']
 
+phase_profiler.start('module')
+
 #
 # Emit Mpy Module definition
 #
@@ -3532,6 +4012,8 @@ static const mp_lv_obj_type_t *mp_lv_obj_types[] = {{
 }};
     '''.format(obj_types = ',\n    '.join(['&mp_lv_%s_type' % obj_name for obj_name in obj_names])))
 
+phase_profiler.start('metadata')
+
 # Save Metadata File, if specified.
 
 
@@ -3605,5 +4087,8 @@ if args.metadata:
 
     stub_gen.run(args.metadata)
 
+phase_profiler.report()
+gen_trace.save()
+
 stdout.close()
 
@@ -12,10 +12,13 @@
 
 
 import collections
+import filecmp
 import copy
 import functools
+import hashlib
+import pickle
 import json
-import inspect
+import time
 import sys
 import os
 import argparse
@@ -24,16 +27,75 @@ import re
 
 
 def memoize(func):
-    @functools.lru_cache(maxsize=1000000)
-    def memoized(*args, **kwargs):
-        return func(*args, **kwargs)
-    return memoized
+    # the functions are called with AST nodes which hash by identity so the
+    # cache never needs to evict anything. An unbounded cache skips the LRU
+    # bookkeeping and there is no extra wrapper call.
+    return functools.lru_cache(maxsize=None)(func)
 
 
 def eprint(*args, **kwargs):
     print(*args, file=sys.stderr, **kwargs)
 
 
+# make.py sets LV_BUILD_TRACE_DIR when it runs a build. The time spent in
+# each phase of the generation gets saved there in the Chrome trace event
+# format and make.py adds it to build/build_trace.json.
+class GenTrace(object):
+
+    def __init__(self):
+        self.path = os.environ.get('LV_BUILD_TRACE_DIR', None)
+        self.events = []
+        self._name = None
+        self._start_time = time.time()
+        self._phase_start = 0
+
+    def _add(self, name, start, end):
+        self.events.append(dict(
+            name=name,
+            cat='codegen',
+            ph='X',
+            ts=int(start * 1000000),
+            dur=int((end - start) * 1000000),
+            pid=os.getpid(),
+            tid=0
+        ))
+
+    def start(self, name):
+        if self.path is None:
+            return
+
+        self.stop()
+        self._name = name
+        self._phase_start = time.time()
+
+    def stop(self):
+        if self._name is None:
+            return
+
+        self._add(self._name, self._phase_start, time.time())
+        self._name = None
+
+    def save(self):
+        if self.path is None:
+            return
+
+        self.stop()
+        self._add(
+            'generate ' + os.path.basename(args.output),
+            self._start_time,
+            time.time()
+        )
+
+        try:
+            with open(os.path.join(self.path, f'gen_{os.getpid()}.json'), 'w') as f:
+                json.dump(self.events, f)
+        except OSError as err:
+            eprint(f'LVGL-GEN unable to save the build trace: {err}')
+
+
+gen_trace = GenTrace()
+
+
 # from pudb.remote import set_trace
 # set_trace(term_size=(180, 50))
 
@@ -109,7 +171,10 @@ argParser.add_argument('--metadata', dest='metadata', help='Optional file to emi
 argParser.add_argument('--board', dest='board', help='Board or OS', metavar='<Board or OS>', action='store', default='')
 argParser.add_argument('--output', dest='output', help='Output file path', metavar='<Output path>', action='store')
 argParser.add_argument('--debug', dest='debug', help='enable debugging output', action='store_true')
+argParser.add_argument('--reuse-callback-args', dest='reuse_callback_args', help='Comma separated callbacks (C typedef or generated callback name) that pass their struct and array arguments to Python in a reused wrapper object', metavar='<Callback names>', action='append', default=[])
+argParser.add_argument('--flat-method-tables', dest='flat_method_tables', help='Copy the inherited methods into the method table of every object so a method is found in one lookup. Uses more flash', action='store_true')
 argParser.add_argument('--header_file', dest='header', action='store', default=None)
+argParser.add_argument('--cache-dir', dest='cache_dir', help='Directory to cache the parsed headers in, nothing is cached when not given', metavar='<Cache path>', action='store', default=None)
 
 args, unknownargs = argParser.parse_known_args()
 
@@ -122,28 +187,45 @@ lvgl_path = os.path.dirname(input_header)
 private_header = os.path.join(lvgl_path, 'src', 'lvgl_private.h')
 
 lv_config_path = os.path.abspath(os.path.join(lvgl_path, '..', 'lv_conf.h'))
-gen_json_path = os.path.join(lvgl_path, 'scripts/gen_json')
-
-sys.path.insert(0, gen_json_path)
-
-original_nodes = {}
-
-
-for key, value in c_ast.__dict__.items():
-    if inspect.isclass(value):
-        original_nodes[key] = value
 
+# LVGL's json generator parses the headers a second time with its own
+# patched pycparser. It gets run in a separate process so it runs at the
+# same time the headers are preprocessed and parsed below and the patching
+# doesn't leak into this process.
+lvgl_json_path = args.output.rsplit('.', 1)[0] + '.lvgl.json'
+
+# the output goes to a file, a pipe that nobody reads until the parsing
+# is done could fill up and stall the process.
+json_log = open(lvgl_json_path + '.log', 'w+')
+json_proc = subprocess.Popen(
+    [
+        sys.executable,
+        os.path.join(script_path, 'fixed_gen_json.py'),
+        lv_config_path,
+        os.path.join(project_path, 'build', 'lvgl_header.h'),
+        lvgl_json_path
+    ],
+    stdout=json_log,
+    stderr=subprocess.STDOUT
+)
 
-import fixed_gen_json  # NOQA
 
+def get_lvgl_json():
+    exit_code = json_proc.wait()
 
-json_ast = fixed_gen_json.run(lv_config_path, os.path.join(project_path, 'build', 'lvgl_header.h'), False)
+    json_log.seek(0)
+    log_data = json_log.read()
+    json_log.close()
 
-lvgl_json = json_ast.to_dict()
+    if exit_code:
+        sys.stderr.write(log_data.strip() + '\n')
+        sys.stderr.write('EXIT CODE: ' + str(exit_code) + '\n')
+        sys.stderr.flush()
 
+        raise RuntimeError('Unable to create the LVGL json AST')
 
-for key, value in original_nodes.items():
-    setattr(c_ast, key, value)
+    with open(lvgl_json_path, 'r') as json_file:
+        return json.load(json_file)
 
 
 c_ast._repr = _repr
@@ -336,6 +418,33 @@ if not os.path.exists(pp_file):
 #
 # AST parsing helper functions
 #
+
+# Copies an AST the way copy.deepcopy does except only the nodes and the
+# containers holding them get copied. Names, qualifiers and the Coord objects
+# are shared, nothing modifies those in place. deepcopy used to take up most
+# of the generation time.
+def clone_ast(ast):
+    if isinstance(ast, c_ast.Node):
+        cls = ast.__class__
+        new_ast = cls.__new__(cls)
+        for slot in cls.__slots__:
+            if slot == '__weakref__':
+                continue
+            try:
+                value = getattr(ast, slot)
+            except AttributeError:
+                continue
+
+            setattr(new_ast, slot, clone_ast(value))
+
+        return new_ast
+    if isinstance(ast, list):
+        return [clone_ast(item) for item in ast]
+    if isinstance(ast, tuple):
+        return tuple(clone_ast(item) for item in ast)
+
+    return ast
+
 @memoize
 def remove_declname(ast):
     if hasattr(ast, 'declname'):
@@ -408,7 +517,7 @@ def get_type(arg, **kwargs):
     if isinstance(arg, str):
         return arg
     remove_quals_arg = 'remove_quals' in kwargs and kwargs['remove_quals']
-    arg_ast = copy.deepcopy(arg)
+    arg_ast = clone_ast(arg)
     remove_explicit_struct(arg_ast)
     if remove_quals_arg: remove_quals(arg_ast)
     return gen.visit(arg_ast)
@@ -450,7 +559,7 @@ def remove_arg_names(ast):
 # Create a function prototype AST from a function AST
 @memoize
 def function_prototype(func):
-    bare_func = copy.deepcopy(func)
+    bare_func = clone_ast(func)
     remove_declname(bare_func)
 
     ptr_decl = c_ast.PtrDecl(
@@ -668,8 +777,67 @@ gen = c_generator.CGenerator()
 with open(pp_file, 'r') as f:
     pp_data = f.read()
 
-cparser = pycparser.CParser()
-ast = cparser.parse(pp_data, input_header)
+# When --cache-dir is given the preprocessor output gets hashed and the
+# pickled AST is stored in the cache directory under that hash so parsing is
+# skipped when the headers, lv_conf.h and the preprocessor flags produce the
+# same output.
+
+AST_CACHE_VERSION = 1
+
+
+def parse_headers():
+    cache_dir = args.cache_dir
+
+    if not cache_dir:
+        return pycparser.CParser().parse(pp_data, input_header)
+
+    key = hashlib.sha256()
+    for item in (
+        str(AST_CACHE_VERSION),
+        pycparser.__version__,
+        '.'.join(str(v) for v in sys.version_info[:2]),
+        os.path.abspath(input_header),
+        pp_data
+    ):
+        key.update(item.encode('utf-8'))
+        key.update(b'\x00')
+
+    cache_file = os.path.join(cache_dir, key.hexdigest()[:32] + '.pickle')
+
+    if os.path.exists(cache_file):
+        try:
+            with open(cache_file, 'rb') as f:
+                file_ast = pickle.load(f)
+        except Exception as err:  # NOQA
+            LOG('AST cache could not be loaded:', err)
+        else:
+            sys.stderr.write(f'LVGL-GEN using cached AST {cache_file}\n')
+            return file_ast
+
+    file_ast = pycparser.CParser().parse(pp_data, input_header)
+
+    # written to a temporary name and then renamed so an interrupted build or
+    # two builds running at the same time never leave a partial file behind.
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = f'{cache_file}.{os.getpid()}.tmp'
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(file_ast, f, pickle.HIGHEST_PROTOCOL)
+
+        os.replace(tmp_file, cache_file)
+    except Exception as err:  # NOQA
+        sys.stderr.write(f'LVGL-GEN unable to write the AST cache: {err}\n')
+
+    return file_ast
+
+
+gen_trace.start('parse')
+ast = parse_headers()
+
+gen_trace.start('lvgl_json')
+lvgl_json = get_lvgl_json()
+
+gen_trace.start('analyze')
 
 forward_struct_decls = {}
 
@@ -721,7 +889,11 @@ class STDOut:
 
     def __init__(self):
         self._stdout = sys.stdout
-        self._file = open(args.output, 'w')
+        # everything gets written to a temporary file first. The output file
+        # is only replaced if the content changed, an identical binding keeps
+        # its timestamp so make doesn't compile it again.
+        self._tmp_path = f'{args.output}.{os.getpid()}.tmp'
+        self._file = open(self._tmp_path, 'w')
 
         sys.stdout = self  # NOQA
         self._write_to_file = None
@@ -739,7 +911,7 @@ class STDOut:
     def flush(self):
         self._file.flush()
 
-    def close(self):
+    def close(self, discard=False):
         try:
             self._file.close()
         except:  # NOQA
@@ -747,6 +919,19 @@ class STDOut:
         else:
             sys.stdout = self._stdout  # NOQA
 
+        if not os.path.exists(self._tmp_path):
+            return
+
+        if (
+            discard or (
+                os.path.exists(args.output) and
+                filecmp.cmp(self._tmp_path, args.output, shallow=False)
+            )
+        ):
+            os.remove(self._tmp_path)
+        else:
+            os.replace(self._tmp_path, args.output)
+
     def __getattr__(self, item):
         if item in self.__dict__:
             return self.__dict__[item]
@@ -760,7 +945,8 @@ _old_excepthook = sys.excepthook
 
 
 def my_excepthook(exc_type, exc_value, tb):
-    stdout.close()
+    # a failed run leaves the previous output in place
+    stdout.close(discard=True)
     return _old_excepthook(exc_type, exc_value, tb)
 
 
@@ -814,18 +1000,23 @@ obj_ctors = [func for func in funcs if is_obj_ctor(func)]
 
 
 # eprint('CTORS(%d): %s' % (len(obj_ctors), ', '.join(sorted('%s' % ctor.name for ctor in obj_ctors))))
-for obj_ctor in obj_ctors:
-    funcs.remove(obj_ctor)
+if obj_ctors:
+    _obj_ctor_set = set(obj_ctors)
+    funcs = [func for func in funcs if func not in _obj_ctor_set]
 obj_names = [create_obj_pattern.match(ctor.name).group(1) for ctor in obj_ctors]
 
+# name -> ctor, the first declaration wins like the linear search it replaces
+obj_ctors_by_name = {}
+for obj_ctor in obj_ctors:
+    obj_ctors_by_name.setdefault(obj_ctor.name, obj_ctor)
+
 
 def has_ctor(obj_name):
-    return ctor_name_from_obj_name(obj_name) in [ctor.name for ctor in obj_ctors]
+    return ctor_name_from_obj_name(obj_name) in obj_ctors_by_name
 
 
 def get_ctor(obj_name):
-    global obj_ctors
-    return next(ctor for ctor in obj_ctors if ctor.name == ctor_name_from_obj_name(obj_name))
+    return obj_ctors_by_name[ctor_name_from_obj_name(obj_name)]
 
 
 def get_methods(obj_name):
@@ -1264,6 +1455,8 @@ register_int_ptr_type('i64ptr',
 # Emit Header
 #
 
+gen_trace.start('emit')
+
 input_headers = [input_header, private_header]
 
 print ("""
@@ -1805,18 +1998,74 @@ static mp_obj_t lv_to_mp_struct(const mp_obj_type_t *type, void *lv_struct)
     return MP_OBJ_FROM_PTR(self);
 }
 
-static void call_parent_methods(mp_obj_t obj, qstr attr, mp_obj_t *dest)
+// Callbacks listed with --reuse-callback-args hand their struct arguments to
+// Python in a statically allocated wrapper that belongs to the callback
+// instead of allocating a new one on every call. The wrapper only points to
+// the right data while the callback runs.
+
+GENMPY_UNUSED static inline mp_obj_t lv_to_mp_struct_reuse(mp_lv_struct_t *self, const mp_obj_type_t *type, void *lv_struct)
+{
+    if (lv_struct == NULL) return mp_const_none;
+    self->base.type = type;
+    self->data = lv_struct;
+    return MP_OBJ_FROM_PTR(self);
+}
+
+// The locals_dict tables of the generated types are sorted by name so
+// lookup_sorted_attr can do a binary search on them instead of the linear
+// scan mp_map_lookup does on a const dict.
+
+static const mp_obj_type_t mp_lv_base_struct_type;
+static void lookup_sorted_attr(mp_obj_t obj, qstr attr, mp_obj_t *dest);
+
+// The generator sorts the tables of the types that use lookup_sorted_attr,
+// the struct types and the struct base type. Any other table gets the
+// linear lookup.
+static inline bool has_sorted_locals(const mp_obj_type_t *type)
+{
+    return type == &mp_lv_base_struct_type ||
+        MP_OBJ_TYPE_GET_SLOT_OR_NULL(type, attr) == lookup_sorted_attr ||
+        MP_OBJ_TYPE_GET_SLOT_OR_NULL(type, parent) == &mp_lv_base_struct_type;
+}
+
+static mp_map_elem_t *lookup_sorted_map(mp_map_t *map, qstr attr, const char *name)
+{
+    size_t lo = 0;
+    size_t hi = map->used;
+    while (lo < hi) {
+        size_t mid = (lo + hi) / 2;
+        qstr key = MP_OBJ_QSTR_VALUE(map->table[mid].key);
+        if (key == attr) {
+            return &map->table[mid];
+        }
+        if (strcmp(name, qstr_str(key)) < 0) {
+            hi = mid;
+        } else {
+            lo = mid + 1;
+        }
+    }
+    return NULL;
+}
+
+static void lookup_sorted_attr(mp_obj_t obj, qstr attr, mp_obj_t *dest)
 {
+    if (dest[0] != MP_OBJ_NULL) return; // only loads are handled
+
+    const char *name = qstr_str(attr);
     const mp_obj_type_t *type = mp_obj_get_type(obj);
     while (MP_OBJ_TYPE_HAS_SLOT(type, locals_dict)) {
         // generic method lookup
         // this is a lookup in the object (ie not class or type)
-        assert(MP_OBJ_TYPE_GET_SLOT(type, locals_dict)->base.type == &mp_type_dict); // MicroPython restriction, for now
         mp_map_t *locals_map = &MP_OBJ_TYPE_GET_SLOT(type, locals_dict)->map;
-        mp_map_elem_t *elem = mp_map_lookup(locals_map, MP_OBJ_NEW_QSTR(attr), MP_MAP_LOOKUP);
+        mp_map_elem_t *elem;
+        if (locals_map->is_fixed && locals_map->is_ordered && has_sorted_locals(type)) {
+            elem = lookup_sorted_map(locals_map, attr, name);
+        } else {
+            elem = mp_map_lookup(locals_map, MP_OBJ_NEW_QSTR(attr), MP_MAP_LOOKUP);
+        }
         if (elem != NULL) {
             mp_convert_member_lookup(obj, type, elem->value, dest);
-            break;
+            return;
         }
         if (MP_OBJ_TYPE_GET_SLOT_OR_NULL(type, parent) == NULL) {
             break;
@@ -2227,6 +2476,15 @@ GENMPY_UNUSED static mp_obj_t mp_array_from_ ## name(void *lv_arr)\
 GENMPY_UNUSED static void *mp_array_to_ ## name(mp_obj_t mp_arr)\
 {\
     return mp_array_to_ptr(mp_arr, size, is_signed);\
+}\
+GENMPY_UNUSED static mp_obj_t mp_array_from_reuse_ ## name(mp_lv_array_t *self, void *lv_arr)\
+{\
+    *self = (mp_lv_array_t){\
+        { {&mp_lv_array_type}, lv_arr },\
+        size,\
+        is_signed\
+    };\
+    return MP_OBJ_FROM_PTR(self);\
 }
 
 MP_ARRAY_CONVERTOR(u8ptr, 1, false)
@@ -2243,6 +2501,13 @@ MP_ARRAY_CONVERTOR(i64ptr, 8, true)
 #
 # Add regular enums with integer values
 #
+# enum name -> first definition that has values. Forward declared enums get
+# resolved through this.
+enum_defs_by_name = {}
+for enum_def in enum_defs:
+    if hasattr(enum_def.type, 'name') and enum_def.type.values:
+        enum_defs_by_name.setdefault(enum_def.type.name, enum_def)
+
 enums = collections.OrderedDict()
 for enum_def in enum_defs:
     # Skip stdatomic.h memory_order, no bindings needed.
@@ -2251,7 +2516,7 @@ for enum_def in enum_defs:
 
     # eprint("--> %s" % enum_def)
     while hasattr(enum_def.type, 'name') and not enum_def.type.values:
-        enum_def  = next(e for e in enum_defs if hasattr(e.type, 'name') and e.type.name == enum_def.type.name and e.type.values)
+        enum_def = enum_defs_by_name[enum_def.type.name]
     member_names = [member.name for member in enum_def.type.values.enumerators if not member.name.startswith('_')]
     enum_name = os.path.commonprefix(member_names)
     enum_name = "_".join(enum_name.split("_")[:-1]) # remove suffix
@@ -2560,7 +2825,7 @@ static void mp_{sanitized_struct_name}_attr(mp_obj_t self_in, qstr attr, mp_obj_
         switch(attr)
         {{
             {read_cases};
-            default: call_parent_methods(self_in, attr, dest); // fallback to locals_dict lookup
+            default: lookup_sorted_attr(self_in, attr, dest); // fallback to locals_dict lookup
         }}
     }} else {{
         if (dest[1])
@@ -2725,6 +2990,12 @@ def get_arg_name(arg):
 
 # print("// Typedefs: " + ", ".join(get_arg_name(t) for t in typedefs))
 
+# name -> typedefs, try_generate_type looks these up for every type it
+# doesn't know about yet.
+typedefs_by_name = collections.OrderedDict()
+for typedef in typedefs:
+    typedefs_by_name.setdefault(get_arg_name(typedef), []).append(typedef)
+
 
 def try_generate_type(type_ast):
     # eprint(' --> try_generate_type %s : %s' % (get_name(type_ast), gen.visit(type_ast)))
@@ -2791,7 +3062,7 @@ def try_generate_type(type_ast):
     if type in structs:
         if try_generate_struct(type, structs[type]):
             return mp_to_lv[type]
-    for new_type_ast in [x for x in typedefs if get_arg_name(x) == type]:
+    for new_type_ast in typedefs_by_name.get(type, []):
         new_type = get_type(new_type_ast, remove_quals=True)
         if isinstance(new_type_ast, c_ast.TypeDecl) and isinstance(new_type_ast.type, c_ast.Struct) and not new_type_ast.type.decls:
             explicit_struct_name = new_type_ast.type.name if hasattr(new_type_ast.type, 'name') else new_type_ast.type.names[0]
@@ -2864,7 +3135,41 @@ typedef union {
 generated_callbacks = collections.OrderedDict()
 
 
-def build_callback_func_arg(arg, index, func, func_name = None):
+# Struct, blob and array arguments of the callbacks given with
+# --reuse-callback-args are passed to Python in a static wrapper object. Only
+# callbacks where Python doesn't keep the arguments after returning should be
+# listed, the indev read and display flush callbacks are the ones that get
+# called the most.
+reuse_callback_args = set(
+    name.strip()
+    for names in args.reuse_callback_args
+    for name in names.split(',')
+    if name.strip()
+)
+
+
+def get_reuse_wrapper(func_name, index, convertor):
+    wrapper_name = 'mp_%s_arg%d_wrapper' % (sanitize(func_name), index)
+
+    if convertor.startswith('mp_read_ptr_'):
+        struct_type = '&mp_%s_type' % convertor[len('mp_read_ptr_'):]
+    elif convertor == 'ptr_to_mp':
+        struct_type = '&mp_blob_type'
+    elif convertor.startswith('mp_array_from_'):
+        return (
+            'static mp_lv_array_t %s;' % wrapper_name,
+            'mp_array_from_reuse_%s(&%s, (void *)arg%d)' % (convertor[len('mp_array_from_'):], wrapper_name, index)
+        )
+    else:
+        return None
+
+    return (
+        'static mp_lv_struct_t %s;' % wrapper_name,
+        'lv_to_mp_struct_reuse(&%s, %s, (void *)arg%d)' % (wrapper_name, struct_type, index)
+    )
+
+
+def build_callback_func_arg(arg, index, func, func_name = None, wrappers = None):
     arg_type = get_type(arg.type, remove_quals = True)
     cast = '(void*)' if isinstance(arg.type, c_ast.PtrDecl) else '' # needed when field is const. casting to void overrides it
     if arg_type not in lv_to_mp or not lv_to_mp[arg_type]:
@@ -2880,6 +3185,13 @@ def build_callback_func_arg(arg, index, func, func_name = None):
         arg_metadata['name'] = None
 
     callback_metadata[func_name]['args'].append(arg_metadata)
+
+    if wrappers is not None:
+        wrapper = get_reuse_wrapper(func_name, index, lv_to_mp[arg_type])
+        if wrapper is not None:
+            wrappers.append(wrapper[0])
+            return 'mp_args[{i}] = {wrapper};'.format(i = index, wrapper = wrapper[1])
+
     return 'mp_args[{i}] = {convertor}({cast}arg{i});'.format(
                 convertor = lv_to_mp[arg_type],
                 i = index, cast = cast)
@@ -2901,7 +3213,7 @@ def gen_callback_func(func, func_name = None, user_data_argument = False):
                     align=[],
                     storage=[],
                     funcspec=[],
-                    type=copy.deepcopy(arg.type),
+                    type=clone_ast(arg.type),
                     init=None,
                     bitsize=None)
         t = new_arg
@@ -2952,12 +3264,24 @@ def gen_callback_func(func, func_name = None, user_data_argument = False):
 
     callback_metadata[func_name]['c_rtype'] = return_type
     callback_metadata[func_name]['py_rtype'] = get_py_type(return_type)
+
+    if (
+        func_name in reuse_callback_args or
+        sanitize(func_name) in reuse_callback_args or
+        callback_metadata[func_name]['c_type'] in reuse_callback_args
+    ):
+        wrappers = []
+    else:
+        wrappers = None
+
+    build_args = [build_callback_func_arg(arg, i, func, func_name=func_name, wrappers=wrappers) for i,arg in enumerate(args)]
+
     print("""
 /*
  * Callback function {func_name}
  * {func_prototype}
  */
-
+{wrappers}
 GENMPY_UNUSED static {return_type} {func_name}_callback({func_args})
 {{
     mp_obj_t mp_args[{num_args}];
@@ -2974,7 +3298,8 @@ GENMPY_UNUSED static {return_type} {func_name}_callback({func_args})
         return_type = return_type,
         func_args = ', '.join([(gen.visit(arg)) for arg in enumerated_args]),
         num_args=len(args),
-        build_args="\n    ".join([build_callback_func_arg(arg, i, func, func_name=func_name) for i,arg in enumerate(args)]),
+        wrappers = ''.join('\n%s\n' % wrapper for wrapper in wrappers) if wrappers else '',
+        build_args="\n    ".join(build_args),
         user_data=full_user_data,
         return_value_assignment = '' if return_type == 'void' else 'mp_obj_t callback_result = ',
         return_value='' if return_type == 'void' else ' %s(callback_result)' % mp_to_lv[return_type]))
@@ -2990,7 +3315,7 @@ generated_funcs = collections.OrderedDict()
 def build_mp_func_arg(arg, index, func, obj_name):
     if isinstance(arg, c_ast.EllipsisParam):
         raise MissingConversionException("Cannot convert ellipsis param")
-    fixed_arg = copy.deepcopy(arg)
+    fixed_arg = clone_ast(arg)
     convert_array_to_ptr(fixed_arg)
     if not fixed_arg.name:
         fixed_arg.name = "arg%d" % index
@@ -3284,6 +3609,39 @@ def gen_obj_methods(obj_name):
     return members + parent_members + enum_members + enum_types + helper_members
 
 
+locals_entry_re = re.compile(r'MP_ROM_QSTR\(MP_QSTR_(\w+)\)')
+
+
+def sort_locals_entries(entries):
+    # locals_dict tables are sorted by name for the binary search in
+    # lookup_sorted_attr. The first entry wins when a name shows up more than
+    # once, same as with the linear lookup.
+    entries_by_name = collections.OrderedDict()
+    for entry in entries:
+        name = locals_entry_re.search(entry).group(1)
+        if name not in entries_by_name:
+            entries_by_name[name] = entry
+
+    return [entries_by_name[name] for name in sorted(entries_by_name.keys())]
+
+
+obj_locals_entries = {}
+
+
+def gen_obj_locals_entries(obj_name):
+    entries = gen_obj_methods(obj_name)
+
+    # with --flat-method-tables the parent entries get copied in so a method
+    # of lv_obj is found in the table of the widget
+    parent_obj_name = parent_obj_names.get(obj_name, None)
+    if args.flat_method_tables and parent_obj_name in obj_locals_entries:
+        entries = entries + obj_locals_entries[parent_obj_name]
+
+    entries = sort_locals_entries(entries)
+    obj_locals_entries[obj_name] = entries
+    return entries
+
+
 def gen_obj(obj_name):
     # eprint('Generating object %s...' % obj_name)
     is_obj = has_ctor(obj_name)
@@ -3345,7 +3703,7 @@ static MP_DEFINE_CONST_OBJ_TYPE(
     MP_TYPE_FLAG_NONE,
     {make_new}
     {binary_op}
-    attr, call_parent_methods,
+    attr, lookup_sorted_attr,
     {buffer}
     {parent}
     locals_dict, &{obj}_locals_dict
@@ -3361,7 +3719,7 @@ GENMPY_UNUSED static const mp_lv_obj_type_t mp_lv_{obj}_type = {{
             module_name = module_name,
             obj = sanitize(obj_name), base_obj = base_obj_name,
             base_class = '&mp_%s_type' % base_obj_name if should_add_base_methods else 'NULL',
-            locals_dict_entries = ",\n    ".join(gen_obj_methods(obj_name)),
+            locals_dict_entries = ",\n    ".join(gen_obj_locals_entries(obj_name)),
             ctor = ctor.format(obj = obj_name, ctor_name = ctor_func.name) if has_ctor(obj_name) else '',
             make_new = 'make_new, %s_make_new,' % obj_name if is_obj else '',
             binary_op = 'binary_op, mp_lv_obj_binary_op,' if is_obj else '',
@@ -3517,25 +3875,23 @@ def generate_struct_functions(struct_list):
                 struct_funcs.remove(struct_func)
 
         if struct_name not in structs or structs[struct_name].decls:
-            struct_size_attr = '{{ MP_ROM_QSTR(MP_QSTR___SIZE__), MP_ROM_PTR(MP_ROM_INT(sizeof({struct_tag}{struct_name}))) }},'.format(
+            struct_size_attr = ['{{ MP_ROM_QSTR(MP_QSTR___SIZE__), MP_ROM_PTR(MP_ROM_INT(sizeof({struct_tag}{struct_name}))) }}'.format(
                 struct_name = struct_name,
                 struct_tag = 'struct ' if struct_name in structs_without_typedef.keys() else '',
-            )
+            )]
             struct_metadata[get_py_type(struct_name).replace('"', '')]['class_attributes']['__SIZE__'] = {'c_type': 'int', 'py_type': 'int'}
         else:
-            struct_size_attr = ''
+            struct_size_attr = []
         print('''
 static const mp_rom_map_elem_t mp_{sanitized_struct_name}_locals_dict_table[] = {{
-    {struct_size}
-    {functions}
+    {locals_dict_entries}
 }};
 
 static MP_DEFINE_CONST_DICT(mp_{sanitized_struct_name}_locals_dict, mp_{sanitized_struct_name}_locals_dict_table);
         '''.format(
-            struct_size = struct_size_attr,
             sanitized_struct_name = sanitized_struct_name,
-            functions =  ''.join(['{{ MP_ROM_QSTR(MP_QSTR_{name}), MP_ROM_PTR(&mp_{func}_mpobj) }},\n    '.
-                format(name = sanitize(noncommon_part(f.name, struct_name)), func = f.name) for f in struct_funcs]),
+            locals_dict_entries = ',\n    '.join(sort_locals_entries(struct_size_attr + ['{{ MP_ROM_QSTR(MP_QSTR_{name}), MP_ROM_PTR(&mp_{func}_mpobj) }}'.
+                format(name = sanitize(noncommon_part(f.name, struct_name)), func = f.name) for f in struct_funcs])),
         ))
 
         generated_struct_functions[struct_name] = True
@@ -3563,9 +3919,12 @@ for module_func in module_funcs[:]: # clone list because we are changing it in t
     try:
         gen_mp_func(module_func, None)
         # A new function can create new struct with new function structs
-        new_structs = [s for s in generated_structs if s not in generated_struct_functions]
-        if new_structs:
-            generate_struct_functions(new_structs)
+        # every struct in generated_struct_functions is also in
+        # generated_structs so there can only be new ones if it is bigger.
+        if len(generated_structs) > len(generated_struct_functions):
+            new_structs = [s for s in generated_structs if s not in generated_struct_functions]
+            if new_structs:
+                generate_struct_functions(new_structs)
 
     except MissingConversionException as exp:
         gen_func_error(module_func, exp)
@@ -3732,6 +4091,8 @@ for name, metadata in list(variable_metadata.items()):
     del variable_metadata[name]
 
 
+gen_trace.start('metadata')
+
 if args.metadata:
 
     metadata = collections.OrderedDict()
@@ -3761,5 +4122,7 @@ if args.metadata:
 
     stub_gen.run(args.metadata, api_json_path)
 
+gen_trace.save()
+
 stdout.close()
 
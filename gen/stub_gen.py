@@ -1,12 +1,21 @@
 # Copyright (c) 2024 - 2025 Kevin G. Schlosser
 
-import sys
+# Writes the lvgl stubs as a stub package, one file per namespace of the
+# metadata JSON (objects, functions, enums, ...). The JSON is read one
+# top level section at a time and a file only gets written when the hash of
+# its content changed, so editors and build tools don't reindex stubs that
+# are the same as before.
+
+import hashlib
 import json
 import os
+import re
+import sys
 
 SCRIPT_DIR = os.path.abspath(os.path.dirname(__file__))
 OUTPUT_PATH = os.path.abspath(os.path.join(SCRIPT_DIR, '..'))
 OUPUT_FILE = os.path.join(OUTPUT_PATH, 'lvgl.pyi')
+OUTPUT_DIR = os.path.join(OUTPUT_PATH, 'lvgl')
 
 
 func_template = '''\
@@ -288,14 +297,6 @@ def build_struct(cls_name, struct):
     )
 
 
-object_output = []
-func_output = []
-enum_output = []
-constant_output = []
-variable_output = []
-struct_output = []
-
-
 enum_types = set()
 
 
@@ -338,49 +339,59 @@ def read_enums(objs):
 
 
 def build_objects(objects):
-    for name, obj in objects.items():
-        object_output.append(build_class(name, obj))
+    return '\n'.join(build_class(name, obj) for name, obj in objects.items())
 
 
 def build_functions(funcs):
-    for name, func in funcs.items():
-        func_output.append(build_function(name, func))
+    return '\n\n'.join(
+        build_function(name, func) for name, func in funcs.items())
 
 
 def build_enums(enums):
+    output = []
     for name, enum in enums.items():
         enum['class_attributes'] = enum['members']
-        enum_output.append(build_class(name, enum))
+        output.append(build_class(name, enum))
+
+    return '\n\n'.join(output)
 
 
 def build_int_constants(int_constants):
-    for name in int_constants.keys():
-        constant_output.append(f'{name}: int = ...')
+    return '\n'.join(f'{name}: int = ...' for name in int_constants.keys())
 
 
 def build_variables(variables):
-    for name, variable in variables.items():
-        py_type = variable['py_type']
-        variable_output.append(f'{name}: {py_type} = ...')
+    return '\n'.join(
+        f'{name}: {variable["py_type"]} = ...'
+        for name, variable in variables.items()
+    )
 
 
 def build_structs(structs):
-    for name, struct in structs.items():
-        struct_output.append(build_struct(name, struct))
+    return ''.join(
+        build_struct(name, struct) for name, struct in structs.items())
 
 
 def build_enum_types():
     res = []
-    for name in enum_types:
+    for name in sorted(enum_types):
         res.append(f'{name} = int')
 
     return '\n'.join(res)
 
 
-output_template = '''\
-from typing import Union, ClassVar, Callable, List, Any, TypedDict, Optional
+# metadata section -> (stub file, builder)
+sections = {
+    'int_constants': ('_constants', build_int_constants),
+    'enums': ('_enums', build_enums),
+    'structs': ('_structs', build_structs),
+    'objects': ('_objects', build_objects),
+    'variables': ('_variables', build_variables),
+    'functions': ('_functions', build_functions),
+}
 
 
+types_template = '''\
 {enum_types}
 style_prop_t = int
 grad_color_t = int
@@ -434,51 +445,191 @@ class thread_t(object):
 
 class mem_pool_t(object):
     ...
+'''
 
 
-{constants}
+output_template = '''\
+from typing import Union, ClassVar, Callable, List, Any, TypedDict, Optional
 
+{imports}
 
-{enums}
+__all__ = [
+{names}
+]
 
-{structs}
 
-{objects}
+{body}
+'''
 
-{variables}
 
-{funcs}
-'''
+exported_name_re = re.compile(r'^(?:class |def )?([A-Za-z_]\w*)\s*[(:=]', re.M)
 
 
-def run(json_path, lvgl_api_json_path):
+def build_stub(module, body):
+    # the namespaces reference each other so every file star imports the
+    # others. __all__ is filled in so names starting with an underscore get
+    # passed along as well.
+    imports = [
+        f'from .{name} import *' for name in
+        ['_types'] + [section[0] for section in sections.values()]
+        if name != module
+    ]
 
-    with open(json_path, 'r') as f:
-        data = f.read()
-
-    root = json.loads(data)
-
-    read_enums(root)
-
-    build_objects(root['objects'])
-    build_functions(root['functions'])
-    if 'enums' in root:
-        build_enums(root['enums'])
-    if 'variables' in root:
-        build_variables(root['variables'])
-    if 'int_constants' in root:
-        build_int_constants(root['int_constants'])
-    build_structs(root['structs'])
-
-    output = output_template.format(
-            constants='\n'.join(constant_output),
-            enums='\n\n'.join(enum_output),
-            objects='\n'.join(object_output),
-            variables='\n'.join(variable_output),
-            funcs='\n\n'.join(func_output),
-            structs=''.join(struct_output),
-            enum_types=build_enum_types()
-        )
+    names = []
+    for name in exported_name_re.findall(body):
+        if name not in names:
+            names.append(name)
+
+    return output_template.format(
+        imports='\n'.join(imports),
+        names='\n'.join(f'    {repr(name)},' for name in names),
+        body=body
+    )
+
+
+def write_stub(module, content):
+    # returns True when the file was written
+    path = os.path.join(OUTPUT_DIR, module + '.pyi')
+    content = content.encode('utf-8')
+
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            old_hash = hashlib.sha256(f.read()).digest()
+
+        if old_hash == hashlib.sha256(content).digest():
+            return False
+
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
 
-    with open(OUPUT_FILE, 'w') as f:
-        f.write(output)
+    os.replace(tmp_path, path)
+    return True
+
+
+class SectionReader(object):
+    """
+    Reads the top level object of a JSON file one key at a time.
+
+    Only the text of the section that is being decoded is kept in memory,
+    the file gets read in chunks until the value of the current key decodes.
+    """
+
+    def __init__(self, f, chunk_size=65536):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _read(self, size):
+        if self._eof:
+            return False
+
+        data = self._f.read(size)
+        if not data:
+            self._eof = True
+            return False
+
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def _skip(self, chars):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in chars:
+                self._pos += 1
+
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+
+            if not self._read(self._chunk_size):
+                raise ValueError('unexpected end of JSON data')
+
+    def _expect(self, char):
+        if self._skip(' \t\r\n') != char:
+            raise ValueError(f'expected {char!r} at JSON offset {self._pos}')
+
+        self._pos += 1
+
+    def _decode(self):
+        self._skip(' \t\r\n')
+        size = self._chunk_size
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._read(size):
+                    raise
+            else:
+                # a number can end at the end of the buffer and still go on
+                if end < len(self._buf) or not self._read(size):
+                    self._pos = end
+                    return value
+
+            # the read size grows so a large section doesn't get decoded
+            # over and over again
+            size *= 2
+
+    def __iter__(self):
+        self._expect('{')
+        if self._skip(' \t\r\n') == '}':
+            return
+
+        while True:
+            key = self._decode()
+            self._expect(':')
+            value = self._decode()
+
+            yield key, value
+
+            if self._skip(' \t\r\n') == '}':
+                return
+
+            self._expect(',')
+
+
+def run(json_path, lvgl_api_json_path=None):
+    if not os.path.exists(OUTPUT_DIR):
+        os.mkdir(OUTPUT_DIR)
+
+    written = []
+    seen = []
+    with open(json_path, 'r') as f:
+        for key, value in SectionReader(f):
+            read_enums({key: value})
+
+            if key not in sections:
+                continue
+
+            seen.append(key)
+            module, builder = sections[key]
+            if write_stub(module, build_stub(module, builder(value))):
+                written.append(module)
+
+    # an empty stub for anything missing from the metadata so the star imports
+    # don't break and a stub left over from an earlier run doesn't get used
+    for key, (module, _) in sections.items():
+        if key not in seen and write_stub(module, build_stub(module, '')):
+            written.append(module)
+
+    # enum_types is only complete after every section has been read
+    types = build_stub('_types', types_template.format(enum_types=build_enum_types()))
+    if write_stub('_types', types):
+        written.append('_types')
+
+    init = '\n'.join(
+        f'from .{name} import *' for name in
+        ['_types'] + [section[0] for section in sections.values()]
+    ) + '\n'
+    if write_stub('__init__', init):
+        written.append('__init__')
+
+    # the single file stub this package replaces would shadow it
+    if os.path.exists(OUPUT_FILE):
+        os.remove(OUPUT_FILE)
+
+    # stdout is the binding being generated
+    sys.stderr.write(
+        f'lvgl stubs: {len(written)} file(s) updated in {OUTPUT_DIR}\n')
@@ -1,6 +1,6 @@
 # Copyright (c) 2024 - 2025 Kevin G. Schlosser
 
-from typing import Optional, Union
+from typing import Optional, Union, List, Tuple, ClassVar
 from typing import TYPE_CHECKING
 
 
@@ -12,7 +12,13 @@ _BUFFER_TYPE = Union[bytearray, bytes, memoryview, array.array]
 
 
 class I2C(object):
+    PRIORITY_LOW: ClassVar[int] = ...
+    PRIORITY_NORMAL: ClassVar[int] = ...
+    PRIORITY_HIGH: ClassVar[int] = ...
+    PRIORITY_HIGHEST: ClassVar[int] = ...
+
     class Bus(object):
+        priority: int = ...
 
         def __init__(
             self,
@@ -30,6 +36,33 @@ class I2C(object):
         def __exit__(self, exc_type, exc_val, exc_tb) -> None:
             ...
 
+        def enable_stats(self, enable: bool = True) -> None:
+            """
+            Turns the stats on or off and resets them. Nothing gets timed or
+            counted until this is called.
+            """
+            ...
+
+        def get_stats(self) -> Tuple[List[Tuple[int, int, int, int, int, int, int]], int]:
+            """
+            Bus use of every device on the bus.
+
+            :return: a list of (dev_id, priority, transactions, bytes,
+                     busy_us, wait_us, max_wait_us) and the milliseconds
+                     since the stats were reset
+            """
+            ...
+
+        def reset_stats(self) -> None:
+            ...
+
+        def print_stats(self) -> None:
+            """
+            Prints how much of the time each device used the bus and how
+            long it had to wait for it.
+            """
+            ...
+
         def scan(self) -> list:
             ...
 
@@ -71,8 +104,49 @@ class I2C(object):
         _bus: "I2C.Bus" = ...
         dev_id: int = ...
         _reg_bits: int = ...
+        priority: int = ...
+
+        transactions: int = ...
+        bytes: int = ...
+        busy_us: int = ...
+        wait_us: int = ...
+        max_wait_us: int = ...
+
+        def __init__(self, bus: "I2C.Bus", dev_id: int, reg_bits: int = 8, priority: Optional[int] = None):
+            """
+            :param priority: one of the `I2C.PRIORITY_*` constants, decides
+                             which waiting device gets the bus next when the
+                             bus was created with `use_locks=True`.
+                             Defaults to `I2C.PRIORITY_NORMAL`, the touch
+                             and IO expander drivers raise it when it
+                             isn't given.
+            """
+            ...
 
-        def __init__(self, bus: "I2C.Bus", dev_id: int, reg_bits: int = 8):
+        def set_default_priority(self, priority: int) -> None:
+            """
+            Sets the priority unless one was passed to the constructor.
+            """
+            ...
+
+        def deinit(self) -> None:
+            """
+            Removes the device from the stats of the bus.
+            """
+            ...
+
+        def __enter__(self) -> "I2C.Device":
+            """
+            Keeps the bus until the with block ends so a number of
+            transactions can be done without another device getting in
+            between.
+            """
+            ...
+
+        def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+            ...
+
+        def reset_stats(self) -> None:
             ...
 
         def write_readinto(self, write_buf: _BUFFER_TYPE, read_buf: _BUFFER_TYPE) -> None:
@@ -84,6 +158,18 @@ class I2C(object):
         def write_mem(self, memaddr: int, buf: _BUFFER_TYPE):
             ...
 
+        def write_then_readinto(self, write_buf: _BUFFER_TYPE, read_buf: _BUFFER_TYPE) -> None:
+            """
+            Writes and then reads with a repeated start in between.
+            """
+            ...
+
+        def write_vector(self, vector: List[_BUFFER_TYPE]) -> None:
+            """
+            Writes all of the buffers in a single transaction.
+            """
+            ...
+
         def read(self, nbytes: Optional[int] = None, buf: Optional[_BUFFER_TYPE] = None, stop: bool=True) -> Optional[bytes]:
             ...
 
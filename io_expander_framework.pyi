@@ -59,25 +59,44 @@ class Pin(object):
     PULL_DOWN: ClassVar[int] = ...
 
     _id: int = ...
+    _bit: int = ...
     _mode: int = ...
-    _buf: bytearray = ...
-    _mv: memoryview = ...
+    _buf: ClassVar[bytearray] = ...
+    _mv: ClassVar[memoryview] = ...
+    _output_states: ClassVar[int] = ...
+    _dir_states: ClassVar[int] = ...
+    _pull_states: ClassVar[int] = ...
+    _pull_up_states: ClassVar[int] = ...
     _adc: Union["ADC", None] = ...
     _pwm: Union["PWM", None] = ...
     _irq: Union[Callable[["Pin"], None], None] = ...
     _int_pin: ClassVar[machine.Pin | None] = ...
     _reg_int_pins: ClassVar[list["Pin"]] = ...
     _device: ClassVar[i2c.I2C.Device | machine.SPI.Device | None] = ...
+    # given to an i2c.I2C.Device that was created without a priority
+    _i2c_priority: ClassVar[int] = ...
     _irq_input_state: int = 0
+    _int_states: ClassVar[int] = ...
+    _int_scheduled: ClassVar[bool] = ...
 
     def __init__(self, id: int, mode: int = -1, pull: int | None = -1, value: int | float = -1):
         ...
 
     @classmethod
     def _int_cb(cls, pin: machine.Pin) -> None:
+        """
+        Interrupt pin handler, schedules :meth:`_int_read`.
+        """
         ...
 
-    def _interrupt_cb(self) -> None:
+    @classmethod
+    def _int_read(cls, _) -> None:
+        """
+        Reads the port once and calls the handlers of the pins that changed.
+        """
+        ...
+
+    def _interrupt_cb(self, states: int) -> None:
         ...
 
     @classmethod
@@ -88,6 +107,26 @@ class Pin(object):
     def set_device(cls, device: i2c.I2C.Device | machine.SPI.Device):
         ...
 
+    @classmethod
+    def write_port(cls, mask: int, values: int) -> None:
+        """
+        Sets several outputs at once.
+
+        The outputs whose bits are set in `mask` get the level of the same
+        bit in `values`. This is a single write to the device and nothing
+        gets written when none of the outputs change.
+
+        :param mask: bits of the outputs to set
+        :param values: levels of the outputs
+        """
+        ...
+
+    @classmethod
+    def read_port(cls) -> int:
+        """
+        Reads the level of every pin with a single read.
+        """
+        ...
 
     def init(self, mode: int = -1, pull: int | None = -1, value: int = -1) -> None:
         ...
@@ -131,6 +170,34 @@ class Pin(object):
     def _get_level(self) -> int | float | None:
         ...
 
+    @staticmethod
+    def _pin_bit(id: int) -> int:
+        ...
+
+    @classmethod
+    def _init_device(cls) -> None:
+        ...
+
+    @classmethod
+    def _write_output(cls, states: int) -> None:
+        ...
+
+    @classmethod
+    def _write_dir(cls, states: int) -> None:
+        ...
+
+    @classmethod
+    def _write_pull(cls, enabled: int, up: int) -> None:
+        ...
+
+    @classmethod
+    def _read_input(cls) -> int:
+        ...
+
+    @classmethod
+    def _read_int_states(cls) -> int:
+        ...
+
 
 class PWM:
     _pin: Pin = ...
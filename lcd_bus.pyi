@@ -206,6 +206,76 @@ class SDLBus:
     def poll_events(self):
         ...
 
+
+class HeadlessBus:
+    """
+    Unix only. Flushed areas are copied into a frame buffer in memory
+    instead of being sent to a display.
+    """
+
+    def __init__(
+        self,
+        *,
+        checksum: bool = False
+    ):
+        """
+        :param checksum: calculate a checksum of the frame buffer after the
+                         last flush of every frame (see `get_stats`).
+        """
+        ...
+
+    def init(
+        self, width: int, height: int, bpp: int, buffer_size: int,
+        rgb565_byte_swap: bool, cmd_bits: int, param_bits: int, /
+    ) -> None:
+        ...
+
+    def deinit(self) -> None:
+        ...
+
+    def register_callback(self, callback: Callable[[Any, Any], None], /) -> None:
+        ...
+
+    def tx_param(self, cmd: int, params: Optional[_BufferType] = None, /) -> None:
+        ...
+
+    def tx_color(self, cmd: int, data: _BufferType, start_x: int, start_y: int, end_x: int, end_y: int, rotation: int, last_update: bool, /) -> None:
+        ...
+
+    def get_lane_count(self) -> int:
+        ...
+
+    def allocate_framebuffer(self, size: int, caps: int, /) -> Union[None, memoryview]:
+        ...
+
+    def free_framebuffer(self, framebuffer: memoryview, /) -> None:
+        ...
+
+    def get_framebuffer(self) -> Optional[memoryview]:
+        """
+        The off screen frame buffer, width * height pixels in the color
+        format of the display.
+        """
+        ...
+
+    def checksum(self) -> int:
+        """
+        FNV-1a checksum of the frame buffer.
+        """
+        ...
+
+    def get_stats(self) -> dict:
+        """
+        Returns a dict with "frames", "flushes", "params" and "bytes" (totals)
+        and "frame_flushes", "frame_bytes" and "frame_checksum" for the last
+        completed frame.
+        """
+        ...
+
+    def reset_stats(self) -> None:
+        ...
+
+
 class RGBBus:
 
     def __init__(
@@ -15,6 +15,12 @@ SCRIPT_DIR = os.path.abspath(os.path.dirname(sys.argv[0]))
 MPY_DIR = os.path.join(SCRIPT_DIR, 'micropython')
 
 
+if len(sys.argv) > 1 and sys.argv[1] == 'matrix':
+    from builder import matrix
+
+    sys.exit(matrix.run(SCRIPT_DIR, sys.argv[2:]))
+
+
 argParser = ArgumentParser(prefix_chars='-')
 argParser.add_argument(
     '--custom-board-path',
@@ -181,6 +187,31 @@ argParser.add_argument(
     action='store_true'
 )
 
+argParser.add_argument(
+    '--build-cache',
+    dest='build_cache',
+    help=(
+        'restore the firmware from a cache if the same build has been done '
+        'before, optionally the directory to keep the cache in'
+    ),
+    nargs='?',
+    const=os.path.join(SCRIPT_DIR, 'build_cache'),
+    default=None,
+    action='store'
+)
+
+argParser.add_argument(
+    '--init-stream-config',
+    dest='init_stream_config',
+    help=(
+        'display setting used when precompiling the display init '
+        'commands, KEY=VALUE (display_width, display_height, color_space, '
+        'color_byte_order, rgb565_byte_swap, data_bus, lane_count)'
+    ),
+    action='append',
+    default=[]
+)
+
 
 args2, extra_args = argParser.parse_known_args(extra_args)
 
@@ -193,6 +224,12 @@ indevs = args2.indevs
 expanders = args2.expanders
 imus = args2.imus
 builder.DO_NOT_SCRUB_BUILD_FOLDER = args2.no_scrub
+build_cache_dir = args2.build_cache
+
+if args2.init_stream_config:
+    builder.INIT_STREAM_CONFIG = builder.init_stream.parse_config(
+        args2.init_stream_config
+    )
 
 if imus:
     os.environ['FUSION'] = "1"
@@ -248,6 +285,10 @@ def create_lvgl_header():
 if __name__ == '__main__':
 
     from builder import set_mp_version
+    from builder import build_trace
+
+    trace = build_trace.BuildTrace(os.path.join(SCRIPT_DIR, 'build'))
+    trace.register()
 
     if sys.platform.startswith('win'):
         from builder import setup_windows_build
@@ -277,6 +318,13 @@ if __name__ == '__main__':
     else:
         import builder as mod
 
+    trace.instrument(builder)
+    trace.instrument(mod)
+
+    get_submodules = trace.wrap(get_submodules)
+    set_mp_version = trace.wrap(set_mp_version, cat='patch')
+    create_lvgl_header = trace.wrap(create_lvgl_header)
+
     get_submodules()
 
     if custom_board_path is not None:
@@ -299,6 +347,31 @@ if __name__ == '__main__':
     extra_args = mod.build_commands(
         target, extra_args, SCRIPT_DIR, lv_cflags, board)
 
+    build_cache = None
+    if build_cache_dir is not None:
+        from builder import build_cache as build_cache_mod
+
+        cache_key = build_cache_mod.get_key(
+            args1.target[0], board, lv_cflags, extra_args, args.toml,
+            displays + indevs + expanders + imus +
+            [custom_board_path, frozen_manifest] +
+            args2.init_stream_config +
+            getattr(mod, 'components', []) +
+            getattr(mod, 'user_c_modules', [])
+        )
+
+        if cache_key is not None:
+            build_cache = build_cache_mod.BuildCache(build_cache_dir, cache_key)
+
+            # a clean build always runs and replaces what is in the cache.
+            # So does a build that flashes the board, the flashing is done
+            # by the build (esp32 deploy).
+            if getattr(mod, 'deploy', False):
+                print('build cache: deploy was given, the build is not restored')
+            elif not clean and build_cache.restore():
+                print(f'Restored build {cache_key[:12]} from the build cache')
+                sys.exit(0)
+
     if clean:
         print('Cleaning build....')
         mod.force_clean(True)
@@ -322,4 +395,10 @@ if __name__ == '__main__':
     create_lvgl_header()
 
     print('Compiling....')
+    if build_cache is not None:
+        build_cache.start()
+
     mod.compile(*extra_args)
+
+    if build_cache is not None:
+        build_cache.store()
@@ -1,9 +1,11 @@
 # Copyright (c) 2024 - 2025 Kevin G. Schlosser
 
-from typing import Optional, Tuple, TYPE_CHECKING
+from typing import Optional, Tuple, Union, ClassVar, TYPE_CHECKING
+import array
 import _indev_base
 import lcd_utils as _lcd_utils
 import lvgl as _lv  # NOQA
+import machine as _machine  # NOQA
 
 lv = _lv
 
@@ -18,19 +20,120 @@ remap = _lcd_utils.remap
 _remap = _lcd_utils.remap
 
 
+class GestureRecognizer(object):
+    """
+    Two finger pinch, rotate and pan recognition.
+
+    Created with :meth:`PointerDriver.enable_gestures`. The events are sent
+    to the indev and to the object being pressed, the values are read from
+    the recognizer in the event callback.
+    """
+    PINCH: int = ...
+    ROTATE: int = ...
+    PAN: int = ...
+    END: int = ...
+
+    pinch_threshold: float = ...
+    rotate_threshold: float = ...
+    pan_threshold: int = ...
+
+    active: bool = ...
+    pinching: bool = ...
+    rotating: bool = ...
+    panning: bool = ...
+
+    scale: float = ...
+    rotation: float = ...
+    pan_x: int = ...
+    pan_y: int = ...
+    center_x: int = ...
+    center_y: int = ...
+
+    def __init__(self, pointer: "PointerDriver"):
+        ...
+
+    def update(self, points: array.array, count: int) -> None:
+        ...
+
+
 class PointerDriver(_indev_base.IndevBase):
+    max_points: int = ...
+    # given to an i2c.I2C.Device that was created without a priority
+    _i2c_priority: ClassVar[int] = ...
+    gestures: Optional[GestureRecognizer] = ...
+
     _last_x: int = ...
     _last_y: int = ...
     _orig_width: int = ...
     _orig_height: int = ...
     _config: _touch_cal_data.TouchCalData = ...
+    _transform: Tuple[int, int, int, int, int, int] = ...
 
     def __init__(self, touch_cal: Optional[_touch_cal_data.TouchCalData] = None, startup_rotation=lv.DISPLAY_ROTATION._0, debug: bool=False):
         ...
 
+    def enable_irq(
+        self,
+        pin: Union[int, _machine.Pin],
+        trigger: Optional[int] = None,
+        poll_period: int = 30
+    ) -> None:
+        """
+        Reads the touch controller only after an interrupt.
+
+        The indev is put into event mode and the controller is read from a
+        scheduled callback when the interrupt pin fires. While the screen
+        is touched the controller is polled every `poll_period` milliseconds
+        until the touch is released.
+
+        :param pin: interrupt pin, a pin number or a `machine.Pin`
+        :param trigger: pin trigger, defaults to `machine.Pin.IRQ_FALLING`
+        :param poll_period: polling period in milliseconds while touched
+        """
+        ...
+
+    def disable_irq(self) -> None:
+        """
+        Goes back to the LVGL read timer polling the touch controller.
+        """
+        ...
+
+    def enable_gestures(self) -> GestureRecognizer:
+        """
+        Turns on pinch, rotate and pan recognition.
+
+        :raises: RuntimeError if the driver only reads a single touch point
+        """
+        ...
+
+    def disable_gestures(self) -> None:
+        ...
+
+    def get_point_count(self) -> int:
+        """
+        Number of touch points from the last read.
+        """
+        ...
+
+    def get_touch_point(self, index: int) -> Tuple[int, int, int]:
+        """
+        A touch point from the last read as (id, x, y) in display coordinates.
+        """
+        ...
+
     def calibrate(self) -> None:
         ...
 
+    def update_transform(self) -> None:
+        """
+        Rebuilds the coordinate transform from the calibration data and the
+        startup rotation.
+
+        This is done when the driver is created and after :meth:`calibrate`,
+        call it if the calibration data is changed any other way.
+        """
+        ...
+
     @property
     def is_calibrated(self) -> bool:
         ...
@@ -50,6 +153,24 @@ class PointerDriver(_indev_base.IndevBase):
         """
         ...
 
+    def _get_points(self, points: array.array) -> int:
+        """
+        Reads all of the active touch points.
+
+        Multi touch drivers override this and return
+        :meth:`_get_multi_coords` from :meth:`_get_coords`. The points get
+        written to `points` as id, x, y.
+
+        :return: the number of points
+        """
+        ...
+
+    def _get_multi_coords(self) -> Optional[Tuple[int, int, int]]:
+        ...
+
+    def _calc_coords(self, x: int, y: int) -> Tuple[int, int]:
+        ...
+
     def get_vect(self, point: lv.point_t):
         ...
 
@@ -1,8 +1,9 @@
 # MIT license; Copyright (c) 2021 Amir Gonnen
 # Copyright (c) 2024 - 2025 Kevin G. Schlosser
 
-from typing import Callable, ClassVar, Optional
+from typing import Any, Callable, ClassVar, Optional, Tuple, Dict, Union
 from machine import Timer
+import array
 
 _default_timer_id: int = ...
 
@@ -12,6 +13,41 @@ def _default_exception_hook(e: Exception):
 
 ##############################################################################
 
+class FrameProfiler(object):
+    size: int = ...
+    frames: int = ...
+    dropped: int = ...
+    flush_count: int = ...
+
+    _render: array.array = ...
+    _callback: array.array = ...
+    _lag: array.array = ...
+    _flushes: array.array = ...
+
+    def __init__(self, size: int = 64):
+        ...
+
+    def add(self, render: int, callback: int, lag: int) -> None:
+        ...
+
+    # called by the timer when it schedules a frame
+    def fired(self) -> None:
+        ...
+
+    # scheduler lag in microseconds of the frame that starts at frame_start
+    def get_lag(self, frame_start: int) -> int:
+        ...
+
+    def reset(self) -> None:
+        ...
+
+    # keys "render", "callback", "lag" and "flushes" hold a
+    # (min, avg, p95, max) tuple. "frames" and "dropped" are counts.
+    # times are in microseconds.
+    def summary(self) -> Dict[str, Union[int, Tuple[int, int, int, int]]]:
+        ...
+
+
 class TaskHandler(object):
     _current_instance: Optional[ClassVar["TaskHandler"]] = ...
 
@@ -19,18 +55,28 @@ class TaskHandler(object):
     refresh_cb: Optional[Callable] = ...
     _timer: Timer = ...
     _task_handler_ref: Callable = ...
+    _timer_cb_ref: Callable = ...
 
     exception_hook: Callable[[Exception], None] = ...
     max_scheduled: int = ...
     _scheduled: int = ...
 
+    adaptive: bool = ...
+    min_period: int = ...
+    max_period: int = ...
+
+    _profiler: Optional[FrameProfiler] = ...
+
     def __init__(
         self,
         duration: int = 33,
         timer_id: int = _default_timer_id,
         max_scheduled: int = 2,
         refresh_cb: Optional[Callable] = None,
-        exception_hook: Callable[[Exception], None] = _default_exception_hook
+        exception_hook: Callable[[Exception], None] = _default_exception_hook,
+        adaptive: bool = False,
+        min_period: int = 5,
+        max_period: int = 500
     ):
         ...
 
@@ -43,12 +89,77 @@ class TaskHandler(object):
     def enable(self) -> None:
         ...
 
+    # adaptive mode only, run the task handler after min_period
+    def wake(self) -> None:
+        ...
+
+    def _set_period(self, period: int) -> None:
+        ...
+
+    def _refresh_pending(self) -> bool:
+        ...
+
     @classmethod
     def is_running(cls) -> bool:
         ...
 
+    def enable_profiling(self, size: int = 64) -> FrameProfiler:
+        ...
+
+    def disable_profiling(self) -> None:
+        ...
+
+    def get_profiler(self) -> Optional[FrameProfiler]:
+        ...
+
     def _task_handler(self, _) -> None:
         ...
 
     def _timer_cb(self, _) -> None:
         ...
+
+
+class AsyncTaskHandler(object):
+    _current_instance: Optional[ClassVar["AsyncTaskHandler"]] = ...
+
+    min_period: int = ...
+    max_period: int = ...
+    exception_hook: Optional[Callable[[Exception], None]] = ...
+
+    def __init__(
+        self,
+        min_period: int = 1,
+        max_period: int = 100,
+        exception_hook: Optional[Callable[[Exception], None]] = None
+    ):
+        ...
+
+    def add_event_cb(
+        self,
+        callback: Callable[[int, Any], Optional[bool]],
+        event: int,
+        user_data: Any = ...
+    ) -> None:
+        ...
+
+    def remove_event_cb(
+        self,
+        callback: Callable[[int, Any], Optional[bool]]
+    ) -> None:
+        ...
+
+    @classmethod
+    def is_running(cls) -> bool:
+        ...
+
+    def start(self) -> Any:
+        ...
+
+    def stop(self) -> None:
+        ...
+
+    def deinit(self) -> None:
+        ...
+
+    async def run(self) -> None:
+        ...